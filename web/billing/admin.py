@@ -0,0 +1,148 @@
+from core.paginator import EstimatedCountPaginator
+from django.contrib import admin
+from django.db.models import Exists, OuterRef
+from django.utils.html import format_html
+
+from .models import (
+    ACTIVE_SUBSCRIPTION_STATUSES,
+    Price,
+    Product,
+    StripeCustomer,
+    Subscription,
+    WebhookEvent,
+)
+
+
+@admin.register(StripeCustomer)
+class StripeCustomerAdmin(admin.ModelAdmin):
+    list_display = ["user", "stripe_customer_id", "has_active_sub", "created_at"]
+    search_fields = ["user__email", "stripe_customer_id"]
+    readonly_fields = ["stripe_customer_id", "created_at"]
+    list_select_related = ["user"]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        # Annotate active status with a subquery instead of a query per row
+        return (
+            super()
+            .get_queryset(request)
+            .annotate(
+                has_active=Exists(
+                    Subscription.objects.filter(
+                        customer=OuterRef("pk"),
+                        status__in=ACTIVE_SUBSCRIPTION_STATUSES,
+                    )
+                )
+            )
+        )
+
+    def has_active_sub(self, obj):
+        """Show subscription status with color coding"""
+        if obj.has_active:
+            return format_html('<span style="color: green;">✓ Active</span>')
+        return format_html('<span style="color: gray;">No subscription</span>')
+
+    has_active_sub.short_description = "Subscription"
+    has_active_sub.admin_order_field = "has_active"
+
+
+@admin.register(Subscription)
+class SubscriptionAdmin(admin.ModelAdmin):
+    list_display = [
+        "customer_email",
+        "status_colored",
+        "stripe_price_id",
+        "current_period_end",
+        "cancel_at_period_end",
+        "created_at",
+    ]
+    list_filter = ["status", "cancel_at_period_end", "created_at"]
+    list_select_related = ["customer__user"]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    search_fields = [
+        "customer__user__email",
+        "stripe_subscription_id",
+        "stripe_price_id",
+    ]
+    readonly_fields = [
+        "stripe_subscription_id",
+        "created_at",
+        "updated_at",
+        "days_until_period_end",
+    ]
+    ordering = ["-created_at"]
+
+    def customer_email(self, obj):
+        return obj.customer.user.email
+
+    customer_email.short_description = "Customer"
+    customer_email.admin_order_field = "customer__user__email"
+
+    def status_colored(self, obj):
+        """Show status with appropriate color"""
+        colors = {
+            "active": "green",
+            "trialing": "blue",
+            "past_due": "orange",
+            "canceled": "red",
+            "unpaid": "red",
+        }
+        color = colors.get(obj.status, "gray")
+        return format_html(
+            '<span style="color: {};">{}</span>', color, obj.get_status_display()
+        )
+
+    status_colored.short_description = "Status"
+    status_colored.admin_order_field = "status"
+
+    def get_readonly_fields(self, request, obj=None):
+        # Make stripe_subscription_id readonly after creation
+        if obj:
+            return self.readonly_fields + ["stripe_subscription_id", "customer"]
+        return self.readonly_fields
+
+
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+    list_display = ["stripe_event_id", "type", "status", "attempts", "created_at"]
+    list_filter = ["status", "type"]
+    search_fields = ["stripe_event_id"]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    readonly_fields = [
+        "stripe_event_id",
+        "type",
+        "payload",
+        "attempts",
+        "claimed_at",
+        "last_error",
+        "created_at",
+        "processed_at",
+    ]
+    ordering = ["-created_at"]
+
+
+@admin.register(Product)
+class ProductAdmin(admin.ModelAdmin):
+    list_display = ["name", "stripe_product_id", "active", "updated_at"]
+    list_filter = ["active"]
+    search_fields = ["name", "stripe_product_id"]
+    readonly_fields = ["stripe_product_id", "created_at", "updated_at"]
+
+
+@admin.register(Price)
+class PriceAdmin(admin.ModelAdmin):
+    list_display = [
+        "stripe_price_id",
+        "product",
+        "unit_amount",
+        "currency",
+        "recurring_interval",
+        "active",
+    ]
+    list_filter = ["active", "currency", "recurring_interval"]
+    list_select_related = ["product"]
+    search_fields = ["stripe_price_id", "product__name"]
+    readonly_fields = ["stripe_price_id", "created_at", "updated_at"]
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class BillingConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "billing"
+    # The app was named "stripe" until it was renamed so that it no longer
+    # shadows the Stripe SDK; the label keeps its tables and migrations
+    label = "stripe"
+    verbose_name = "Stripe"
@@ -0,0 +1,65 @@
+"""
+Per-user subscription entitlement cache.
+
+Entries hold the `get_user_subscription_status` payload for a user. They are
+invalidated whenever a subscription changes and expire after
+`STRIPE_ENTITLEMENT_CACHE_TTL` seconds as a safety net.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from metrics.collectors import track_cache_operation
+
+ENTITLEMENT_CACHE_PREFIX = "entitlement"
+
+
+def _entitlement_cache_key(user_id):
+    return f"{ENTITLEMENT_CACHE_PREFIX}:{user_id}"
+
+
+def get_cached_entitlement(user_id):
+    """Return the cached subscription status for a user, or None on a miss"""
+    status_info = cache.get(_entitlement_cache_key(user_id))
+    track_cache_operation(
+        "hit" if status_info is not None else "miss", ENTITLEMENT_CACHE_PREFIX
+    )
+    return status_info
+
+
+def cache_entitlement(user_id, status_info):
+    """Store the subscription status for a user"""
+    cache.set(
+        _entitlement_cache_key(user_id),
+        status_info,
+        settings.STRIPE_ENTITLEMENT_CACHE_TTL,
+    )
+    track_cache_operation("set", ENTITLEMENT_CACHE_PREFIX)
+
+
+def invalidate_entitlement(user_id):
+    """
+    Drop the cached subscription status for a user
+
+    The delete runs after the current transaction commits so a concurrent
+    request cannot re-cache the pre-commit state.
+    """
+
+    def delete():
+        cache.delete(_entitlement_cache_key(user_id))
+        track_cache_operation("delete", ENTITLEMENT_CACHE_PREFIX)
+
+    transaction.on_commit(delete)
+
+
+def invalidate_entitlements(user_ids):
+    """Drop the cached subscription status for many users at once"""
+    keys = [_entitlement_cache_key(user_id) for user_id in user_ids]
+    if not keys:
+        return
+
+    def delete():
+        cache.delete_many(keys)
+        track_cache_operation("delete", ENTITLEMENT_CACHE_PREFIX)
+
+    transaction.on_commit(delete)
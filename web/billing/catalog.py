@@ -0,0 +1,72 @@
+"""
+Price catalog served to the pricing page.
+
+The catalog is a snapshot of active recurring prices, built from
+`settings.STRIPE_PRICES` when configured and otherwise from the local
+Product/Price tables. It is cached under one key together with its ETag and
+rebuilt by the `sync_price_catalog` beat task and whenever a `product.*` or
+`price.*` webhook changes the tables.
+"""
+
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from metrics.collectors import track_cache_operation
+
+from .models import Price
+
+PRICE_CATALOG_CACHE_KEY = "price_catalog"
+
+
+def build_price_catalog():
+    """Build the catalog snapshot and its ETag"""
+    if hasattr(settings, "STRIPE_PRICES"):
+        prices = list(settings.STRIPE_PRICES)
+    else:
+        prices = [
+            {
+                "id": price.stripe_price_id,
+                "unit_amount": price.unit_amount,
+                "currency": price.currency,
+                "interval": price.recurring_interval,
+                "interval_count": price.recurring_interval_count,
+                "product_name": price.product.name,
+            }
+            for price in Price.objects.filter(
+                active=True, type="recurring", product__active=True
+            )
+            .select_related("product")
+            .order_by("unit_amount", "stripe_price_id")
+        ]
+
+    digest = hashlib.sha256(
+        json.dumps(prices, sort_keys=True, default=str).encode()
+    ).hexdigest()
+    return {"etag": f'"{digest[:32]}"', "prices": prices}
+
+
+def refresh_price_catalog():
+    """Rebuild the catalog snapshot and store it in the cache"""
+    catalog = build_price_catalog()
+    cache.set(PRICE_CATALOG_CACHE_KEY, catalog, settings.STRIPE_PRICE_CATALOG_CACHE_TTL)
+    track_cache_operation("set", PRICE_CATALOG_CACHE_KEY)
+    return catalog
+
+
+def schedule_price_catalog_refresh():
+    """Rebuild the catalog once the current transaction commits"""
+    transaction.on_commit(refresh_price_catalog)
+
+
+def get_price_catalog():
+    """Return the cached catalog snapshot, building it on a miss"""
+    catalog = cache.get(PRICE_CATALOG_CACHE_KEY)
+    if catalog is not None:
+        track_cache_operation("hit", PRICE_CATALOG_CACHE_KEY)
+        return catalog
+
+    track_cache_operation("miss", PRICE_CATALOG_CACHE_KEY)
+    return refresh_price_catalog()
@@ -0,0 +1,264 @@
+"""
+Shared Stripe API clients.
+
+Stripe is imported and configured lazily, on first use, instead of at import
+time, so processes that never call Stripe do not pay for loading the SDK. Each
+process keeps one `StripeClient` for sync calls, backed by a pooled
+`requests.Session`, and one for `*_async` calls, backed by an
+`httpx.AsyncClient`, so calls reuse keep-alive connections to the Stripe API.
+
+Every call should be wrapped in `stripe_call()`, which records latency and
+errors and feeds a per-process circuit breaker. Once Stripe has failed
+`STRIPE_CIRCUIT_BREAKER_FAILURE_THRESHOLD` times in a row, calls fail fast
+with `StripeUnavailable` for `STRIPE_CIRCUIT_BREAKER_RESET_SECONDS`, after
+which a single trial call decides whether the breaker closes again.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+import structlog
+from django.conf import settings
+from metrics.collectors import track_stripe_call, update_stripe_circuit_breaker
+from requests.adapters import HTTPAdapter
+
+logger = structlog.get_logger(__name__)
+
+_lock = threading.Lock()
+_client = None
+_async_client = None
+
+
+class StripeUnavailable(Exception):
+    """Raised instead of calling Stripe while the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker shared by all threads of a process"""
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_progress = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+    def before_call(self):
+        """Raise `StripeUnavailable` if the call should not reach Stripe"""
+        with self._lock:
+            if self.opened_at is None:
+                return
+            if (
+                time.monotonic() - self.opened_at < self.reset_timeout
+                or self.trial_in_progress
+            ):
+                raise StripeUnavailable("Stripe is temporarily unavailable")
+            # Half-open: let this call through to probe Stripe
+            self.trial_in_progress = True
+
+    def record_success(self):
+        with self._lock:
+            was_open = self.opened_at is not None
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_progress = False
+        if was_open:
+            logger.info("Stripe circuit breaker closed")
+            update_stripe_circuit_breaker(False)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.trial_in_progress = False
+            if self.opened_at is None and self.failures < self.failure_threshold:
+                return
+            opening = self.opened_at is None
+            self.opened_at = time.monotonic()
+        if opening:
+            logger.warning("Stripe circuit breaker opened", failures=self.failures)
+            update_stripe_circuit_breaker(True)
+
+    def release_trial(self):
+        """Let another call probe Stripe, after a trial call that never finished"""
+        with self._lock:
+            self.trial_in_progress = False
+
+    def reset(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_progress = False
+        update_stripe_circuit_breaker(False)
+
+
+breaker = CircuitBreaker(
+    failure_threshold=settings.STRIPE_CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=settings.STRIPE_CIRCUIT_BREAKER_RESET_SECONDS,
+)
+
+
+def _is_outage(error):
+    """Whether an error means Stripe is degraded, rather than a bad request"""
+    import stripe
+
+    return isinstance(
+        error,
+        (
+            stripe.error.APIConnectionError,
+            stripe.error.APIError,
+            stripe.error.RateLimitError,
+        ),
+    )
+
+
+@contextmanager
+def stripe_call(operation):
+    """
+    Guard a Stripe API call with the circuit breaker and record metrics
+
+    Usage:
+        with stripe_call("subscriptions.retrieve"):
+            client.subscriptions.retrieve(subscription_id)
+
+    Raises:
+        StripeUnavailable: If the circuit breaker is open
+    """
+    try:
+        breaker.before_call()
+    except StripeUnavailable:
+        track_stripe_call(operation, "circuit_open")
+        raise
+
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        duration = time.perf_counter() - start
+        if _is_outage(e):
+            breaker.record_failure()
+        else:
+            # Stripe answered, so it is reachable
+            breaker.record_success()
+        track_stripe_call(operation, type(e).__name__, duration)
+        raise
+    except BaseException:
+        # Cancelled (e.g. asyncio.CancelledError when a client disconnects):
+        # nothing is known about Stripe, but a trial call must not stay
+        # in progress forever
+        breaker.release_trial()
+        raise
+    else:
+        breaker.record_success()
+        track_stripe_call(operation, "success", time.perf_counter() - start)
+
+
+def _build_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=settings.STRIPE_HTTP_POOL_SIZE,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _build_async_http_client():
+    import ssl
+
+    import httpx
+    import stripe
+
+    class PooledHTTPXClient(stripe.HTTPXClient):
+        """`HTTPXClient` sending requests over an httpx client with pool limits"""
+
+        def __init__(self, limits, **kwargs):
+            super().__init__(**kwargs)
+            # HTTPXClient takes no pool limits, so the httpx client it sends
+            # with is replaced by one verifying certificates the same way.
+            # Its own client is closed with this one.
+            self.default_client = self._client_async
+            self.pooled_client = httpx.AsyncClient(
+                verify=ssl.create_default_context(cafile=stripe.ca_bundle_path),
+                limits=limits,
+            )
+            self._client_async = self.pooled_client
+
+        async def close_async(self):
+            await self.default_client.aclose()
+            await super().close_async()
+
+    return PooledHTTPXClient(
+        limits=httpx.Limits(
+            max_connections=settings.STRIPE_HTTP_POOL_SIZE,
+            max_keepalive_connections=settings.STRIPE_HTTP_POOL_SIZE,
+        ),
+        timeout=httpx.Timeout(
+            settings.STRIPE_HTTP_TIMEOUT,
+            connect=settings.STRIPE_HTTP_CONNECT_TIMEOUT,
+        ),
+    )
+
+
+def _client_options():
+    # Stripe retries connection errors, 409s and 5xx responses with jittered
+    # exponential backoff, and sends an idempotency key with every POST so
+    # retried writes are applied once
+    options = {"max_network_retries": settings.STRIPE_MAX_NETWORK_RETRIES}
+    if settings.STRIPE_API_BASE:
+        options["base_addresses"] = {"api": settings.STRIPE_API_BASE}
+    return options
+
+
+def get_stripe_client():
+    """Return the process-wide Stripe client for sync API calls"""
+    global _client
+    if _client is None:
+        import stripe
+
+        with _lock:
+            if _client is None:
+                _client = stripe.StripeClient(
+                    settings.STRIPE_SECRET_KEY,
+                    http_client=stripe.RequestsClient(
+                        timeout=(
+                            settings.STRIPE_HTTP_CONNECT_TIMEOUT,
+                            settings.STRIPE_HTTP_TIMEOUT,
+                        ),
+                        session=_build_session(),
+                    ),
+                    **_client_options(),
+                )
+    return _client
+
+
+def get_async_stripe_client():
+    """Return the process-wide Stripe client for `*_async` API calls"""
+    global _async_client
+    if _async_client is None:
+        import stripe
+
+        with _lock:
+            if _async_client is None:
+                # Only processes serving async views need httpx
+                _async_client = stripe.StripeClient(
+                    settings.STRIPE_SECRET_KEY,
+                    http_client=_build_async_http_client(),
+                    **_client_options(),
+                )
+    return _async_client
+
+
+def reset_clients():
+    """Drop the process-wide clients, so the next call uses current settings"""
+    global _client, _async_client
+    with _lock:
+        _client = None
+        _async_client = None
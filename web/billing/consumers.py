@@ -0,0 +1,56 @@
+from asgiref.sync import sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.contrib.auth import get_user_model
+from metrics.collectors import track_websocket_connection, track_websocket_push
+
+from .realtime import subscription_group
+from .utils import get_user_subscription_status
+
+
+class SubscriptionStatusConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Push the user's subscription status on connect and after every change
+
+    Messages have the shape `{"type": "subscription.status", "status": {...}}`,
+    where `status` matches the `subscription_status` view.
+    """
+
+    group_name = None
+
+    async def connect(self):
+        user = self.scope.get("user")
+        if not getattr(user, "is_authenticated", False):
+            await self.close()
+            return
+
+        self.group_name = subscription_group(user.pk)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        track_websocket_connection(opened=True)
+
+        # The webhook may have landed before the socket connected
+        await self.send_status()
+
+    async def disconnect(self, code):
+        if self.group_name is None:
+            return
+        await self.channel_layer.group_discard(self.group_name, self.channel_name)
+        track_websocket_connection(opened=False)
+
+    async def receive_json(self, content, **kwargs):
+        # Clients only listen; anything they send is ignored
+        pass
+
+    async def subscription_changed(self, event):
+        await self.send_status()
+
+    def get_status(self):
+        # The scope's user lives as long as the socket, so its memoized
+        # customer and subscription would be stale after a change
+        user = get_user_model().objects.get(pk=self.scope["user"].pk)
+        return get_user_subscription_status(user)
+
+    async def send_status(self):
+        status_info = await sync_to_async(self.get_status)()
+        await self.send_json({"type": "subscription.status", "status": status_info})
+        track_websocket_push()
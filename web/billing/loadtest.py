@@ -0,0 +1,361 @@
+"""
+Load test harness for the billing API.
+
+`loadtest_billing` drives the billing endpoints in-process through Django's
+`AsyncClient` at a configurable concurrency, against the configured database
+and cache. Stripe is replaced by `FakeStripeServer`, a local HTTP server the
+Stripe client reaches through `STRIPE_API_BASE`, so runs are reproducible and
+never touch Stripe. Webhook payloads are signed locally with the scheme
+Stripe uses, so they pass the normal signature check.
+
+Every request is timed and its database queries are counted through an
+execute wrapper, which attributes queries to the request running in the
+current context, so concurrent requests are counted separately.
+"""
+
+import contextvars
+import hashlib
+import hmac
+import itertools
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+# Queries of the request running in the current context, or None
+_query_count = contextvars.ContextVar("loadtest_query_count", default=None)
+
+
+def sign_webhook_payload(payload, secret, timestamp=None):
+    """
+    Build a `Stripe-Signature` header for a webhook payload
+
+    Args:
+        payload: The request body as bytes
+        secret: The endpoint's webhook signing secret (`whsec_...`)
+        timestamp: Unix timestamp to sign with (default: now)
+    """
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    signed_payload = f"{timestamp}.".encode() + payload
+    signature = hmac.new(secret.encode(), signed_payload, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={signature}"
+
+
+def subscription_event(event_id, subscription, created=None):
+    """A `customer.subscription.updated` event embedding `subscription`"""
+    return {
+        "id": event_id,
+        "object": "event",
+        "type": "customer.subscription.updated",
+        "created": int(time.time()) if created is None else created,
+        "livemode": False,
+        "data": {"object": subscription},
+    }
+
+
+def subscription_object(subscription_id, customer_id, price_id, **fields):
+    """A Stripe subscription object with the fields the webhook handlers read"""
+    return {
+        "id": subscription_id,
+        "object": "subscription",
+        "customer": customer_id,
+        "status": "active",
+        "current_period_end": int(time.time()) + 30 * 24 * 60 * 60,
+        "cancel_at_period_end": False,
+        "trial_end": None,
+        "items": {"object": "list", "data": [{"price": {"id": price_id}}]},
+        **fields,
+    }
+
+
+class FakeStripeHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so the pooled Stripe clients reuse connections as with Stripe
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.respond()
+
+    def do_POST(self):
+        self.respond()
+
+    def respond(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        params = {
+            key: values[-1]
+            for key, values in parse_qs(self.rfile.read(length).decode()).items()
+        }
+        self.server.stripe.record(self.command, self.path)
+        if self.server.stripe.latency:
+            time.sleep(self.server.stripe.latency)
+
+        status, body = self.server.stripe.route(
+            self.command, urlsplit(self.path).path, params
+        )
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("Request-Id", f"req_{next(self.server.stripe.ids)}")
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeStripeServer:
+    """
+    Local stand-in for the Stripe endpoints the billing views call
+
+    Usage:
+        with FakeStripeServer(latency=0.05) as server:
+            ...  # point STRIPE_API_BASE at server.url
+
+    Subscriptions added to `subscriptions`, by id, are returned as they are;
+    others are made up.
+
+    Args:
+        latency: Seconds to wait before answering, to model Stripe's latency
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0):
+        self.latency = latency
+        self.ids = itertools.count(1)
+        self.calls = {}
+        self.subscriptions = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), FakeStripeHandler)
+        self._server.daemon_threads = True
+        self._server.stripe = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="fake-stripe", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def record(self, method, path):
+        with self._lock:
+            key = f"{method} {urlsplit(path).path}"
+            self.calls[key] = self.calls.get(key, 0) + 1
+
+    def total_calls(self):
+        with self._lock:
+            return sum(self.calls.values())
+
+    def route(self, method, path, params):
+        """Return `(status, body)` for a Stripe API request"""
+        parts = path.strip("/").split("/")[1:]  # Without the /v1 prefix
+        object_id = f"{next(self.ids):012d}"
+
+        if method == "POST" and parts == ["customers"]:
+            return 200, {
+                "id": f"cus_loadtest{object_id}",
+                "object": "customer",
+                "email": params.get("email"),
+                "metadata": {"user_id": params.get("metadata[user_id]")},
+            }
+        if method == "POST" and parts == ["checkout", "sessions"]:
+            return 200, {
+                "id": f"cs_test_loadtest{object_id}",
+                "object": "checkout.session",
+                "customer": params.get("customer"),
+                "mode": "subscription",
+                "url": f"{self.url}/checkout/{object_id}",
+            }
+        if method == "POST" and parts == ["billing_portal", "sessions"]:
+            return 200, {
+                "id": f"bps_loadtest{object_id}",
+                "object": "billing_portal.session",
+                "customer": params.get("customer"),
+                "url": f"{self.url}/portal/{object_id}",
+            }
+        if len(parts) == 2 and parts[0] == "subscriptions":
+            fields = {}
+            if "cancel_at_period_end" in params:
+                fields["cancel_at_period_end"] = (
+                    params["cancel_at_period_end"] == "true"
+                )
+            if parts[1] in self.subscriptions:
+                return 200, {**self.subscriptions[parts[1]], **fields}
+            return 200, subscription_object(
+                parts[1], "cus_loadtest", "price_loadtest", **fields
+            )
+
+        return 404, {
+            "error": {
+                "type": "invalid_request_error",
+                "message": f"Unrecognized request URL ({method}: {path})",
+            }
+        }
+
+
+def count_queries(execute, sql, params, many, context):
+    """Execute wrapper adding each query to the current request's count"""
+    counter = _query_count.get()
+    if counter is not None:
+        counter[0] += 1
+    return execute(sql, params, many, context)
+
+
+def install_query_counter(sender, connection, **kwargs):
+    """`connection_created` receiver adding `count_queries` once"""
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+def enable_query_counting():
+    connection_created.connect(install_query_counter)
+    for connection in connections.all(initialized_only=True):
+        install_query_counter(None, connection)
+
+
+def disable_query_counting():
+    connection_created.disconnect(install_query_counter)
+    for connection in connections.all(initialized_only=True):
+        if count_queries in connection.execute_wrappers:
+            connection.execute_wrappers.remove(count_queries)
+
+
+async def timed_request(send):
+    """
+    Await `send()` and measure it
+
+    Returns:
+        tuple: (response, seconds, queries)
+    """
+    counter = [0]
+    token = _query_count.set(counter)
+    start = time.perf_counter()
+    try:
+        response = await send()
+    finally:
+        duration = time.perf_counter() - start
+        _query_count.reset(token)
+    return response, duration, counter[0]
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of a non-empty list"""
+    values = sorted(values)
+    rank = max(1, -(-len(values) * percent // 100))
+    return values[int(rank) - 1]
+
+
+def summarize(samples, elapsed, stripe_calls):
+    """
+    Aggregate the `(status_code, seconds, queries)` samples of one endpoint
+
+    Returns:
+        dict: Request and error counts, throughput, latency percentiles in
+            milliseconds and database queries and Stripe calls per request
+    """
+    latencies = [sample[1] * 1000 for sample in samples]
+    queries = [sample[2] for sample in samples]
+    status_codes = {}
+    for status_code, _, _ in samples:
+        status_codes[str(status_code)] = status_codes.get(str(status_code), 0) + 1
+
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for status_code, _, _ in samples if status_code >= 500),
+        "status_codes": status_codes,
+        "duration_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "mean": round(statistics.mean(latencies), 2),
+            "max": round(max(latencies), 2),
+        },
+        "db_queries_per_request": {
+            "mean": round(statistics.mean(queries), 2),
+            "max": max(queries),
+        },
+        "stripe_calls_per_request": round(stripe_calls / len(samples), 2),
+    }
+
+
+def check_error_rates(report, max_error_rate):
+    """
+    List endpoints of `report` that failed more requests than allowed
+
+    A request failed when it got a 4xx or 5xx response; `max_error_rate` is
+    the fraction of failed requests allowed per endpoint.
+
+    Returns:
+        list: Human-readable failure descriptions
+    """
+    failures = []
+    for name, result in report["endpoints"].items():
+        failed = sum(
+            count
+            for status_code, count in result["status_codes"].items()
+            if int(status_code) >= 400
+        )
+        if failed > result["requests"] * max_error_rate:
+            failures.append(
+                f"{name}: {failed} of {result['requests']} requests failed "
+                f"({result['status_codes']})"
+            )
+    return failures
+
+
+def compare_reports(baseline, report, tolerance):
+    """
+    List regressions of `report` against a `baseline` report
+
+    An endpoint regresses when its p95 latency grows by more than `tolerance`
+    (a fraction), when it makes more database queries per request on average,
+    or when it returns server errors the baseline did not.
+
+    Returns:
+        list: Human-readable regression descriptions
+    """
+    regressions = []
+    for name, result in report["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(name)
+        if before is None:
+            continue
+
+        p95, before_p95 = result["latency_ms"]["p95"], before["latency_ms"]["p95"]
+        if p95 > before_p95 * (1 + tolerance):
+            regressions.append(
+                f"{name}: p95 latency {before_p95}ms -> {p95}ms "
+                f"(+{(p95 / before_p95 - 1) * 100:.0f}%)"
+            )
+
+        queries = result["db_queries_per_request"]["mean"]
+        before_queries = before["db_queries_per_request"]["mean"]
+        if queries > before_queries:
+            regressions.append(
+                f"{name}: DB queries per request {before_queries} -> {queries}"
+            )
+
+        if result["errors"] and not before["errors"]:
+            regressions.append(f"{name}: {result['errors']} server errors")
+
+    return regressions
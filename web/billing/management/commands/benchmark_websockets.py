@@ -0,0 +1,339 @@
+import asyncio
+import base64
+import json
+import os
+import statistics
+import struct
+import time
+from urllib.parse import urlsplit
+
+from billing.realtime import SUBSCRIPTION_CHANGED, subscription_group
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY,
+    HASH_SESSION_KEY,
+    SESSION_KEY,
+    get_user_model,
+)
+from django.contrib.sessions.backends.cached_db import SessionStore
+from django.core.management.base import BaseCommand, CommandError
+
+BENCHMARK_EMAIL = "websocket-benchmark-{}@example.com"
+
+OPCODE_TEXT = 0x1
+OPCODE_CLOSE = 0x8
+OPCODE_PING = 0x9
+OPCODE_PONG = 0xA
+
+
+class SocketClient:
+    """
+    Minimal websocket client for many concurrent sockets
+
+    Only what the subscription socket needs: the handshake, unfragmented text
+    frames from the server, and answering pings.
+    """
+
+    def __init__(self, url, cookie, origin):
+        self.url = urlsplit(url)
+        self.cookie = cookie
+        self.origin = origin
+        self.reader = self.writer = None
+        self.arrivals = []
+        self.received = asyncio.Event()
+        self.closed = False
+
+    async def connect(self):
+        port = self.url.port or (443 if self.url.scheme == "wss" else 80)
+        self.reader, self.writer = await asyncio.open_connection(
+            self.url.hostname, port, ssl=self.url.scheme == "wss"
+        )
+        key = base64.b64encode(os.urandom(16)).decode()
+        self.writer.write(
+            (
+                f"GET {self.url.path} HTTP/1.1\r\n"
+                f"Host: {self.url.netloc}\r\n"
+                "Upgrade: websocket\r\n"
+                "Connection: Upgrade\r\n"
+                f"Sec-WebSocket-Key: {key}\r\n"
+                "Sec-WebSocket-Version: 13\r\n"
+                f"Origin: {self.origin}\r\n"
+                f"Cookie: {settings.SESSION_COOKIE_NAME}={self.cookie}\r\n"
+                "\r\n"
+            ).encode()
+        )
+        response = await self.reader.readuntil(b"\r\n\r\n")
+        status_line = response.split(b"\r\n", 1)[0]
+        if b" 101 " not in status_line:
+            raise ConnectionError(status_line.decode(errors="replace"))
+
+    async def read_frame(self):
+        first, second = await self.reader.readexactly(2)
+        length = second & 0x7F
+        if length == 126:
+            (length,) = struct.unpack("!H", await self.reader.readexactly(2))
+        elif length == 127:
+            (length,) = struct.unpack("!Q", await self.reader.readexactly(8))
+        return first & 0x0F, await self.reader.readexactly(length)
+
+    def send_frame(self, opcode, payload=b""):
+        # Client frames must be masked
+        mask = os.urandom(4)
+        masked = bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+        self.writer.write(bytes([0x80 | opcode, 0x80 | len(payload)]) + mask + masked)
+
+    async def listen(self):
+        """Record the arrival time of every status message until closed"""
+        try:
+            while True:
+                opcode, payload = await self.read_frame()
+                if opcode == OPCODE_TEXT:
+                    if json.loads(payload)["type"] == "subscription.status":
+                        self.arrivals.append(time.perf_counter())
+                        self.received.set()
+                elif opcode == OPCODE_PING:
+                    self.send_frame(OPCODE_PONG, payload)
+                elif opcode == OPCODE_CLOSE:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        self.closed = True
+        self.received.set()
+
+    async def close(self):
+        if self.writer is None:
+            return
+        try:
+            self.send_frame(OPCODE_CLOSE, struct.pack("!H", 1000))
+            await self.writer.drain()
+        except ConnectionError:
+            pass
+        self.writer.close()
+
+
+def read_rss(pid):
+    """Resident set size of a process in bytes, from /proc"""
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    raise CommandError(f"No RSS for process {pid}")
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test the subscription status websocket: hold idle and active "
+        "sockets on one Daphne process and measure connect latency, push "
+        "fan-out latency and memory per socket"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url",
+            default="ws://localhost:8000/api/ws/stripe/subscription/",
+            help="Websocket URL of a single Daphne process",
+        )
+        parser.add_argument(
+            "--origin",
+            default=None,
+            help="Origin header (default: first of CORS_ALLOWED_ORIGINS)",
+        )
+        parser.add_argument(
+            "--idle",
+            type=int,
+            default=1000,
+            help="Sockets that only receive the initial status (default: 1000)",
+        )
+        parser.add_argument(
+            "--active",
+            type=int,
+            default=100,
+            help="Sockets of the user whose status changes (default: 100)",
+        )
+        parser.add_argument(
+            "--pushes",
+            type=int,
+            default=20,
+            help="Subscription changes published to the active sockets (default: 20)",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0.5,
+            help="Seconds between pushes (default: 0.5)",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=100,
+            help="Sockets opened at the same time (default: 100)",
+        )
+        parser.add_argument(
+            "--server-pid",
+            type=int,
+            default=None,
+            help="Daphne process to measure memory of (same host only)",
+        )
+
+    def handle(self, *args, **options):
+        origin = options["origin"] or settings.CORS_ALLOWED_ORIGINS[0]
+        users = [
+            get_user_model().objects.get_or_create(email=BENCHMARK_EMAIL.format(i))[0]
+            for i in ("idle", "active")
+        ]
+        sessions = [self.create_session(user) for user in users]
+        try:
+            asyncio.run(self.run(options, origin, users, sessions))
+        finally:
+            for session in sessions:
+                session.delete()
+            get_user_model().objects.filter(pk__in=[u.pk for u in users]).delete()
+
+    def create_session(self, user):
+        session = SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        return session
+
+    async def run(self, options, origin, users, sessions):
+        pid = options["server_pid"]
+        rss_before = read_rss(pid) if pid else None
+
+        semaphore = asyncio.Semaphore(options["concurrency"])
+        connect_latencies, failures = [], []
+        listeners = []
+
+        async def open_socket(session):
+            client = SocketClient(options["url"], session.session_key, origin)
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    await client.connect()
+                    listeners.append(asyncio.create_task(client.listen()))
+                    await asyncio.wait_for(client.received.wait(), timeout=30)
+                except (
+                    OSError,
+                    asyncio.TimeoutError,
+                    asyncio.IncompleteReadError,
+                ) as e:
+                    failures.append(str(e) or type(e).__name__)
+                    return client
+                if client.arrivals:
+                    connect_latencies.append(client.arrivals[0] - start)
+            return client
+
+        idle_session, active_session = sessions
+        start = time.perf_counter()
+        clients = await asyncio.gather(
+            *[open_socket(idle_session) for _ in range(options["idle"])],
+            *[open_socket(active_session) for _ in range(options["active"])],
+        )
+        connect_duration = time.perf_counter() - start
+        active = [client for client in clients[options["idle"] :] if client.arrivals]
+        rss_after = read_rss(pid) if pid else None
+
+        fanout_latencies, missed = await self.push(options, users[1], active)
+        dropped = sum(client.closed for client in clients if client.arrivals)
+
+        await asyncio.gather(*[client.close() for client in clients])
+        for listener in listeners:
+            listener.cancel()
+
+        self.report(
+            {
+                "sockets": len(clients),
+                "connected": len(connect_latencies),
+                "failed": len(failures),
+                "dropped": dropped,
+                "connect_seconds": connect_duration,
+                "connect_latency": connect_latencies,
+                "pushes": options["pushes"],
+                "fanout_latency": fanout_latencies,
+                "missed_pushes": missed,
+                "rss_before": rss_before,
+                "rss_after": rss_after,
+            },
+            failures,
+        )
+
+    async def push(self, options, user, clients):
+        """
+        Publish subscription changes to the active user's group
+
+        Returns:
+            tuple: (per-socket delivery latencies, undelivered messages)
+        """
+        channel_layer = get_channel_layer()
+        latencies, missed = [], 0
+
+        for _ in range(options["pushes"]):
+            expected = {client: len(client.arrivals) + 1 for client in clients}
+            for client in clients:
+                client.received.clear()
+
+            sent_at = time.perf_counter()
+            await channel_layer.group_send(
+                subscription_group(user.pk), {"type": SUBSCRIPTION_CHANGED}
+            )
+
+            deadline = sent_at + 10
+            for client, count in expected.items():
+                while len(client.arrivals) < count and not client.closed:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    try:
+                        await asyncio.wait_for(client.received.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                    client.received.clear()
+
+                if len(client.arrivals) >= count:
+                    latencies.append(client.arrivals[count - 1] - sent_at)
+                else:
+                    missed += 1
+
+            await asyncio.sleep(options["interval"])
+
+        return latencies, missed
+
+    def report(self, results, failures):
+        self.stdout.write(
+            f"Sockets: {results['connected']}/{results['sockets']} connected in "
+            f"{results['connect_seconds']:.2f}s, {results['failed']} failed, "
+            f"{results['dropped']} dropped"
+        )
+        for label, values in (
+            ("connect (to first status)", results["connect_latency"]),
+            ("push fan-out", results["fanout_latency"]),
+        ):
+            if not values:
+                continue
+            self.stdout.write(
+                f"  {label:<28} p50 {percentile(values, 50) * 1000:8.1f} ms  "
+                f"p95 {percentile(values, 95) * 1000:8.1f} ms  "
+                f"p99 {percentile(values, 99) * 1000:8.1f} ms  "
+                f"mean {statistics.mean(values) * 1000:8.1f} ms"
+            )
+        self.stdout.write(
+            f"  pushes: {results['pushes']}, undelivered: {results['missed_pushes']}"
+        )
+
+        if results["rss_before"] is not None and results["connected"]:
+            growth = results["rss_after"] - results["rss_before"]
+            self.stdout.write(
+                f"  server RSS {results['rss_before'] / 2**20:.1f} -> "
+                f"{results['rss_after'] / 2**20:.1f} MiB, "
+                f"{growth / results['connected'] / 1024:.1f} KiB per socket"
+            )
+
+        for failure in sorted(set(failures))[:5]:
+            self.stderr.write(f"  connect error: {failure}")
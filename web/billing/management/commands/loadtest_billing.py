@@ -0,0 +1,314 @@
+import asyncio
+import itertools
+import json
+import secrets
+import time
+from datetime import timedelta
+
+from billing import loadtest
+from billing.client import breaker, reset_clients
+from billing.models import StripeCustomer, Subscription, WebhookEvent
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+ENDPOINTS = ["status", "checkout", "cancel", "reactivate", "webhook"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test the billing endpoints against a local fake Stripe server and "
+        "report latency percentiles, throughput and DB queries per request as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--endpoints",
+            nargs="+",
+            choices=ENDPOINTS,
+            default=ENDPOINTS,
+            help="Endpoints to load, in order (default: all)",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=500,
+            help="Measured requests per endpoint (default: 500)",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=20,
+            help="Concurrent clients, each logged in as its own user (default: 20)",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=20,
+            help="Unmeasured requests per endpoint before measuring (default: 20)",
+        )
+        parser.add_argument(
+            "--stripe-latency-ms",
+            type=float,
+            default=0,
+            help="Delay added by the fake Stripe server per call (default: 0)",
+        )
+        parser.add_argument(
+            "--eager",
+            action="store_true",
+            help="Process webhook events inline instead of through the broker",
+        )
+        parser.add_argument("--output", help="Write the JSON report to this file")
+        parser.add_argument(
+            "--baseline",
+            help="Report of a previous run; fail if this run regressed against it",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.2,
+            help="Allowed p95 latency growth against the baseline (default: 0.2)",
+        )
+        parser.add_argument(
+            "--max-error-rate",
+            type=float,
+            default=0,
+            help="Fraction of 4xx and 5xx responses allowed per endpoint "
+            "(default: 0)",
+        )
+
+    def handle(self, *args, **options):
+        if settings.ENVIRONMENT == "prod":
+            raise CommandError("Refusing to load test a production environment")
+
+        run_id = secrets.token_hex(4)
+        webhook_secret = f"whsec_loadtest{secrets.token_hex(16)}"
+        users = self.create_users(run_id, options["concurrency"])
+        server = loadtest.FakeStripeServer(
+            latency=options["stripe_latency_ms"] / 1000
+        ).start()
+
+        from celeryapp.celery import app
+
+        always_eager = app.conf.task_always_eager
+        app.conf.task_always_eager = options["eager"]
+        loadtest.enable_query_counting()
+        try:
+            with override_settings(
+                STRIPE_API_BASE=server.url,
+                STRIPE_SECRET_KEY="sk_test_loadtest",
+                STRIPE_WEBHOOK_SECRET=webhook_secret,
+                STRIPE_MAX_NETWORK_RETRIES=0,
+                STRIPE_SUCCESS_URL=f"{server.url}/success",
+                STRIPE_CANCEL_URL=f"{server.url}/cancel",
+            ):
+                reset_clients()
+                breaker.reset()
+                endpoints = asyncio.run(
+                    self.run(options, run_id, users, server, webhook_secret)
+                )
+        finally:
+            loadtest.disable_query_counting()
+            app.conf.task_always_eager = always_eager
+            reset_clients()
+            server.stop()
+            self.cleanup(run_id, users)
+
+        report = {
+            "started_at": timezone.now().isoformat(),
+            "config": {
+                key: options[key]
+                for key in (
+                    "requests",
+                    "concurrency",
+                    "warmup",
+                    "stripe_latency_ms",
+                    "eager",
+                )
+            },
+            "database": settings.DATABASES["default"]["ENGINE"],
+            "endpoints": endpoints,
+        }
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output + "\n")
+        else:
+            self.stdout.write(output)
+
+        failures = loadtest.check_error_rates(report, options["max_error_rate"])
+        for failure in failures:
+            self.stderr.write(failure)
+        if failures:
+            raise CommandError(f"{len(failures)} endpoints returned errors")
+
+        if options["baseline"]:
+            with open(options["baseline"]) as f:
+                baseline = json.load(f)
+            regressions = loadtest.compare_reports(
+                baseline, report, options["tolerance"]
+            )
+            for regression in regressions:
+                self.stderr.write(regression)
+            if regressions:
+                raise CommandError(f"{len(regressions)} regressions against baseline")
+
+    def create_users(self, run_id, count):
+        """
+        Users for the run: `subscribed` have an active subscription, `new` have
+        no Stripe customer yet and go through checkout
+        """
+        User = get_user_model()
+        users = {"subscribed": [], "new": []}
+        period_end = timezone.now() + timedelta(days=30)
+
+        for i in range(count):
+            for kind in users:
+                users[kind].append(
+                    User.objects.create(
+                        email=f"loadtest-{run_id}-{kind}-{i}@example.com"
+                    )
+                )
+            customer = StripeCustomer.objects.create(
+                user=users["subscribed"][i],
+                stripe_customer_id=f"cus_loadtest{run_id}{i}",
+            )
+            Subscription.objects.create(
+                customer=customer,
+                stripe_subscription_id=f"sub_loadtest{run_id}{i}",
+                stripe_price_id="price_loadtest",
+                status="active",
+                current_period_end=period_end,
+            )
+        return users
+
+    def cleanup(self, run_id, users):
+        WebhookEvent.objects.filter(
+            stripe_event_id__startswith=f"evt_loadtest{run_id}"
+        ).delete()
+        get_user_model().objects.filter(
+            pk__in=[user.pk for kind in users.values() for user in kind]
+        ).delete()
+
+    async def run(self, options, run_id, users, server, webhook_secret):
+        subscribed = users["subscribed"]
+        event_ids = itertools.count()
+
+        async def status(client, i):
+            return await client.get(reverse("stripe:status"))
+
+        async def checkout(client, i):
+            return await client.post(
+                reverse("stripe:checkout"), {"price_id": "price_loadtest"}
+            )
+
+        async def cancel(client, i):
+            return await client.post(reverse("stripe:cancel"))
+
+        async def reactivate(client, i):
+            return await client.post(reverse("stripe:reactivate"))
+
+        async def reset_cancellation(i):
+            await Subscription.objects.filter(
+                customer__user=subscribed[i % len(subscribed)]
+            ).aupdate(cancel_at_period_end=True)
+
+        subscriptions = [
+            subscription
+            async for subscription in Subscription.objects.select_related(
+                "customer"
+            ).filter(customer__user__in=subscribed)
+        ]
+        signed_events = {}
+
+        async def sign_event(i):
+            subscription = subscriptions[i % len(subscriptions)]
+            payload = json.dumps(
+                loadtest.subscription_event(
+                    f"evt_loadtest{run_id}{next(event_ids)}",
+                    loadtest.subscription_object(
+                        subscription.stripe_subscription_id,
+                        subscription.customer.stripe_customer_id,
+                        "price_loadtest",
+                    ),
+                )
+            ).encode()
+            signed_events[i] = (
+                payload,
+                loadtest.sign_webhook_payload(payload, webhook_secret),
+            )
+
+        async def webhook(client, i):
+            payload, signature = signed_events[i]
+            return await client.post(
+                reverse("stripe:webhook"),
+                data=payload,
+                content_type="application/json",
+                headers={"Stripe-Signature": signature},
+            )
+
+        phases = {
+            "status": (status, subscribed, None),
+            "checkout": (checkout, users["new"], None),
+            "cancel": (cancel, subscribed, None),
+            "reactivate": (reactivate, subscribed, reset_cancellation),
+            "webhook": (webhook, None, sign_event),
+        }
+
+        results = {}
+        for name in options["endpoints"]:
+            send, phase_users, prepare = phases[name]
+            clients = await self.clients(phase_users, options["concurrency"])
+            # Warm-up requests fill connection pools and caches
+            await self.load(clients, send, options["warmup"], prepare)
+
+            stripe_calls = server.total_calls()
+            start = time.perf_counter()
+            samples = await self.load(clients, send, options["requests"], prepare)
+            elapsed = time.perf_counter() - start
+
+            results[name] = loadtest.summarize(
+                samples, elapsed, server.total_calls() - stripe_calls
+            )
+            self.stderr.write(
+                f"{name:<12} {results[name]['throughput_rps']:>8} req/s  "
+                f"p95 {results[name]['latency_ms']['p95']:>8} ms  "
+                f"{results[name]['db_queries_per_request']['mean']:>5} queries"
+            )
+        return results
+
+    async def clients(self, users, concurrency):
+        clients = []
+        for i in range(concurrency):
+            client = AsyncClient(raise_request_exception=False)
+            if users is not None:
+                await client.aforce_login(users[i])
+            clients.append(client)
+        return clients
+
+    async def load(self, clients, send, requests, prepare):
+        """
+        Send `requests` requests, one at a time per client
+
+        Returns:
+            list: `(status_code, seconds, queries)` per request
+        """
+        samples = []
+        counter = itertools.count()
+
+        async def worker(index, client):
+            while (i := next(counter)) < requests:
+                if prepare is not None:
+                    await prepare(index)
+                response, seconds, queries = await loadtest.timed_request(
+                    lambda: send(client, index)
+                )
+                samples.append((response.status_code, seconds, queries))
+
+        await asyncio.gather(
+            *[worker(index, client) for index, client in enumerate(clients)]
+        )
+        return samples
@@ -0,0 +1,118 @@
+from datetime import datetime
+from datetime import timezone as dt_timezone
+
+from billing.reconcile import EVENT_RETENTION, RESOURCES, reconcile_stripe_data
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+
+def parse_since(value):
+    """Parse a date option given as an ISO date, ISO datetime or unix timestamp"""
+    if value.isdigit():
+        return datetime.fromtimestamp(int(value), tz=dt_timezone.utc)
+
+    parsed = parse_datetime(value)
+    if parsed is None:
+        date = parse_date(value)
+        if date is None:
+            raise CommandError(f"Invalid date: {value}")
+        parsed = datetime(date.year, date.month, date.day)
+
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, dt_timezone.utc)
+    return parsed
+
+
+class Command(BaseCommand):
+    help = "Reconcile products, prices, customers and subscriptions with Stripe"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--resources",
+            nargs="+",
+            choices=RESOURCES,
+            default=RESOURCES,
+            help="Resources to reconcile (default: all)",
+        )
+        parser.add_argument(
+            "--products-only",
+            action="store_true",
+            help="Only sync products, not prices",
+        )
+        parser.add_argument(
+            "--since",
+            help="Incremental sync: only reconcile objects changed since this date, "
+            "datetime or unix timestamp, at most 30 days ago",
+        )
+        parser.add_argument(
+            "--created-since",
+            help="Only reconcile objects created since this date, datetime or unix "
+            "timestamp",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Resume from the checkpoints of an interrupted run",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=4,
+            help="Maximum number of Stripe list requests in flight (default: 4)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Rows per bulk insert/update (default: 500)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Show what would be synced without making changes",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.STRIPE_SECRET_KEY:
+            self.stdout.write(self.style.ERROR("STRIPE_SECRET_KEY is not configured"))
+            return
+
+        resources = ["products"] if options["products_only"] else options["resources"]
+        since = parse_since(options["since"]) if options["since"] else None
+        if since and since < timezone.now() - EVENT_RETENTION:
+            raise CommandError(
+                "Stripe keeps events for 30 days, run a full sync for older changes"
+            )
+        created_since = (
+            parse_since(options["created_since"]) if options["created_since"] else None
+        )
+
+        self.stdout.write("Starting Stripe data sync...")
+        if options["dry_run"]:
+            self.stdout.write(self.style.WARNING("DRY RUN - No changes will be made"))
+
+        try:
+            stats = reconcile_stripe_data(
+                resources=resources,
+                since=since,
+                created_since=created_since,
+                resume=options["resume"],
+                dry_run=options["dry_run"],
+                concurrency=options["concurrency"],
+                batch_size=options["batch_size"],
+            )
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f"Error syncing Stripe data: {str(e)}"))
+            if not options["dry_run"]:
+                self.stdout.write("Re-run with --resume to continue from the last page")
+            return
+
+        for resource, resource_stats in stats.items():
+            self.stdout.write(
+                f"{resource}: {resource_stats.fetched} fetched, "
+                f"{resource_stats.created} created, {resource_stats.updated} updated, "
+                f"{resource_stats.unchanged} unchanged, {resource_stats.skipped} skipped"
+            )
+        self.stdout.write(self.style.SUCCESS("Successfully synced Stripe data"))
@@ -0,0 +1,205 @@
+import json
+import statistics
+
+from billing import replay
+from billing.client import breaker, reset_clients
+from billing.loadtest import FakeStripeServer, percentile
+from billing.management.commands.sync_stripe_data import parse_since
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+
+class Command(BaseCommand):
+    help = (
+        "Capture Stripe webhook events to a gzip NDJSON file and replay them "
+        "through the webhook handlers, to benchmark them or backfill missed events"
+    )
+
+    def add_arguments(self, parser):
+        subparsers = parser.add_subparsers(dest="action", required=True)
+
+        capture = subparsers.add_parser(
+            "capture", help="Write events from the webhook event log or Stripe"
+        )
+        capture.add_argument("output", help="File to write, e.g. events.ndjson.gz")
+        capture.add_argument(
+            "--source",
+            choices=["log", "stripe"],
+            default="log",
+            help="The webhook event log, or the Stripe events API for events "
+            "that were never delivered (default: log)",
+        )
+        capture.add_argument(
+            "--since", help="Date, datetime or unix timestamp to capture from"
+        )
+        capture.add_argument(
+            "--until", help="Date, datetime or unix timestamp to capture until"
+        )
+        capture.add_argument("--types", nargs="+", help="Only these event types")
+        capture.add_argument(
+            "--status",
+            nargs="+",
+            choices=["pending", "processing", "processed", "failed"],
+            help="Only logged events with these statuses",
+        )
+
+        replay_parser = subparsers.add_parser(
+            "replay", help="Run captured events through the webhook handlers"
+        )
+        replay_parser.add_argument("input", help="File written by capture")
+        replay_parser.add_argument(
+            "--pacing",
+            choices=["max", "recorded"],
+            default="max",
+            help="As fast as possible, or with the recorded spacing (default: max)",
+        )
+        replay_parser.add_argument(
+            "--speed",
+            type=float,
+            default=1.0,
+            help="Speed-up factor for recorded pacing (default: 1.0)",
+        )
+        replay_parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Parallel workers, events partitioned by customer (default: 1)",
+        )
+        replay_parser.add_argument(
+            "--record",
+            action="store_true",
+            help="Backfill: add events to the webhook event log and skip those "
+            "already processed. Without it, what the handlers write is rolled "
+            "back, emails are discarded and Stripe is replaced by a fake server",
+        )
+        replay_parser.add_argument(
+            "--stripe-latency-ms",
+            type=float,
+            default=0,
+            help="Delay added by the fake Stripe server per call (default: 0)",
+        )
+        replay_parser.add_argument(
+            "--json", action="store_true", help="Print the report as JSON"
+        )
+
+    def handle(self, *args, **options):
+        if options["action"] == "capture":
+            self.capture(options)
+        else:
+            self.replay(options)
+
+    def capture(self, options):
+        since = parse_since(options["since"]) if options["since"] else None
+        until = parse_since(options["until"]) if options["until"] else None
+
+        if options["source"] == "stripe":
+            if not settings.STRIPE_SECRET_KEY:
+                raise CommandError("STRIPE_SECRET_KEY is not configured")
+            records = replay.stripe_events(since, until, options["types"])
+        else:
+            records = replay.logged_events(
+                since, until, options["types"], options["status"]
+            )
+
+        count = replay.write_events(options["output"], records)
+        self.stdout.write(
+            self.style.SUCCESS(f"Captured {count} events to {options['output']}")
+        )
+
+    def replay(self, options):
+        if options["workers"] < 1 or options["speed"] <= 0:
+            raise CommandError("--workers and --speed must be positive")
+
+        speed = options["speed"] if options["pacing"] == "recorded" else None
+        records = replay.read_events(options["input"])
+        if options["record"]:
+            stats, elapsed = replay.replay_events(
+                records,
+                apply=replay.record_event,
+                workers=options["workers"],
+                speed=speed,
+            )
+        else:
+            stats, elapsed = self.benchmark(records, options, speed)
+        report = self.build_report(stats, elapsed, options)
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.write_report(report)
+
+        if report["failed"]:
+            raise CommandError(f"{report['failed']} events failed")
+
+    def benchmark(self, records, options, speed):
+        """Replay without side effects outside the process"""
+        server = FakeStripeServer(latency=options["stripe_latency_ms"] / 1000).start()
+        try:
+            with override_settings(
+                EMAIL_BACKEND="django.core.mail.backends.dummy.EmailBackend",
+                MAIL_QUEUE_ENABLED=False,
+                STRIPE_API_BASE=server.url,
+                STRIPE_SECRET_KEY="sk_test_replay",
+                STRIPE_MAX_NETWORK_RETRIES=0,
+            ):
+                reset_clients()
+                breaker.reset()
+                return replay.replay_events(
+                    self.serve_subscriptions(records, server),
+                    apply=replay.apply_event,
+                    workers=options["workers"],
+                    speed=speed,
+                )
+        finally:
+            reset_clients()
+            server.stop()
+
+    def serve_subscriptions(self, records, server):
+        """Have the fake server return the captured state of subscriptions"""
+        for received_at, event in records:
+            data = event["data"]["object"]
+            if data.get("object") == "subscription":
+                server.subscriptions[data["id"]] = data
+            yield received_at, event
+
+    def build_report(self, stats, elapsed, options):
+        events = sum(len(type_stats.durations) for type_stats in stats.values())
+        handlers = {}
+        for event_type, type_stats in sorted(stats.items()):
+            durations = [duration * 1000 for duration in type_stats.durations]
+            handlers[event_type] = {
+                "processed": type_stats.processed,
+                "skipped": type_stats.skipped,
+                "failed": type_stats.failed,
+                "mean_ms": round(statistics.mean(durations), 3),
+                "p95_ms": round(percentile(durations, 95), 3),
+                "total_seconds": round(sum(durations) / 1000, 3),
+            }
+
+        return {
+            "events": events,
+            "failed": sum(handler["failed"] for handler in handlers.values()),
+            "elapsed_seconds": round(elapsed, 3),
+            "events_per_second": round(events / elapsed, 1) if elapsed else 0.0,
+            "workers": options["workers"],
+            "pacing": options["pacing"],
+            "handlers": handlers,
+        }
+
+    def write_report(self, report):
+        self.stdout.write(
+            f"Replayed {report['events']} events in {report['elapsed_seconds']}s "
+            f"({report['events_per_second']} events/s, {report['workers']} workers)"
+        )
+        self.stdout.write(
+            f"  {'event type':<40} {'done':>7} {'skipped':>7} {'failed':>7} "
+            f"{'mean ms':>9} {'p95 ms':>9} {'total s':>9}"
+        )
+        for event_type, handler in report["handlers"].items():
+            self.stdout.write(
+                f"  {event_type:<40} {handler['processed']:>7} "
+                f"{handler['skipped']:>7} {handler['failed']:>7} "
+                f"{handler['mean_ms']:>9.2f} {handler['p95_ms']:>9.2f} "
+                f"{handler['total_seconds']:>9.2f}"
+            )
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.9 on 2026-10-18 14:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stripe", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="subscription",
+            name="last_event_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 5.1.9 on 2026-10-18 15:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stripe", "0002_subscription_last_event_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Product",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "stripe_product_id",
+                    models.CharField(db_index=True, max_length=255, unique=True),
+                ),
+                ("name", models.CharField(max_length=255)),
+                ("description", models.TextField(blank=True, default="")),
+                ("active", models.BooleanField(db_index=True, default=True)),
+                ("metadata", models.JSONField(blank=True, default=dict)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "ordering": ["name"],
+            },
+        ),
+        migrations.CreateModel(
+            name="ReconcileCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.CharField(max_length=255, unique=True)),
+                ("starting_after", models.CharField(max_length=255)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="Price",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "stripe_price_id",
+                    models.CharField(db_index=True, max_length=255, unique=True),
+                ),
+                ("active", models.BooleanField(db_index=True, default=True)),
+                ("currency", models.CharField(max_length=3)),
+                ("unit_amount", models.BigIntegerField(blank=True, null=True)),
+                ("type", models.CharField(max_length=20)),
+                (
+                    "recurring_interval",
+                    models.CharField(blank=True, default="", max_length=10),
+                ),
+                (
+                    "recurring_interval_count",
+                    models.PositiveIntegerField(blank=True, null=True),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "product",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="prices",
+                        to="stripe.product",
+                        to_field="stripe_product_id",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["unit_amount"],
+            },
+        ),
+    ]
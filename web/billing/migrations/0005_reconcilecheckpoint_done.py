@@ -0,0 +1,23 @@
+# Generated by Django 5.1.9 on 2026-10-18 16:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stripe", "0004_webhookevent_claimed_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="reconcilecheckpoint",
+            name="done",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AlterField(
+            model_name="reconcilecheckpoint",
+            name="starting_after",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+    ]
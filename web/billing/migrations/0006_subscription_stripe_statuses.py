@@ -0,0 +1,31 @@
+# Generated by Django 5.1.9 on 2026-10-18 16:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stripe", "0005_reconcilecheckpoint_done"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="subscription",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("trialing", "Trialing"),
+                    ("active", "Active"),
+                    ("past_due", "Past Due"),
+                    ("canceled", "Canceled"),
+                    ("unpaid", "Unpaid"),
+                    ("incomplete", "Incomplete"),
+                    ("incomplete_expired", "Incomplete Expired"),
+                    ("paused", "Paused"),
+                ],
+                db_index=True,
+                max_length=50,
+            ),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.9 on 2026-10-18 16:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stripe", "0006_subscription_stripe_statuses"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SentNotice",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("stripe_event_id", models.CharField(max_length=255, unique=True)),
+                ("name", models.CharField(max_length=50)),
+                ("sent_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,216 @@
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+ACTIVE_SUBSCRIPTION_STATUSES = ["active", "trialing"]
+
+
+class StripeCustomer(models.Model):
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="stripe_customer",
+    )
+    stripe_customer_id = models.CharField(max_length=255, unique=True, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.user.email} - {self.stripe_customer_id}"
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.clear_subscription_cache()
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self.clear_subscription_cache()
+
+    def clear_subscription_cache(self):
+        """Forget the memoized active subscription"""
+        self.__dict__.pop("active_subscription", None)
+
+    @property
+    def has_active_subscription(self):
+        """Check if customer has any active subscription"""
+        return self.active_subscription is not None
+
+    @cached_property
+    def active_subscription(self):
+        """
+        Get the current active subscription (if any)
+
+        Memoized on the instance, so repeated checks within a request share
+        one query.
+        """
+        return self.subscriptions.filter(
+            status__in=ACTIVE_SUBSCRIPTION_STATUSES
+        ).first()
+
+    async def aget_active_subscription(self):
+        """Async version of `active_subscription`, sharing the same memo"""
+        if "active_subscription" not in self.__dict__:
+            self.__dict__["active_subscription"] = await self.subscriptions.filter(
+                status__in=ACTIVE_SUBSCRIPTION_STATUSES
+            ).afirst()
+        return self.active_subscription
+
+
+class Subscription(models.Model):
+    # Every status Stripe reports for a subscription
+    STATUS_CHOICES = [
+        ("trialing", "Trialing"),
+        ("active", "Active"),
+        ("past_due", "Past Due"),
+        ("canceled", "Canceled"),
+        ("unpaid", "Unpaid"),
+        ("incomplete", "Incomplete"),
+        ("incomplete_expired", "Incomplete Expired"),
+        ("paused", "Paused"),
+    ]
+
+    customer = models.ForeignKey(
+        StripeCustomer, on_delete=models.CASCADE, related_name="subscriptions"
+    )
+    stripe_subscription_id = models.CharField(
+        max_length=255, unique=True, db_index=True
+    )
+    stripe_price_id = models.CharField(max_length=255)
+    status = models.CharField(max_length=50, choices=STATUS_CHOICES, db_index=True)
+    current_period_end = models.DateTimeField()
+    cancel_at_period_end = models.BooleanField(default=False)
+    trial_end = models.DateTimeField(null=True, blank=True)
+    # Creation time of the newest Stripe event applied to this row, used to
+    # reject webhook events that arrive out of order
+    last_event_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.customer.user.email} - {self.status}"
+
+    @property
+    def is_active(self):
+        """Check if subscription is currently active"""
+        return self.status in ACTIVE_SUBSCRIPTION_STATUSES
+
+    @property
+    def is_trialing(self):
+        """Check if subscription is in trial period"""
+        return (
+            self.status == "trialing"
+            and self.trial_end
+            and self.trial_end > timezone.now()
+        )
+
+    @property
+    def days_until_period_end(self):
+        """Days remaining in current billing period"""
+        if self.current_period_end:
+            delta = self.current_period_end - timezone.now()
+            return max(0, delta.days)
+        return 0
+
+
+class WebhookEvent(models.Model):
+    """Durable log of verified Stripe webhook events awaiting processing"""
+
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("processing", "Processing"),
+        ("processed", "Processed"),
+        ("failed", "Failed"),
+    ]
+
+    stripe_event_id = models.CharField(max_length=255, unique=True, db_index=True)
+    type = models.CharField(max_length=255, db_index=True)
+    payload = models.JSONField()
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default="pending", db_index=True
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    # When a worker claimed the event; a "processing" claim older than
+    # STRIPE_WEBHOOK_LEASE_SECONDS belongs to a worker that died
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.type} - {self.stripe_event_id}"
+
+
+class SentNotice(models.Model):
+    """Email notice sent for a Stripe event, so it is sent once per event"""
+
+    stripe_event_id = models.CharField(max_length=255, unique=True)
+    name = models.CharField(max_length=50)
+    sent_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} - {self.stripe_event_id}"
+
+
+class Product(models.Model):
+    """Local copy of a Stripe product, kept in sync by reconciliation"""
+
+    stripe_product_id = models.CharField(max_length=255, unique=True, db_index=True)
+    name = models.CharField(max_length=255)
+    description = models.TextField(blank=True, default="")
+    active = models.BooleanField(default=True, db_index=True)
+    metadata = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self):
+        return self.name
+
+
+class Price(models.Model):
+    """Local copy of a Stripe price, kept in sync by reconciliation"""
+
+    stripe_price_id = models.CharField(max_length=255, unique=True, db_index=True)
+    # Prices can be synced before their product, so there is no DB constraint
+    product = models.ForeignKey(
+        Product,
+        to_field="stripe_product_id",
+        db_constraint=False,
+        on_delete=models.DO_NOTHING,
+        related_name="prices",
+    )
+    active = models.BooleanField(default=True, db_index=True)
+    currency = models.CharField(max_length=3)
+    unit_amount = models.BigIntegerField(null=True, blank=True)
+    type = models.CharField(max_length=20)
+    recurring_interval = models.CharField(max_length=10, blank=True, default="")
+    recurring_interval_count = models.PositiveIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["unit_amount"]
+
+    def __str__(self):
+        return f"{self.stripe_price_id} - {self.unit_amount} {self.currency}"
+
+
+class ReconcileCheckpoint(models.Model):
+    """Resume point for a partition of a Stripe reconciliation run"""
+
+    key = models.CharField(max_length=255, unique=True)
+    starting_after = models.CharField(max_length=255, blank=True, default="")
+    # The partition was paged to the end, so a resumed run skips it
+    done = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.key} - {self.starting_after}"
@@ -0,0 +1,46 @@
+"""
+Subscription status push over websockets.
+
+Every user's open sockets join the channel layer group `subscription.<id>`.
+Whenever a webhook changes a user's subscription, `publish_subscription_changed`
+notifies that group once the transaction commits, and each consumer sends the
+fresh status from the entitlement cache, so clients no longer poll
+`subscription_status` after checkout.
+"""
+
+import structlog
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from metrics.collectors import track_websocket_publish
+
+logger = structlog.get_logger(__name__)
+
+SUBSCRIPTION_CHANGED = "subscription.changed"
+
+
+def subscription_group(user_id):
+    return f"subscription.{user_id}"
+
+
+def publish_subscription_changed(user_id):
+    """Notify the user's open websockets after the current transaction commits"""
+
+    def publish():
+        try:
+            channel_layer = get_channel_layer()
+            if channel_layer is None:
+                return
+            async_to_sync(channel_layer.group_send)(
+                subscription_group(user_id), {"type": SUBSCRIPTION_CHANGED}
+            )
+        except Exception as e:
+            # Clients still get the new status on their next request
+            logger.error(
+                "Subscription status publish failed", user_id=user_id, error=str(e)
+            )
+            track_websocket_publish("error")
+        else:
+            track_websocket_publish("success")
+
+    transaction.on_commit(publish)
@@ -0,0 +1,501 @@
+"""
+Bulk reconciliation of Stripe data into the local database.
+
+Stripe list endpoints are paged with cursors, so each resource is split into
+partitions (e.g. subscriptions by status) that are paged independently on a
+bounded thread pool. Subscriptions are only paged once every customer
+partition is applied, since they are matched to customers linked in the same
+run. Pages are diffed against local rows in memory and applied
+on the calling thread with `bulk_create`/`bulk_update`, one transaction per
+page. Every applied page stores a checkpoint, and every finished partition a
+done marker, so an interrupted run can resume where each partition stopped.
+
+An incremental run pages the Stripe events of the last days instead, one
+partition per resource, and applies the latest state of every object the
+events touched. Stripe keeps events for `EVENT_RETENTION`.
+"""
+
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+import structlog
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import invalidate_entitlements
+from .client import get_stripe_client, stripe_call
+from .models import Price, Product, ReconcileCheckpoint, StripeCustomer, Subscription
+from .utils import (
+    get_stripe_id,
+    price_fields_from_stripe,
+    product_fields_from_stripe,
+    subscription_fields_from_stripe,
+)
+
+logger = structlog.get_logger(__name__)
+
+User = get_user_model()
+
+RESOURCES = ["products", "prices", "customers", "subscriptions"]
+
+# Resources paged together; a stage starts once the previous one is applied
+STAGES = [["products", "prices", "customers"], ["subscriptions"]]
+
+# Maximum page size allowed by the Stripe list API
+PAGE_SIZE = 100
+
+# Events changing each resource, for incremental runs
+EVENT_TYPES = {
+    "products": ["product.created", "product.updated", "product.deleted"],
+    "prices": ["price.created", "price.updated", "price.deleted"],
+    "customers": ["customer.created", "customer.updated"],
+    "subscriptions": [
+        "customer.subscription.created",
+        "customer.subscription.updated",
+        "customer.subscription.deleted",
+        "customer.subscription.paused",
+        "customer.subscription.resumed",
+        "customer.subscription.pending_update_applied",
+        "customer.subscription.pending_update_expired",
+    ],
+}
+
+# How long Stripe keeps events
+EVENT_RETENTION = timedelta(days=30)
+
+# Stripe only lists canceled subscriptions when asked for them, so every
+# status Stripe knows gets its own partition
+SUBSCRIPTION_STATUSES = [status for status, _ in Subscription.STATUS_CHOICES]
+
+
+@dataclass
+class Partition:
+    """An independently paged slice of a Stripe list endpoint"""
+
+    resource: str
+    name: str
+    params: dict = field(default_factory=dict)
+    # Pages the events changing the resource instead of the resource itself
+    events: bool = False
+
+    @property
+    def key(self):
+        return f"{self.resource}:{self.name}"
+
+    @property
+    def endpoint(self):
+        return "events" if self.events else self.resource
+
+
+@dataclass
+class ReconcileStats:
+    fetched: int = 0
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    skipped: int = 0
+
+
+def build_partitions(resources, created_since=None, since=None):
+    """Split the requested resources into partitions that can be paged in parallel"""
+    if since:
+        return [
+            Partition(
+                resource,
+                "events",
+                {
+                    "types": EVENT_TYPES[resource],
+                    "created": {"gte": int(since.timestamp())},
+                },
+                events=True,
+            )
+            for resource in resources
+        ]
+
+    params = (
+        {"created": {"gte": int(created_since.timestamp())}} if created_since else {}
+    )
+    partitions = []
+
+    if "products" in resources:
+        for active in (True, False):
+            partitions.append(
+                Partition(
+                    "products",
+                    f"active={active}",
+                    {"active": active, **params},
+                )
+            )
+    if "prices" in resources:
+        for active in (True, False):
+            partitions.append(
+                Partition("prices", f"active={active}", {"active": active, **params})
+            )
+    if "customers" in resources:
+        partitions.append(Partition("customers", "all", params))
+    if "subscriptions" in resources:
+        for status in SUBSCRIPTION_STATUSES:
+            partitions.append(
+                Partition(
+                    "subscriptions",
+                    status,
+                    {"status": status, **params},
+                )
+            )
+
+    return partitions
+
+
+def reconcile_stripe_data(
+    resources=None,
+    since=None,
+    created_since=None,
+    resume=False,
+    dry_run=False,
+    concurrency=4,
+    batch_size=500,
+):
+    """
+    Reconcile local Stripe tables with the Stripe API
+
+    Args:
+        resources: Resources to reconcile (default: all of `RESOURCES`)
+        since: Incremental run: only reconcile objects changed at or after
+            this datetime, at most `EVENT_RETENTION` ago
+        created_since: Only reconcile objects created at or after this
+            datetime
+        resume: Continue from the checkpoints of an interrupted run
+        dry_run: Compute the diff without writing anything
+        concurrency: Maximum number of partitions paged at the same time
+        batch_size: Batch size for `bulk_create`/`bulk_update`
+
+    Returns:
+        dict: `ReconcileStats` per resource
+    """
+    resources = resources or RESOURCES
+    partitions = build_partitions(resources, created_since, since)
+    stats = {resource: ReconcileStats() for resource in resources}
+    started_at = timezone.now()
+
+    partition_checkpoints = ReconcileCheckpoint.objects.filter(
+        key__in=[partition.key for partition in partitions]
+    )
+    checkpoints = {}
+    if resume:
+        finished = set()
+        for key, starting_after, done in partition_checkpoints.values_list(
+            "key", "starting_after", "done"
+        ):
+            if done:
+                finished.add(key)
+            else:
+                checkpoints[key] = starting_after
+        partitions = [
+            partition for partition in partitions if partition.key not in finished
+        ]
+        if finished:
+            logger.info("Skipping finished partitions", partitions=sorted(finished))
+    elif not dry_run:
+        partition_checkpoints.delete()
+
+    for stage in STAGES:
+        stage_partitions = [
+            partition for partition in partitions if partition.resource in stage
+        ]
+        if stage_partitions:
+            _apply_pages(
+                _fetch_pages(stage_partitions, checkpoints, concurrency),
+                stats,
+                dry_run,
+                batch_size,
+                started_at,
+                created_since,
+            )
+
+    # The run is complete, so there is nothing left to resume
+    if not dry_run:
+        partition_checkpoints.delete()
+
+    logger.info(
+        "Stripe reconciliation finished",
+        dry_run=dry_run,
+        duration_seconds=(timezone.now() - started_at).total_seconds(),
+        **{
+            resource: vars(resource_stats) for resource, resource_stats in stats.items()
+        },
+    )
+    return stats
+
+
+def _apply_pages(pages, stats, dry_run, batch_size, started_at, created_since):
+    """Apply the pages of `_fetch_pages`, checkpointing each one"""
+    seen = {}
+    with closing(pages):
+        for partition, objects in pages:
+            if objects is None:
+                if not dry_run:
+                    ReconcileCheckpoint.objects.update_or_create(
+                        key=partition.key, defaults={"done": True}
+                    )
+                continue
+
+            if partition.events:
+                objects = _latest_objects(
+                    objects, seen.setdefault(partition.key, set()), created_since
+                )
+                if not objects:
+                    continue
+
+            resource_stats = stats[partition.resource]
+            resource_stats.fetched += len(objects)
+
+            with transaction.atomic():
+                APPLY_FUNCTIONS[partition.resource](
+                    objects, resource_stats, dry_run, batch_size, started_at
+                )
+                # Event pages are not resumable: the objects seen before an
+                # interruption are forgotten, and their older events would be
+                # applied over their latest state
+                if not dry_run and not partition.events:
+                    ReconcileCheckpoint.objects.update_or_create(
+                        key=partition.key,
+                        defaults={"starting_after": objects[-1]["id"]},
+                    )
+
+
+def _latest_objects(events, seen, created_since):
+    """
+    The objects changed by `events` and not in `seen`, in their latest state
+
+    Stripe lists events newest first, so the first event of an object in a
+    partition carries its current state.
+    """
+    objects = []
+    for event in events:
+        obj = event["data"]["object"]
+        if obj["id"] in seen:
+            continue
+        seen.add(obj["id"])
+        if created_since and obj["created"] < created_since.timestamp():
+            continue
+        # Deleted products and prices are kept, inactive, like the webhooks do
+        if event["type"] in ("product.deleted", "price.deleted"):
+            obj = {**obj, "active": False}
+        objects.append(obj)
+    return objects
+
+
+def _fetch_pages(partitions, checkpoints, concurrency):
+    """
+    Page through partitions on a thread pool
+
+    Yields `(partition, objects)` for every page and `(partition, None)` once a
+    partition is exhausted. The queue is bounded so fetching cannot run far
+    ahead of the database writes.
+    """
+    pages = queue.Queue(maxsize=max(concurrency, 1) * 2)
+    stop = threading.Event()
+
+    def fetch_partition(partition):
+        try:
+            starting_after = checkpoints.get(partition.key)
+            list_objects = getattr(get_stripe_client(), partition.endpoint).list
+            while not stop.is_set():
+                params = {"limit": PAGE_SIZE, **partition.params}
+                if starting_after:
+                    params["starting_after"] = starting_after
+
+                with stripe_call(f"{partition.endpoint}.list"):
+                    page = list_objects(params=params)
+                objects = list(page["data"])
+                if objects:
+                    pages.put((partition, objects))
+                    starting_after = objects[-1]["id"]
+                if not objects or not page["has_more"]:
+                    break
+            pages.put((partition, None))
+        except Exception as e:
+            pages.put((partition, e))
+
+    executor = ThreadPoolExecutor(
+        max_workers=max(concurrency, 1), thread_name_prefix="stripe-reconcile"
+    )
+    futures = [executor.submit(fetch_partition, partition) for partition in partitions]
+
+    try:
+        remaining = len(partitions)
+        while remaining:
+            partition, objects = pages.get()
+            if isinstance(objects, Exception):
+                raise objects
+            if objects is None:
+                remaining -= 1
+            yield partition, objects
+    finally:
+        # Unblock workers waiting on a full queue before shutting down
+        stop.set()
+        while not all(future.done() for future in futures):
+            try:
+                pages.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        executor.shutdown()
+
+
+def _bulk_upsert(
+    model, id_field, values_by_id, stats, dry_run, batch_size, keep_existing=None
+):
+    """
+    Diff Stripe values against local rows and write the changes in bulk
+
+    Args:
+        model: Model to write
+        id_field: Field holding the Stripe id
+        values_by_id: Field values (by attname) keyed by Stripe id
+        stats: `ReconcileStats` to update
+        dry_run: Compute the diff without writing
+        batch_size: Batch size for the bulk queries
+        keep_existing: Optional predicate; existing rows it returns True for
+            are left untouched
+
+    Returns:
+        list: Created and updated instances
+    """
+    existing = model.objects.in_bulk(list(values_by_id), field_name=id_field)
+    to_create = []
+    to_update = []
+    update_fields = set()
+
+    for stripe_id, values in values_by_id.items():
+        obj = existing.get(stripe_id)
+        if obj is None:
+            to_create.append(model(**{id_field: stripe_id}, **values))
+            continue
+
+        if keep_existing and keep_existing(obj):
+            stats.skipped += 1
+            continue
+
+        changed = [
+            name for name, value in values.items() if getattr(obj, name) != value
+        ]
+        if not changed:
+            stats.unchanged += 1
+            continue
+
+        for name in changed:
+            setattr(obj, name, values[name])
+        update_fields.update(changed)
+        to_update.append(obj)
+
+    stats.created += len(to_create)
+    stats.updated += len(to_update)
+
+    if not dry_run:
+        model.objects.bulk_create(to_create, batch_size=batch_size)
+        if to_update:
+            # bulk_update does not run auto_now
+            now = timezone.now()
+            for obj in to_update:
+                obj.updated_at = now
+            model.objects.bulk_update(
+                to_update, sorted(update_fields) + ["updated_at"], batch_size=batch_size
+            )
+
+    return to_create + to_update
+
+
+def _apply_products(objects, stats, dry_run, batch_size, started_at):
+    values_by_id = {
+        product["id"]: product_fields_from_stripe(product) for product in objects
+    }
+    _bulk_upsert(Product, "stripe_product_id", values_by_id, stats, dry_run, batch_size)
+
+
+def _apply_prices(objects, stats, dry_run, batch_size, started_at):
+    values_by_id = {price["id"]: price_fields_from_stripe(price) for price in objects}
+    _bulk_upsert(Price, "stripe_price_id", values_by_id, stats, dry_run, batch_size)
+
+
+def _apply_customers(objects, stats, dry_run, batch_size, started_at):
+    """Link Stripe customers to users that do not have a customer yet"""
+    stripe_ids = [customer["id"] for customer in objects]
+    existing = set(
+        StripeCustomer.objects.filter(stripe_customer_id__in=stripe_ids).values_list(
+            "stripe_customer_id", flat=True
+        )
+    )
+
+    # Customers are created with the Django user id in their metadata
+    candidates = {}
+    for customer in objects:
+        user_id = (customer.get("metadata") or {}).get("user_id", "")
+        if customer["id"] not in existing and user_id.isdigit():
+            candidates[int(user_id)] = customer["id"]
+
+    linkable = User.objects.filter(
+        pk__in=candidates, stripe_customer__isnull=True
+    ).values_list("pk", flat=True)
+    to_create = [
+        StripeCustomer(user_id=user_id, stripe_customer_id=candidates[user_id])
+        for user_id in linkable
+    ]
+
+    stats.unchanged += len(existing)
+    stats.created += len(to_create)
+    stats.skipped += len(objects) - len(existing) - len(to_create)
+
+    if not dry_run:
+        StripeCustomer.objects.bulk_create(to_create, batch_size=batch_size)
+
+
+def _apply_subscriptions(objects, stats, dry_run, batch_size, started_at):
+    customers = {
+        stripe_customer_id: (pk, user_id)
+        for stripe_customer_id, pk, user_id in StripeCustomer.objects.filter(
+            stripe_customer_id__in={
+                get_stripe_id(subscription["customer"]) for subscription in objects
+            }
+        ).values_list("stripe_customer_id", "pk", "user_id")
+    }
+
+    values_by_id = {}
+    for subscription in objects:
+        customer = customers.get(get_stripe_id(subscription["customer"]))
+        if customer is None:
+            stats.skipped += 1
+            continue
+        values_by_id[subscription["id"]] = {
+            "customer_id": customer[0],
+            **subscription_fields_from_stripe(subscription),
+        }
+
+    # Keep rows a webhook updated while this run was in progress
+    changed = _bulk_upsert(
+        Subscription,
+        "stripe_subscription_id",
+        values_by_id,
+        stats,
+        dry_run,
+        batch_size,
+        keep_existing=lambda obj: obj.last_event_at and obj.last_event_at >= started_at,
+    )
+
+    if not dry_run:
+        changed_customer_ids = {subscription.customer_id for subscription in changed}
+        invalidate_entitlements(
+            user_id for pk, user_id in customers.values() if pk in changed_customer_ids
+        )
+
+
+APPLY_FUNCTIONS = {
+    "products": _apply_products,
+    "prices": _apply_prices,
+    "customers": _apply_customers,
+    "subscriptions": _apply_subscriptions,
+}
@@ -0,0 +1,269 @@
+"""
+Capture and replay of Stripe webhook events.
+
+Events are stored as gzip-compressed NDJSON, one `{"received_at": <unix time>,
+"event": {...}}` object per line, oldest first. They are captured either from
+the webhook event log, which only holds events whose signature was verified,
+or from the Stripe events API, which also covers deliveries that never reached
+us during an outage.
+
+Replaying runs `webhook_handler` on every event, as fast as possible or with
+the recorded spacing between events. With several workers, events are
+partitioned by customer so each customer's events are still applied in order.
+Benchmark replays roll back each event's transaction; only backfills with
+`record_event` keep what the handlers write.
+"""
+
+import gzip
+import json
+import queue
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+
+import structlog
+from django.db import connections, transaction
+
+from .client import get_stripe_client, stripe_call
+from .models import WebhookEvent
+from .tasks import process_webhook_event
+from .utils import get_stripe_id
+from .webhook_handlers import webhook_handler
+
+logger = structlog.get_logger(__name__)
+
+# Maximum page size allowed by the Stripe list API
+PAGE_SIZE = 100
+
+# Events read ahead per worker, so large files are not held in memory
+WORKER_QUEUE_SIZE = 1000
+
+
+def write_events(path, records):
+    """
+    Write `(received_at, event)` records to a gzip NDJSON file
+
+    Returns:
+        int: Number of events written
+    """
+    count = 0
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for received_at, event in records:
+            f.write(
+                json.dumps(
+                    {"received_at": received_at, "event": event},
+                    separators=(",", ":"),
+                )
+            )
+            f.write("\n")
+            count += 1
+    return count
+
+
+def read_events(path):
+    """Yield the `(received_at, event)` records of a gzip NDJSON file"""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                yield record["received_at"], record["event"]
+
+
+def logged_events(since=None, until=None, types=None, statuses=None):
+    """Yield `(received_at, event)` records from the webhook event log"""
+    webhook_events = WebhookEvent.objects.order_by("created_at")
+    if since:
+        webhook_events = webhook_events.filter(created_at__gte=since)
+    if until:
+        webhook_events = webhook_events.filter(created_at__lt=until)
+    if types:
+        webhook_events = webhook_events.filter(type__in=types)
+    if statuses:
+        webhook_events = webhook_events.filter(status__in=statuses)
+
+    for created_at, payload in webhook_events.values_list(
+        "created_at", "payload"
+    ).iterator(chunk_size=PAGE_SIZE * 10):
+        yield created_at.timestamp(), payload
+
+
+def stripe_events(since=None, until=None, types=None):
+    """
+    Return `(received_at, event)` records from the Stripe events API, oldest
+    first
+
+    Stripe keeps events for 30 days and lists them newest first, so the
+    window is fetched completely before it is returned.
+    """
+    params = {"limit": PAGE_SIZE}
+    created = {}
+    if since:
+        created["gte"] = int(since.timestamp())
+    if until:
+        created["lt"] = int(until.timestamp())
+    if created:
+        params["created"] = created
+    if types:
+        params["types"] = types
+
+    events = []
+    client = get_stripe_client()
+    while True:
+        with stripe_call("events.list"):
+            page = client.events.list(params=params)
+        objects = list(page["data"])
+        # Plain dicts, shaped like the webhook payloads in the event log
+        events.extend(json.loads(str(event)) for event in objects)
+        if not objects or not page["has_more"]:
+            break
+        params["starting_after"] = objects[-1]["id"]
+
+    return [(event["created"], event) for event in reversed(events)]
+
+
+def partition_key(event):
+    """Key keeping a customer's events on one worker, in order"""
+    data = event.get("data", {}).get("object", {})
+    customer = data.get("customer")
+    if customer:
+        return get_stripe_id(customer)
+    return data.get("id") or event["id"]
+
+
+def apply_event(event):
+    """
+    Run the webhook handler on an event and roll back what it wrote
+
+    What the handler defers to the commit (websocket pushes, cache
+    invalidations, catalog refreshes) never runs, and the event log is not
+    touched. Emails and Stripe calls are not rolled back; the caller points
+    them somewhere harmless.
+    """
+    with transaction.atomic():
+        webhook_handler(event)
+        transaction.set_rollback(True)
+    return "processed"
+
+
+def record_event(event):
+    """
+    Add an event to the webhook event log and process it like a delivery
+
+    Events the log already processed are skipped, which makes backfills safe
+    to re-run.
+    """
+    webhook_event, _ = WebhookEvent.objects.get_or_create(
+        stripe_event_id=event["id"],
+        defaults={"type": event["type"], "payload": event},
+    )
+    if webhook_event.status == "processed":
+        return "skipped"
+    # Runs the task body in this process; errors are raised, not retried
+    process_webhook_event(webhook_event.pk)
+    return "processed"
+
+
+@dataclass
+class HandlerStats:
+    processed: int = 0
+    skipped: int = 0
+    failed: int = 0
+    durations: list = field(default_factory=list)
+
+    def merge(self, other):
+        self.processed += other.processed
+        self.skipped += other.skipped
+        self.failed += other.failed
+        self.durations.extend(other.durations)
+
+
+def _worker(events, apply, start, first_received_at, speed, stats):
+    try:
+        while (record := events.get()) is not None:
+            received_at, event = record
+            if speed:
+                delay = start + (received_at - first_received_at) / speed
+                delay -= time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+
+            type_stats = stats.setdefault(event["type"], HandlerStats())
+            handler_start = time.perf_counter()
+            try:
+                outcome = apply(event)
+            except Exception as e:
+                type_stats.failed += 1
+                logger.error(
+                    "Webhook replay failed",
+                    stripe_event_id=event["id"],
+                    event_type=event["type"],
+                    error=str(e),
+                )
+                continue
+            finally:
+                type_stats.durations.append(time.perf_counter() - handler_start)
+
+            if outcome == "skipped":
+                type_stats.skipped += 1
+            else:
+                type_stats.processed += 1
+    finally:
+        connections.close_all()
+
+
+def replay_events(records, apply=apply_event, workers=1, speed=None):
+    """
+    Replay `(received_at, event)` records through `apply`
+
+    Args:
+        records: Records in the order they were received
+        apply: Called with each event (`apply_event` or `record_event`)
+        workers: Threads to replay on, partitioned by customer
+        speed: Replay with the recorded spacing sped up by this factor,
+            or as fast as possible if None
+
+    Returns:
+        tuple: (stats per event type, elapsed seconds)
+    """
+    start = time.monotonic()
+    perf_start = time.perf_counter()
+    worker_stats = [{} for _ in range(workers)]
+    queues = [queue.Queue(maxsize=WORKER_QUEUE_SIZE) for _ in range(workers)]
+    threads = []
+    first_received_at = None
+
+    try:
+        for received_at, event in records:
+            if first_received_at is None:
+                first_received_at = received_at
+                for index in range(workers):
+                    thread = threading.Thread(
+                        target=_worker,
+                        args=(
+                            queues[index],
+                            apply,
+                            start,
+                            first_received_at,
+                            speed,
+                            worker_stats[index],
+                        ),
+                        name=f"webhook-replay-{index}",
+                    )
+                    thread.start()
+                    threads.append(thread)
+
+            # crc32 is stable across processes, unlike hash()
+            index = zlib.crc32(partition_key(event).encode()) % workers
+            queues[index].put((received_at, event))
+    finally:
+        for index in range(len(threads)):
+            queues[index].put(None)
+        for thread in threads:
+            thread.join()
+
+    stats = {}
+    for per_worker in worker_stats:
+        for event_type, type_stats in per_worker.items():
+            stats.setdefault(event_type, HandlerStats()).merge(type_stats)
+    return stats, time.perf_counter() - perf_start
@@ -0,0 +1,11 @@
+from django.urls import path
+
+from . import consumers
+
+websocket_urlpatterns = [
+    path(
+        "api/ws/stripe/subscription/",
+        consumers.SubscriptionStatusConsumer.as_asgi(),
+        name="subscription_status",
+    ),
+]
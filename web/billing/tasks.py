@@ -0,0 +1,108 @@
+from datetime import timedelta
+
+import structlog
+from celery import shared_task
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .catalog import refresh_price_catalog
+from .models import WebhookEvent
+from .reconcile import reconcile_stripe_data
+from .webhook_handlers import webhook_handler
+
+logger = structlog.get_logger(__name__)
+
+
+def claimable_webhook_events(now):
+    """Events no worker owns: new, failed, or claimed by a worker that died"""
+    lease_expired = now - timedelta(seconds=settings.STRIPE_WEBHOOK_LEASE_SECONDS)
+    return Q(status__in=["pending", "failed"]) | Q(
+        status="processing", claimed_at__lt=lease_expired
+    )
+
+
+@shared_task(
+    bind=True,
+    acks_late=True,
+    autoretry_for=(Exception,),
+    retry_backoff=True,
+    retry_backoff_max=600,
+    retry_jitter=True,
+    max_retries=settings.STRIPE_WEBHOOK_MAX_RETRIES,
+)
+def process_webhook_event(self, webhook_event_id):
+    """
+    Process a persisted Stripe webhook event
+
+    The Stripe event id is the idempotency key: events that were already
+    processed are skipped, and an event is only claimed by one worker at a
+    time, so redeliveries from Stripe or the broker are safe.
+    """
+    now = timezone.now()
+    claimed = (
+        WebhookEvent.objects.filter(pk=webhook_event_id)
+        .filter(claimable_webhook_events(now))
+        .update(status="processing", claimed_at=now, attempts=F("attempts") + 1)
+    )
+    if not claimed:
+        logger.info(
+            "Webhook event already processed or being processed",
+            webhook_event_id=webhook_event_id,
+        )
+        return
+
+    webhook_event = WebhookEvent.objects.get(pk=webhook_event_id)
+
+    try:
+        webhook_handler(webhook_event.payload)
+    except Exception as e:
+        webhook_event.status = "failed"
+        webhook_event.last_error = str(e)
+        webhook_event.save(update_fields=["status", "last_error"])
+        logger.error(
+            "Webhook event processing failed",
+            stripe_event_id=webhook_event.stripe_event_id,
+            attempt=webhook_event.attempts,
+            error=str(e),
+        )
+        raise
+
+    webhook_event.status = "processed"
+    webhook_event.last_error = ""
+    webhook_event.processed_at = timezone.now()
+    webhook_event.save(update_fields=["status", "last_error", "processed_at"])
+
+
+@shared_task
+def requeue_stale_webhook_events():
+    """
+    Re-enqueue webhook events that were persisted but never picked up, or
+    whose worker died while processing them
+    """
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=settings.STRIPE_WEBHOOK_REQUEUE_AFTER_SECONDS)
+    lease_expired = now - timedelta(seconds=settings.STRIPE_WEBHOOK_LEASE_SECONDS)
+    stale_ids = list(
+        WebhookEvent.objects.filter(
+            Q(status="pending", created_at__lt=cutoff)
+            | Q(status="processing", claimed_at__lt=lease_expired)
+        )
+        .values_list("pk", flat=True)
+        .order_by("created_at")[:500]
+    )
+
+    for webhook_event_id in stale_ids:
+        process_webhook_event.delay(webhook_event_id)
+
+    if stale_ids:
+        logger.warning("Requeued stale webhook events", count=len(stale_ids))
+    return len(stale_ids)
+
+
+@shared_task
+def sync_price_catalog():
+    """Reconcile products and prices with Stripe and rebuild the price catalog"""
+    reconcile_stripe_data(resources=["products", "prices"])
+    catalog = refresh_price_catalog()
+    return len(catalog["prices"])
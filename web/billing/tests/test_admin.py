@@ -0,0 +1,52 @@
+from datetime import timedelta
+
+from billing.models import StripeCustomer, Subscription
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+User = get_user_model()
+
+
+class StripeAdminQueryCountTest(TestCase):
+    """Changelist query counts must not grow with the number of rows"""
+
+    def setUp(self):
+        admin_user = User.objects.create_superuser("admin@example.com", "password")
+        self.client.force_login(admin_user)
+
+    def create_customers(self, start, count):
+        for i in range(start, start + count):
+            user = User.objects.create(email=f"user{i}@example.com")
+            customer = StripeCustomer.objects.create(
+                user=user, stripe_customer_id=f"cus_{i}"
+            )
+            Subscription.objects.create(
+                customer=customer,
+                stripe_subscription_id=f"sub_{i}",
+                stripe_price_id="price_123",
+                status="active" if i % 2 else "canceled",
+                current_period_end=timezone.now() + timedelta(days=30),
+            )
+
+    def count_changelist_queries(self, url_name):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(url_name))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def assert_constant_queries(self, url_name):
+        self.create_customers(0, 2)
+        baseline = self.count_changelist_queries(url_name)
+
+        self.create_customers(2, 20)
+        self.assertEqual(self.count_changelist_queries(url_name), baseline)
+
+    def test_stripe_customer_changelist(self):
+        self.assert_constant_queries("admin:stripe_stripecustomer_changelist")
+
+    def test_subscription_changelist(self):
+        self.assert_constant_queries("admin:stripe_subscription_changelist")
@@ -0,0 +1,64 @@
+from datetime import timedelta
+
+from billing.cache import get_cached_entitlement
+from billing.models import StripeCustomer, Subscription
+from billing.utils import check_subscription_access, sync_subscription_from_payload
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+User = get_user_model()
+
+
+@override_settings(
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "sessions": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    }
+)
+class EntitlementCacheTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(email="test@example.com")
+        customer = StripeCustomer.objects.create(
+            user=self.user, stripe_customer_id="cus_123"
+        )
+        Subscription.objects.create(
+            customer=customer,
+            stripe_subscription_id="sub_123",
+            stripe_price_id="price_123",
+            status="active",
+            current_period_end=timezone.now() + timedelta(days=30),
+        )
+
+    def tearDown(self):
+        from django.core.cache import cache
+
+        cache.clear()
+
+    def test_access_check_is_cached(self):
+        self.assertTrue(check_subscription_access(self.user))
+
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(check_subscription_access(user))
+            self.assertFalse(check_subscription_access(user, ["past_due"]))
+
+    def test_sync_invalidates_cached_entitlement(self):
+        self.assertTrue(check_subscription_access(self.user))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            sync_subscription_from_payload(
+                {
+                    "id": "sub_123",
+                    "customer": "cus_123",
+                    "status": "past_due",
+                    "current_period_end": 1767225600,
+                    "cancel_at_period_end": False,
+                    "items": {"data": [{"price": {"id": "price_123"}}]},
+                },
+                1000,
+            )
+
+        self.assertIsNone(get_cached_entitlement(self.user.pk))
+        user = User.objects.get(pk=self.user.pk)
+        self.assertFalse(check_subscription_access(user))
@@ -0,0 +1,85 @@
+from billing.models import Price, Product
+from billing.webhook_handlers import webhook_handler
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+
+@override_settings(
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "sessions": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    }
+)
+class PriceCatalogViewTest(TestCase):
+    def setUp(self):
+        Product.objects.create(stripe_product_id="prod_1", name="Pro")
+        Price.objects.create(
+            stripe_price_id="price_1",
+            product_id="prod_1",
+            currency="usd",
+            unit_amount=1000,
+            type="recurring",
+            recurring_interval="month",
+            recurring_interval_count=1,
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_catalog_is_served_with_cache_headers(self):
+        response = self.client.get(reverse("stripe:prices"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["prices"],
+            [
+                {
+                    "id": "price_1",
+                    "unit_amount": 1000,
+                    "currency": "usd",
+                    "interval": "month",
+                    "interval_count": 1,
+                    "product_name": "Pro",
+                }
+            ],
+        )
+        self.assertTrue(response["ETag"])
+        self.assertIn("public", response["Cache-Control"])
+        self.assertIn("max-age=60", response["Cache-Control"])
+
+    def test_matching_etag_returns_not_modified(self):
+        etag = self.client.get(reverse("stripe:prices"))["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                reverse("stripe:prices"), HTTP_IF_NONE_MATCH=etag
+            )
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_price_webhook_refreshes_catalog(self):
+        etag = self.client.get(reverse("stripe:prices"))["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            webhook_handler(
+                {
+                    "id": "evt_1",
+                    "type": "price.updated",
+                    "data": {
+                        "object": {
+                            "id": "price_1",
+                            "product": "prod_1",
+                            "active": True,
+                            "currency": "usd",
+                            "unit_amount": 2000,
+                            "type": "recurring",
+                            "recurring": {"interval": "month", "interval_count": 1},
+                        }
+                    },
+                }
+            )
+
+        response = self.client.get(reverse("stripe:prices"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["prices"][0]["unit_amount"], 2000)
@@ -0,0 +1,178 @@
+import asyncio
+from unittest import mock
+
+import stripe
+from billing.client import (
+    CircuitBreaker,
+    StripeUnavailable,
+    _build_async_http_client,
+    _is_outage,
+    breaker,
+    get_async_stripe_client,
+    get_stripe_client,
+    reset_clients,
+    stripe_call,
+)
+from billing.loadtest import FakeStripeServer
+from django.test import SimpleTestCase, override_settings
+
+
+class CircuitBreakerTest(SimpleTestCase):
+    def test_opens_after_consecutive_failures(self):
+        circuit = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+
+        for _ in range(2):
+            circuit.record_failure()
+        circuit.before_call()
+        circuit.record_failure()
+
+        self.assertTrue(circuit.is_open)
+        with self.assertRaises(StripeUnavailable):
+            circuit.before_call()
+
+    def test_success_resets_failures(self):
+        circuit = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+
+        circuit.record_failure()
+        circuit.record_success()
+        circuit.record_failure()
+
+        self.assertFalse(circuit.is_open)
+
+    @mock.patch("billing.client.time.monotonic")
+    def test_half_open_allows_single_trial_call(self, monotonic):
+        circuit = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+        monotonic.return_value = 100
+        circuit.record_failure()
+
+        monotonic.return_value = 131
+        circuit.before_call()
+        with self.assertRaises(StripeUnavailable):
+            circuit.before_call()
+
+        circuit.record_success()
+        self.assertFalse(circuit.is_open)
+        circuit.before_call()
+
+
+class StripeCallTest(SimpleTestCase):
+    def tearDown(self):
+        breaker.reset()
+
+    @mock.patch("billing.client._is_outage", return_value=True)
+    def test_fails_fast_once_open(self, is_outage):
+        for _ in range(breaker.failure_threshold):
+            with self.assertRaises(ConnectionError):
+                with stripe_call("customers.create"):
+                    raise ConnectionError
+
+        call = mock.Mock()
+        with self.assertRaises(StripeUnavailable):
+            with stripe_call("customers.create"):
+                call()
+        call.assert_not_called()
+
+    @mock.patch("billing.client._is_outage", return_value=False)
+    def test_client_errors_do_not_open_breaker(self, is_outage):
+        for _ in range(breaker.failure_threshold):
+            with self.assertRaises(ValueError):
+                with stripe_call("customers.create"):
+                    raise ValueError
+
+        self.assertFalse(breaker.is_open)
+
+    @mock.patch("billing.client.time.monotonic")
+    def test_cancelled_trial_call_releases_half_open_breaker(self, monotonic):
+        monotonic.return_value = 100
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure()
+
+        monotonic.return_value = 100 + breaker.reset_timeout + 1
+        with self.assertRaises(asyncio.CancelledError):
+            with stripe_call("customers.create"):
+                raise asyncio.CancelledError
+
+        self.assertTrue(breaker.is_open)
+        with stripe_call("customers.create"):
+            pass
+        self.assertFalse(breaker.is_open)
+
+
+class StripeClientTest(SimpleTestCase):
+    """Runs the Stripe SDK against a local fake of the Stripe API"""
+
+    def setUp(self):
+        self.server = FakeStripeServer().start()
+        self.addCleanup(self.server.stop)
+        settings_override = override_settings(
+            STRIPE_SECRET_KEY="sk_test_123",
+            STRIPE_API_BASE=self.server.url,
+            STRIPE_MAX_NETWORK_RETRIES=0,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        reset_clients()
+        self.addCleanup(reset_clients)
+        self.addCleanup(breaker.reset)
+
+    def test_calls_stripe_through_pooled_client(self):
+        client = get_stripe_client()
+
+        with stripe_call("customers.create"):
+            customer = client.customers.create(params={"email": "a@example.com"})
+
+        self.assertIsInstance(client, stripe.StripeClient)
+        self.assertIs(get_stripe_client(), client)
+        self.assertEqual(customer.email, "a@example.com")
+        self.assertEqual(self.server.calls, {"POST /v1/customers": 1})
+
+    def test_calls_stripe_through_pooled_async_client(self):
+        async def create_customer():
+            with stripe_call("customers.create"):
+                return await get_async_stripe_client().customers.create_async(
+                    params={"email": "a@example.com"}
+                )
+
+        customer = asyncio.run(create_customer())
+
+        self.assertEqual(customer.email, "a@example.com")
+        self.assertEqual(self.server.calls, {"POST /v1/customers": 1})
+
+    def test_async_calls_use_the_pooled_httpx_client(self):
+        http_client = _build_async_http_client()
+        client = stripe.StripeClient(
+            "sk_test_123",
+            http_client=http_client,
+            base_addresses={"api": self.server.url},
+            max_network_retries=0,
+        )
+
+        async def create_customer():
+            with mock.patch.object(
+                http_client.pooled_client,
+                "request",
+                wraps=http_client.pooled_client.request,
+            ) as request:
+                await client.customers.create_async(params={"email": "a@example.com"})
+            await http_client.close_async()
+            return request
+
+        request = asyncio.run(create_customer())
+
+        # Fails if the SDK stops sending through the client it was given
+        request.assert_called_once()
+        self.assertTrue(http_client.default_client.is_closed)
+        self.assertTrue(http_client.pooled_client.is_closed)
+
+    def test_stripe_errors_reach_the_caller(self):
+        with self.assertRaises(stripe.error.InvalidRequestError):
+            with stripe_call("invoices.retrieve"):
+                get_stripe_client().invoices.retrieve("in_123")
+
+        self.assertFalse(breaker.is_open)
+
+    def test_outages_are_told_apart_from_bad_requests(self):
+        self.assertTrue(_is_outage(stripe.error.APIConnectionError("down")))
+        self.assertTrue(_is_outage(stripe.error.RateLimitError("slow down")))
+        self.assertFalse(_is_outage(stripe.error.InvalidRequestError("bad", "id")))
+        self.assertFalse(_is_outage(ValueError()))
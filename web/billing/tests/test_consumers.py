@@ -0,0 +1,102 @@
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync, sync_to_async
+from billing.consumers import SubscriptionStatusConsumer
+from billing.models import StripeCustomer
+from billing.utils import sync_subscription_from_payload
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+User = get_user_model()
+
+
+@override_settings(
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "sessions": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    },
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+)
+class SubscriptionStatusConsumerTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(email="test@example.com")
+        StripeCustomer.objects.create(user=self.user, stripe_customer_id="cus_123")
+
+    def tearDown(self):
+        from django.core.cache import cache
+
+        cache.clear()
+
+    def communicator(self, user):
+        communicator = WebsocketCommunicator(
+            SubscriptionStatusConsumer.as_asgi(), "/api/ws/stripe/subscription/"
+        )
+        communicator.scope["user"] = user
+        return communicator
+
+    @async_to_sync
+    async def test_anonymous_connection_is_rejected(self):
+        communicator = self.communicator(AnonymousUser())
+
+        connected, _ = await communicator.connect()
+
+        self.assertFalse(connected)
+
+    @async_to_sync
+    async def test_status_is_sent_on_connect(self):
+        communicator = self.communicator(self.user)
+
+        connected, _ = await communicator.connect()
+        message = await communicator.receive_json_from()
+        await communicator.disconnect()
+
+        self.assertTrue(connected)
+        self.assertEqual(message["type"], "subscription.status")
+        self.assertFalse(message["status"]["has_active_subscription"])
+
+    def sync_subscription(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            sync_subscription_from_payload(
+                {
+                    "id": "sub_123",
+                    "customer": "cus_123",
+                    "status": "active",
+                    "items": {"data": [{"price": {"id": "price_123"}}]},
+                    "current_period_end": int(
+                        (timezone.now() + timedelta(days=30)).timestamp()
+                    ),
+                    "cancel_at_period_end": False,
+                },
+                event_created=int(timezone.now().timestamp()),
+            )
+
+    @async_to_sync
+    async def test_subscription_change_is_pushed(self):
+        communicator = self.communicator(self.user)
+        await communicator.connect()
+        await communicator.receive_json_from()
+
+        await sync_to_async(self.sync_subscription)()
+        message = await communicator.receive_json_from()
+        await communicator.disconnect()
+
+        self.assertTrue(message["status"]["has_active_subscription"])
+        self.assertEqual(message["status"]["stripe_price_id"], "price_123")
+
+    @async_to_sync
+    async def test_other_users_are_not_notified(self):
+        other = await sync_to_async(User.objects.create)(email="other@example.com")
+        communicator = self.communicator(other)
+        await communicator.connect()
+        await communicator.receive_json_from()
+
+        await get_channel_layer().group_send(
+            f"subscription.{self.user.pk}", {"type": "subscription.changed"}
+        )
+
+        self.assertTrue(await communicator.receive_nothing())
+        await communicator.disconnect()
@@ -0,0 +1,165 @@
+import hashlib
+import hmac
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+
+import requests
+from asgiref.sync import async_to_sync, sync_to_async
+from billing import loadtest
+from billing.management.commands import loadtest_billing
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+
+User = get_user_model()
+
+
+class WebhookSigningTest(SimpleTestCase):
+    def test_signature_matches_stripe_scheme(self):
+        payload = json.dumps({"id": "evt_123"}).encode()
+
+        header = loadtest.sign_webhook_payload(payload, "whsec_test", timestamp=100)
+
+        expected = hmac.new(
+            b"whsec_test", b"100." + payload, hashlib.sha256
+        ).hexdigest()
+        self.assertEqual(header, f"t=100,v1={expected}")
+
+
+class FakeStripeServerTest(SimpleTestCase):
+    def setUp(self):
+        self.server = loadtest.FakeStripeServer().start()
+        self.addCleanup(self.server.stop)
+
+    def test_creates_customers(self):
+        response = requests.post(
+            f"{self.server.url}/v1/customers", data={"email": "test@example.com"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["object"], "customer")
+        self.assertEqual(response.json()["email"], "test@example.com")
+        self.assertEqual(self.server.calls, {"POST /v1/customers": 1})
+
+    def test_updates_subscriptions(self):
+        response = requests.post(
+            f"{self.server.url}/v1/subscriptions/sub_123",
+            data={"cancel_at_period_end": "true"},
+        )
+
+        self.assertEqual(response.json()["id"], "sub_123")
+        self.assertTrue(response.json()["cancel_at_period_end"])
+
+    def test_unknown_endpoints_return_stripe_errors(self):
+        response = requests.get(f"{self.server.url}/v1/invoices")
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()["error"]["type"], "invalid_request_error")
+
+
+class QueryCountingTest(TestCase):
+    def setUp(self):
+        loadtest.enable_query_counting()
+        self.addCleanup(loadtest.disable_query_counting)
+
+    def test_queries_are_counted_per_request(self):
+        User.objects.create(email="test@example.com")
+
+        async def send():
+            return await sync_to_async(lambda: list(User.objects.all()))()
+
+        users, _, queries = async_to_sync(loadtest.timed_request)(send)
+
+        self.assertEqual(len(users), 1)
+        self.assertEqual(queries, 1)
+
+
+class ReportTest(SimpleTestCase):
+    def report(self, p95, queries, errors=0):
+        samples = [(200, 0.01, queries)] * 90 + [(200, p95 / 1000, queries)] * 10
+        samples += [(500, 0.01, queries)] * errors
+        return {"endpoints": {"status": loadtest.summarize(samples, 1.0, 0)}}
+
+    def test_summary(self):
+        summary = loadtest.summarize(
+            [(200, 0.010, 2), (200, 0.020, 2), (500, 0.030, 4)], 0.5, 3
+        )
+
+        self.assertEqual(summary["requests"], 3)
+        self.assertEqual(summary["errors"], 1)
+        self.assertEqual(summary["status_codes"], {"200": 2, "500": 1})
+        self.assertEqual(summary["throughput_rps"], 6.0)
+        self.assertEqual(summary["latency_ms"]["p50"], 20.0)
+        self.assertEqual(summary["latency_ms"]["p99"], 30.0)
+        self.assertEqual(summary["db_queries_per_request"]["max"], 4)
+        self.assertEqual(summary["stripe_calls_per_request"], 1.0)
+
+    def test_unchanged_report_has_no_regressions(self):
+        self.assertEqual(
+            loadtest.compare_reports(self.report(50, 2), self.report(55, 2), 0.2), []
+        )
+
+    def test_regressions(self):
+        regressions = loadtest.compare_reports(
+            self.report(50, 2), self.report(100, 3, errors=1), 0.2
+        )
+
+        self.assertEqual(len(regressions), 3)
+
+    def test_error_rates(self):
+        report = self.report(50, 2, errors=5)
+
+        self.assertEqual(len(loadtest.check_error_rates(report, 0)), 1)
+        self.assertEqual(loadtest.check_error_rates(report, 0.05), [])
+
+
+@override_settings(
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "sessions": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    },
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+)
+class LoadtestCommandTest(TransactionTestCase):
+    def test_endpoints_succeed(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "report.json")
+            call_command(
+                "loadtest_billing",
+                "--requests=4",
+                "--concurrency=2",
+                "--warmup=1",
+                "--eager",
+                f"--output={path}",
+                stderr=io.StringIO(),
+            )
+            with open(path) as f:
+                report = json.load(f)
+
+        self.assertEqual(set(report["endpoints"]), set(loadtest_billing.ENDPOINTS))
+        for name, result in report["endpoints"].items():
+            with self.subTest(endpoint=name):
+                self.assertEqual(result["requests"], 4)
+                self.assertTrue(
+                    all(code.startswith("2") for code in result["status_codes"]),
+                    result["status_codes"],
+                )
+
+    @mock.patch(
+        "billing.views.aget_or_create_stripe_customer", side_effect=RuntimeError
+    )
+    def test_fails_on_errors(self, aget_or_create_stripe_customer):
+        with self.assertRaisesMessage(CommandError, "1 endpoints returned errors"):
+            call_command(
+                "loadtest_billing",
+                "--requests=2",
+                "--concurrency=1",
+                "--warmup=0",
+                "--endpoints=checkout",
+                stdout=io.StringIO(),
+                stderr=io.StringIO(),
+            )
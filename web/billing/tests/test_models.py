@@ -0,0 +1,40 @@
+from datetime import timedelta
+
+from billing.models import StripeCustomer, Subscription
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+User = get_user_model()
+
+
+class StripeCustomerActiveSubscriptionTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(email="test@example.com")
+        self.customer = StripeCustomer.objects.create(
+            user=self.user, stripe_customer_id="cus_123"
+        )
+        self.subscription = Subscription.objects.create(
+            customer=self.customer,
+            stripe_subscription_id="sub_123",
+            stripe_price_id="price_123",
+            status="active",
+            current_period_end=timezone.now() + timedelta(days=30),
+        )
+
+    def test_active_subscription_is_memoized(self):
+        customer = StripeCustomer.objects.get(pk=self.customer.pk)
+
+        with self.assertNumQueries(1):
+            self.assertTrue(customer.has_active_subscription)
+            self.assertEqual(customer.active_subscription, self.subscription)
+            self.assertTrue(customer.has_active_subscription)
+
+    def test_memo_resets_on_refresh(self):
+        customer = StripeCustomer.objects.get(pk=self.customer.pk)
+        self.assertTrue(customer.has_active_subscription)
+
+        Subscription.objects.filter(pk=self.subscription.pk).update(status="canceled")
+        customer.refresh_from_db()
+
+        self.assertFalse(customer.has_active_subscription)
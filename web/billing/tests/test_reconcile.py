@@ -0,0 +1,313 @@
+import time
+from datetime import datetime
+from datetime import timezone as dt_timezone
+from types import SimpleNamespace
+from unittest import mock
+
+from billing.models import (
+    Price,
+    Product,
+    ReconcileCheckpoint,
+    StripeCustomer,
+    Subscription,
+)
+from billing.reconcile import reconcile_stripe_data
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+User = get_user_model()
+
+
+class FakeListResource:
+    """Stripe list endpoint stand-in that pages over `objects`"""
+
+    def __init__(self, objects, filter_param=None):
+        self.objects = objects
+        self.filter_param = filter_param
+
+    def list(self, params):
+        params = dict(params)
+        limit = params.pop("limit")
+        starting_after = params.pop("starting_after", None)
+        objects = self.objects
+        if self.filter_param:
+            objects = [
+                obj
+                for obj in objects
+                if obj[self.filter_param] == params[self.filter_param]
+            ]
+        start = 0
+        if starting_after:
+            start = [obj["id"] for obj in objects].index(starting_after) + 1
+        page = objects[start : start + limit]
+        return {"data": page, "has_more": start + limit < len(objects)}
+
+
+class FakeEvents(FakeListResource):
+    """Stripe events endpoint stand-in filtering by type and creation time"""
+
+    def list(self, params):
+        params = dict(params)
+        types = params.pop("types")
+        created = params.pop("created")["gte"]
+        return FakeListResource(
+            [
+                event
+                for event in self.objects
+                if event["type"] in types and event["created"] >= created
+            ]
+        ).list(params)
+
+
+def event(event_type, obj, created):
+    return {
+        "id": f"evt_{created}",
+        "type": event_type,
+        "created": created,
+        "data": {"object": obj},
+    }
+
+
+def subscription(i, status="active"):
+    return {
+        "id": f"sub_{i}",
+        "customer": f"cus_{i}",
+        "status": status,
+        "current_period_end": 1767225600,
+        "cancel_at_period_end": False,
+        "trial_end": None,
+        "items": {"data": [{"price": {"id": "price_1"}}]},
+    }
+
+
+class ReconcileStripeDataTest(TestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create(email=f"user{i}@example.com") for i in range(150)
+        ]
+        for i, user in enumerate(self.users[:140]):
+            StripeCustomer.objects.create(user=user, stripe_customer_id=f"cus_{i}")
+        Subscription.objects.create(
+            customer=StripeCustomer.objects.get(stripe_customer_id="cus_0"),
+            stripe_subscription_id="sub_0",
+            stripe_price_id="price_old",
+            status="trialing",
+            current_period_end="2025-01-01T00:00:00Z",
+        )
+
+        self.fake_client = SimpleNamespace(
+            products=FakeListResource(
+                [{"id": "prod_1", "name": "Pro", "active": True, "metadata": {}}],
+                "active",
+            ),
+            prices=FakeListResource(
+                [
+                    {
+                        "id": "price_1",
+                        "product": "prod_1",
+                        "active": True,
+                        "currency": "usd",
+                        "unit_amount": 1000,
+                        "type": "recurring",
+                        "recurring": {"interval": "month", "interval_count": 1},
+                    }
+                ],
+                "active",
+            ),
+            customers=FakeListResource(
+                [
+                    {"id": f"cus_{i}", "metadata": {"user_id": str(user.pk)}}
+                    for i, user in enumerate(self.users)
+                ]
+            ),
+            subscriptions=FakeListResource(
+                [subscription(i) for i in range(130)]
+                + [subscription(999)]  # unknown customer
+                + [subscription(i, "canceled") for i in range(130, 135)]
+                + [subscription(135, "incomplete"), subscription(136, "paused")],
+                "status",
+            ),
+        )
+
+    def reconcile(self, **kwargs):
+        with mock.patch(
+            "billing.reconcile.get_stripe_client", return_value=self.fake_client
+        ):
+            return reconcile_stripe_data(
+                **{"concurrency": 3, "batch_size": 50, **kwargs}
+            )
+
+    def test_full_reconcile(self):
+        stats = self.reconcile()
+
+        self.assertEqual(Product.objects.get().name, "Pro")
+        self.assertEqual(Price.objects.get().product.name, "Pro")
+
+        self.assertEqual(stats["customers"].created, 10)
+        self.assertEqual(StripeCustomer.objects.count(), 150)
+
+        self.assertEqual(stats["subscriptions"].fetched, 138)
+        self.assertEqual(stats["subscriptions"].created, 136)
+        self.assertEqual(stats["subscriptions"].updated, 1)
+        self.assertEqual(stats["subscriptions"].skipped, 1)
+        existing = Subscription.objects.get(stripe_subscription_id="sub_0")
+        self.assertEqual(existing.status, "active")
+        self.assertEqual(existing.stripe_price_id, "price_1")
+        self.assertEqual(Subscription.objects.filter(status="canceled").count(), 5)
+        self.assertTrue(Subscription.objects.filter(status="incomplete").exists())
+        self.assertTrue(Subscription.objects.filter(status="paused").exists())
+
+        self.assertFalse(ReconcileCheckpoint.objects.exists())
+
+    def test_subscriptions_of_customers_linked_in_the_same_run(self):
+        StripeCustomer.objects.filter(
+            stripe_customer_id__in=[f"cus_{i}" for i in range(100, 140)]
+        ).delete()
+        customers = self.fake_client.customers
+        list_customers = customers.list
+
+        def list_slowly(params):
+            time.sleep(0.1)
+            return list_customers(params)
+
+        # Subscriptions are listed long before customers
+        with mock.patch.object(customers, "list", side_effect=list_slowly):
+            stats = self.reconcile(concurrency=8)
+
+        self.assertEqual(stats["customers"].created, 50)
+        self.assertEqual(stats["subscriptions"].created, 136)
+        self.assertEqual(stats["subscriptions"].skipped, 1)
+
+    def incremental_events(self):
+        user = self.users[145]
+        # Newest first, like Stripe lists them
+        return [
+            event(
+                "customer.subscription.updated",
+                {**subscription(0, "past_due"), "created": 100},
+                2003,
+            ),
+            event(
+                "customer.subscription.created",
+                {**subscription(145), "created": 2002},
+                2002,
+            ),
+            event(
+                "customer.created",
+                {
+                    "id": "cus_145",
+                    "created": 2001,
+                    "metadata": {"user_id": str(user.pk)},
+                },
+                2001,
+            ),
+            event(
+                "product.deleted",
+                {
+                    "id": "prod_1",
+                    "name": "Pro",
+                    "active": True,
+                    "metadata": {},
+                    "created": 100,
+                },
+                2000,
+            ),
+            event(
+                "customer.subscription.updated",
+                {**subscription(0, "active"), "created": 100},
+                1500,
+            ),
+            event(
+                "customer.subscription.created",
+                {**subscription(1), "created": 100},
+                500,
+            ),
+        ]
+
+    def test_incremental_reconcile_applies_latest_changes(self):
+        self.fake_client.events = FakeEvents(self.incremental_events())
+
+        stats = self.reconcile(since=datetime.fromtimestamp(1000, tz=dt_timezone.utc))
+
+        self.assertEqual(stats["subscriptions"].fetched, 2)
+        self.assertEqual(
+            Subscription.objects.get(stripe_subscription_id="sub_0").status, "past_due"
+        )
+        self.assertEqual(
+            Subscription.objects.get(stripe_subscription_id="sub_145").customer.user,
+            self.users[145],
+        )
+        self.assertFalse(
+            Subscription.objects.filter(stripe_subscription_id="sub_1").exists()
+        )
+        self.assertFalse(Product.objects.get(stripe_product_id="prod_1").active)
+        self.assertFalse(ReconcileCheckpoint.objects.exists())
+
+    def test_incremental_reconcile_filters_by_creation(self):
+        self.fake_client.events = FakeEvents(self.incremental_events())
+        StripeCustomer.objects.create(
+            user=self.users[145], stripe_customer_id="cus_145"
+        )
+
+        self.reconcile(
+            resources=["subscriptions"],
+            since=datetime.fromtimestamp(1000, tz=dt_timezone.utc),
+            created_since=datetime.fromtimestamp(2000, tz=dt_timezone.utc),
+        )
+
+        self.assertTrue(
+            Subscription.objects.filter(stripe_subscription_id="sub_145").exists()
+        )
+        self.assertEqual(
+            Subscription.objects.get(stripe_subscription_id="sub_0").status, "trialing"
+        )
+
+    def test_second_run_is_unchanged(self):
+        self.reconcile()
+        stats = self.reconcile()
+
+        self.assertEqual(stats["subscriptions"].created, 0)
+        self.assertEqual(stats["subscriptions"].updated, 0)
+        self.assertEqual(stats["subscriptions"].unchanged, 137)
+
+    def test_dry_run_writes_nothing(self):
+        stats = self.reconcile(dry_run=True)
+
+        self.assertEqual(stats["subscriptions"].created, 136)
+        self.assertEqual(Subscription.objects.count(), 1)
+        self.assertFalse(Product.objects.exists())
+
+    def test_resume_from_checkpoint(self):
+        ReconcileCheckpoint.objects.create(
+            key="subscriptions:active", starting_after="sub_99"
+        )
+        ReconcileCheckpoint.objects.create(key="subscriptions:canceled", done=True)
+
+        stats = self.reconcile(resources=["subscriptions"], resume=True)
+
+        # sub_100..sub_129, the unknown customer, incomplete and paused;
+        # canceled had finished
+        self.assertEqual(stats["subscriptions"].fetched, 33)
+        self.assertFalse(Subscription.objects.filter(status="canceled").exists())
+        self.assertFalse(ReconcileCheckpoint.objects.exists())
+
+    def test_interrupted_run_marks_finished_partitions(self):
+        subscriptions = self.fake_client.subscriptions
+        list_subscriptions = subscriptions.list
+
+        def fail_unpaid(params):
+            if params["status"] == "unpaid":
+                raise ConnectionError
+            return list_subscriptions(params)
+
+        # One worker pages the partitions in order, so unpaid fails last
+        with mock.patch.object(subscriptions, "list", side_effect=fail_unpaid):
+            with self.assertRaises(ConnectionError):
+                self.reconcile(resources=["subscriptions"], concurrency=1)
+
+        self.assertTrue(
+            ReconcileCheckpoint.objects.get(key="subscriptions:canceled").done
+        )
+        self.assertFalse(
+            ReconcileCheckpoint.objects.filter(key="subscriptions:unpaid").exists()
+        )
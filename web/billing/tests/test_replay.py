@@ -0,0 +1,168 @@
+import io
+import json
+import os
+import tempfile
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from billing import replay
+from billing.loadtest import subscription_event, subscription_object
+from billing.models import StripeCustomer, Subscription, WebhookEvent
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+User = get_user_model()
+
+
+def update_event(event_id, customer_id, created, **fields):
+    return subscription_event(
+        event_id,
+        subscription_object(f"sub_{customer_id}", customer_id, "price_123", **fields),
+        created=created,
+    )
+
+
+class EventFileTest(SimpleTestCase):
+    def test_round_trip(self):
+        records = [
+            (100.5, update_event("evt_1", "cus_1", 100)),
+            (101.0, update_event("evt_2", "cus_2", 101)),
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "events.ndjson.gz")
+
+            count = replay.write_events(path, records)
+
+            self.assertEqual(count, 2)
+            self.assertEqual(list(replay.read_events(path)), records)
+
+    def test_partition_key_uses_customer(self):
+        event = update_event("evt_1", "cus_1", 100)
+        self.assertEqual(replay.partition_key(event), "cus_1")
+
+        event["data"]["object"]["customer"] = {"id": "cus_2", "object": "customer"}
+        self.assertEqual(replay.partition_key(event), "cus_2")
+
+
+class ReplayTest(SimpleTestCase):
+    def test_customer_events_stay_in_order_on_one_worker(self):
+        records = [(i, update_event(f"evt_{i}", f"cus_{i % 3}", i)) for i in range(30)]
+        applied = []
+
+        def apply(event):
+            applied.append((threading.current_thread().name, event["id"]))
+
+        stats, _ = replay.replay_events(records, apply=apply, workers=4)
+
+        self.assertEqual(stats["customer.subscription.updated"].processed, 30)
+        for customer in range(3):
+            ids = [f"evt_{i}" for i in range(customer, 30, 3)]
+            applied_for_customer = [item for item in applied if item[1] in ids]
+            self.assertEqual([item[1] for item in applied_for_customer], ids)
+            self.assertEqual(len({item[0] for item in applied_for_customer}), 1)
+
+    def test_failures_are_counted(self):
+        def apply(event):
+            raise ValueError("boom")
+
+        stats, _ = replay.replay_events(
+            [(1, update_event("evt_1", "cus_1", 1))], apply=apply
+        )
+
+        self.assertEqual(stats["customer.subscription.updated"].failed, 1)
+        self.assertEqual(stats["customer.subscription.updated"].processed, 0)
+
+
+@override_settings(
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "sessions": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    },
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+)
+class ReplayDatabaseTest(TransactionTestCase):
+    def setUp(self):
+        user = User.objects.create(email="test@example.com")
+        customer = StripeCustomer.objects.create(user=user, stripe_customer_id="cus_1")
+        Subscription.objects.create(
+            customer=customer,
+            stripe_subscription_id="sub_cus_1",
+            stripe_price_id="price_123",
+            status="active",
+            current_period_end=timezone.now() + timedelta(days=30),
+        )
+
+    def subscription_status(self):
+        return Subscription.objects.get(stripe_subscription_id="sub_cus_1").status
+
+
+class BackfillTest(ReplayDatabaseTest):
+    def test_backfill_applies_events_once(self):
+        now = int(timezone.now().timestamp())
+        records = [
+            (now, update_event("evt_1", "cus_1", now, status="past_due")),
+            (now + 1, update_event("evt_2", "cus_1", now + 1, status="active")),
+        ]
+        WebhookEvent.objects.create(
+            stripe_event_id="evt_2",
+            type="customer.subscription.updated",
+            payload=records[1][1],
+            status="processed",
+        )
+
+        stats, _ = replay.replay_events(records, apply=replay.record_event)
+
+        type_stats = stats["customer.subscription.updated"]
+        self.assertEqual((type_stats.processed, type_stats.skipped), (1, 1))
+        self.assertEqual(
+            WebhookEvent.objects.get(stripe_event_id="evt_1").status, "processed"
+        )
+        self.assertEqual(self.subscription_status(), "past_due")
+
+
+@override_settings(MAIL_QUEUE_ENABLED=True)
+class BenchmarkReplayTest(ReplayDatabaseTest):
+    def test_replay_has_no_side_effects(self):
+        now = int(timezone.now().timestamp())
+        trial_will_end = update_event("evt_2", "cus_1", now + 1, status="past_due")
+        trial_will_end["type"] = "customer.subscription.trial_will_end"
+        payment_failed = {
+            "id": "evt_3",
+            "object": "event",
+            "type": "invoice.payment_failed",
+            "created": now + 2,
+            "data": {
+                "object": {
+                    "id": "in_1",
+                    "object": "invoice",
+                    "customer": "cus_1",
+                    "subscription": "sub_cus_1",
+                }
+            },
+        }
+        records = [
+            (now, update_event("evt_1", "cus_1", now, status="past_due")),
+            (now + 1, trial_will_end),
+            (now + 2, payment_failed),
+        ]
+        out = io.StringIO()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "events.ndjson.gz")
+            replay.write_events(path, records)
+            with mock.patch("mail.outbox.enqueue") as enqueue, mock.patch(
+                "billing.realtime.async_to_sync"
+            ) as publish:
+                call_command("webhook_replay", "replay", path, "--json", stdout=out)
+
+        report = json.loads(out.getvalue())
+        self.assertEqual((report["events"], report["failed"]), (3, 0))
+        self.assertEqual(self.subscription_status(), "active")
+        self.assertFalse(WebhookEvent.objects.exists())
+        enqueue.assert_not_called()
+        self.assertEqual(mail.outbox, [])
+        publish.assert_not_called()
@@ -0,0 +1,76 @@
+from datetime import datetime
+from datetime import timezone as dt_timezone
+from unittest import mock
+
+from billing.models import StripeCustomer, Subscription
+from billing.utils import sync_subscription_from_payload
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+User = get_user_model()
+
+
+def subscription_payload(**overrides):
+    payload = {
+        "id": "sub_123",
+        "object": "subscription",
+        "customer": "cus_123",
+        "status": "active",
+        "current_period_end": 1767225600,
+        "cancel_at_period_end": False,
+        "trial_end": None,
+        "items": {"data": [{"price": {"id": "price_123"}}]},
+    }
+    payload.update(overrides)
+    return payload
+
+
+class SyncSubscriptionFromPayloadTest(TestCase):
+    def setUp(self):
+        user = User.objects.create(email="test@example.com")
+        self.customer = StripeCustomer.objects.create(
+            user=user, stripe_customer_id="cus_123"
+        )
+
+    @mock.patch("billing.utils.sync_subscription_from_stripe")
+    def test_creates_subscription_without_api_call(self, sync_from_stripe):
+        subscription = sync_subscription_from_payload(subscription_payload(), 1000)
+
+        sync_from_stripe.assert_not_called()
+        self.assertEqual(subscription.customer, self.customer)
+        self.assertEqual(subscription.status, "active")
+        self.assertEqual(subscription.stripe_price_id, "price_123")
+        self.assertEqual(
+            subscription.current_period_end,
+            datetime(2026, 1, 1, tzinfo=dt_timezone.utc),
+        )
+        self.assertEqual(
+            subscription.last_event_at,
+            datetime.fromtimestamp(1000, tz=dt_timezone.utc),
+        )
+
+    def test_stale_event_is_ignored(self):
+        sync_subscription_from_payload(subscription_payload(status="past_due"), 2000)
+        sync_subscription_from_payload(subscription_payload(status="active"), 1000)
+
+        subscription = Subscription.objects.get(stripe_subscription_id="sub_123")
+        self.assertEqual(subscription.status, "past_due")
+
+    def test_newer_event_is_applied(self):
+        sync_subscription_from_payload(subscription_payload(status="active"), 1000)
+        sync_subscription_from_payload(subscription_payload(status="past_due"), 2000)
+
+        subscription = Subscription.objects.get(stripe_subscription_id="sub_123")
+        self.assertEqual(subscription.status, "past_due")
+
+    @mock.patch("billing.utils.sync_subscription_from_stripe")
+    def test_incomplete_payload_falls_back_to_api(self, sync_from_stripe):
+        payload = subscription_payload()
+        del payload["items"]
+
+        sync_subscription_from_payload(payload, 1000)
+
+        sync_from_stripe.assert_called_once_with(
+            "sub_123", datetime.fromtimestamp(1000, tz=dt_timezone.utc)
+        )
+        self.assertFalse(Subscription.objects.exists())
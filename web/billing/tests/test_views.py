@@ -0,0 +1,131 @@
+import time
+from datetime import timedelta
+from unittest import mock
+
+from billing.client import breaker, reset_clients
+from billing.loadtest import FakeStripeServer
+from billing.models import StripeCustomer, Subscription
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+User = get_user_model()
+
+
+@override_settings(
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "sessions": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    }
+)
+class AsyncSubscriptionViewsTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(email="test@example.com")
+        customer = StripeCustomer.objects.create(
+            user=self.user, stripe_customer_id="cus_123"
+        )
+        self.subscription = Subscription.objects.create(
+            customer=customer,
+            stripe_subscription_id="sub_123",
+            stripe_price_id="price_123",
+            status="active",
+            current_period_end=timezone.now() + timedelta(days=30),
+        )
+
+    @mock.patch("billing.views.get_async_stripe_client")
+    async def test_cancel_subscription(self, get_client):
+        update_async = mock.AsyncMock(return_value={})
+        get_client.return_value.subscriptions.update_async = update_async
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.post(reverse("stripe:cancel"))
+
+        self.assertEqual(response.status_code, 200)
+        update_async.assert_awaited_once_with(
+            "sub_123", params={"cancel_at_period_end": True}
+        )
+        await self.subscription.arefresh_from_db()
+        self.assertTrue(self.subscription.cancel_at_period_end)
+
+    async def test_subscription_status(self):
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.get(reverse("stripe:status"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "active")
+
+    async def test_portal_without_customer(self):
+        user = await User.objects.acreate(email="other@example.com")
+        await self.async_client.aforce_login(user)
+
+        response = await self.async_client.post(reverse("stripe:portal"))
+
+        self.assertEqual(response.status_code, 404)
+
+    @mock.patch("billing.views.get_async_stripe_client")
+    async def test_cancel_subscription_while_stripe_unavailable(self, get_client):
+        await self.async_client.aforce_login(self.user)
+
+        with mock.patch.object(breaker, "opened_at", time.monotonic()):
+            response = await self.async_client.post(reverse("stripe:cancel"))
+
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("Retry-After", response)
+        get_client.assert_not_called()
+
+
+@override_settings(
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "sessions": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    },
+    STRIPE_SECRET_KEY="sk_test_123",
+    STRIPE_MAX_NETWORK_RETRIES=0,
+    STRIPE_SUCCESS_URL="https://example.com/success",
+    STRIPE_CANCEL_URL="https://example.com/cancel",
+)
+class CheckoutViewTest(TestCase):
+    """Runs the checkout view with the Stripe SDK against a fake Stripe API"""
+
+    def setUp(self):
+        self.server = FakeStripeServer().start()
+        self.addCleanup(self.server.stop)
+        settings_override = override_settings(STRIPE_API_BASE=self.server.url)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        reset_clients()
+        self.addCleanup(reset_clients)
+        self.addCleanup(breaker.reset)
+        self.user = User.objects.create(email="test@example.com")
+        StripeCustomer.objects.create(user=self.user, stripe_customer_id="cus_123")
+
+    async def test_creates_checkout_session(self):
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.post(
+            reverse("stripe:checkout"), {"price_id": "price_123"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["checkout_url"].startswith(self.server.url))
+        self.assertEqual(self.server.calls, {"POST /v1/checkout/sessions": 1})
+
+    async def test_stripe_errors_are_returned(self):
+        await self.async_client.aforce_login(self.user)
+        error = {
+            "error": {
+                "type": "invalid_request_error",
+                "message": "No such price: 'price_123'",
+            }
+        }
+
+        with mock.patch.object(self.server, "route", return_value=(400, error)):
+            response = await self.async_client.post(
+                reverse("stripe:checkout"), {"price_id": "price_123"}
+            )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("No such price: 'price_123'", response.json()["error"])
+        self.assertFalse(breaker.is_open)
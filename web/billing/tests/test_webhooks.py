@@ -0,0 +1,262 @@
+import json
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from unittest import mock
+
+from billing.loadtest import sign_webhook_payload, subscription_object
+from billing.models import SentNotice, StripeCustomer, Subscription, WebhookEvent
+from billing.tasks import process_webhook_event, requeue_stale_webhook_events
+from billing.webhook_handlers import webhook_handler
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+User = get_user_model()
+
+EVENT = {
+    "id": "evt_123",
+    "type": "customer.subscription.updated",
+    "data": {"object": {"id": "sub_123", "status": "active"}},
+}
+
+
+TRIAL_WILL_END = {
+    "id": "evt_1",
+    "type": "customer.subscription.trial_will_end",
+    "data": {"object": {"id": "sub_123"}},
+}
+
+PAYMENT_FAILED = {
+    "id": "evt_2",
+    "type": "invoice.payment_failed",
+    "data": {
+        "object": {
+            "subscription": "sub_123",
+            "hosted_invoice_url": "https://invoice.stripe.com/i/1",
+        }
+    },
+}
+
+WEBHOOK_SECRET = "whsec_test"
+
+
+@override_settings(STRIPE_WEBHOOK_SECRET=WEBHOOK_SECRET)
+@mock.patch("billing.views.process_webhook_event.delay")
+class StripeWebhookViewTest(TestCase):
+    def post_event(self, secret=WEBHOOK_SECRET):
+        payload = json.dumps(EVENT).encode()
+        return self.client.post(
+            reverse("stripe:webhook"),
+            data=payload,
+            content_type="application/json",
+            HTTP_STRIPE_SIGNATURE=sign_webhook_payload(payload, secret),
+        )
+
+    def test_event_is_persisted_and_enqueued(self, delay):
+        response = self.post_event()
+
+        self.assertEqual(response.status_code, 200)
+        webhook_event = WebhookEvent.objects.get(stripe_event_id="evt_123")
+        self.assertEqual(webhook_event.type, "customer.subscription.updated")
+        self.assertEqual(webhook_event.payload, EVENT)
+        self.assertEqual(webhook_event.status, "pending")
+        delay.assert_called_once_with(webhook_event.pk)
+
+    def test_invalid_signature_is_rejected(self, delay):
+        response = self.post_event(secret="whsec_other")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(WebhookEvent.objects.exists())
+        delay.assert_not_called()
+
+    def test_processed_or_processing_event_is_not_enqueued_again(self, delay):
+        webhook_event = WebhookEvent.objects.create(
+            stripe_event_id="evt_123", type=EVENT["type"], payload=EVENT
+        )
+
+        for status in ("processed", "processing"):
+            WebhookEvent.objects.filter(pk=webhook_event.pk).update(status=status)
+            response = self.post_event()
+            self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(WebhookEvent.objects.count(), 1)
+        delay.assert_not_called()
+
+
+class ProcessWebhookEventTaskTest(TestCase):
+    def setUp(self):
+        self.webhook_event = WebhookEvent.objects.create(
+            stripe_event_id="evt_123", type=EVENT["type"], payload=EVENT
+        )
+
+    @mock.patch("billing.tasks.webhook_handler")
+    def test_event_is_processed_once(self, webhook_handler):
+        process_webhook_event(self.webhook_event.pk)
+        process_webhook_event(self.webhook_event.pk)
+
+        webhook_handler.assert_called_once_with(EVENT)
+        self.webhook_event.refresh_from_db()
+        self.assertEqual(self.webhook_event.status, "processed")
+        self.assertEqual(self.webhook_event.attempts, 1)
+        self.assertIsNotNone(self.webhook_event.processed_at)
+
+    @mock.patch("billing.tasks.webhook_handler", side_effect=RuntimeError("boom"))
+    def test_failed_event_is_recorded(self, webhook_handler):
+        with self.assertRaises(RuntimeError):
+            process_webhook_event(self.webhook_event.pk)
+
+        self.webhook_event.refresh_from_db()
+        self.assertEqual(self.webhook_event.status, "failed")
+        self.assertEqual(self.webhook_event.last_error, "boom")
+
+    def claim(self, seconds_ago):
+        WebhookEvent.objects.filter(pk=self.webhook_event.pk).update(
+            status="processing",
+            claimed_at=timezone.now() - timedelta(seconds=seconds_ago),
+            attempts=1,
+        )
+
+    @override_settings(STRIPE_WEBHOOK_LEASE_SECONDS=600)
+    @mock.patch("billing.tasks.webhook_handler")
+    def test_event_being_processed_is_not_claimed_again(self, webhook_handler):
+        self.claim(seconds_ago=10)
+
+        process_webhook_event(self.webhook_event.pk)
+
+        webhook_handler.assert_not_called()
+        self.webhook_event.refresh_from_db()
+        self.assertEqual(self.webhook_event.status, "processing")
+
+    @override_settings(STRIPE_WEBHOOK_LEASE_SECONDS=600)
+    @mock.patch("billing.tasks.webhook_handler")
+    def test_expired_claim_is_taken_over(self, webhook_handler):
+        self.claim(seconds_ago=601)
+
+        process_webhook_event(self.webhook_event.pk)
+
+        webhook_handler.assert_called_once_with(EVENT)
+        self.webhook_event.refresh_from_db()
+        self.assertEqual(self.webhook_event.status, "processed")
+        self.assertEqual(self.webhook_event.attempts, 2)
+
+    @override_settings(STRIPE_WEBHOOK_LEASE_SECONDS=600)
+    @mock.patch("billing.tasks.process_webhook_event.delay")
+    def test_expired_claims_are_requeued(self, delay):
+        self.claim(seconds_ago=601)
+        WebhookEvent.objects.create(
+            stripe_event_id="evt_456",
+            type=EVENT["type"],
+            payload=EVENT,
+            status="processing",
+            claimed_at=timezone.now(),
+        )
+
+        self.assertEqual(requeue_stale_webhook_events(), 1)
+        delay.assert_called_once_with(self.webhook_event.pk)
+
+
+class SubscriptionDeletedTest(TestCase):
+    def setUp(self):
+        user = User.objects.create(email="test@example.com")
+        StripeCustomer.objects.create(user=user, stripe_customer_id="cus_123")
+
+    def event(self, event_type, created, status):
+        return {
+            "id": f"evt_{created}",
+            "type": event_type,
+            "created": created,
+            "data": {
+                "object": subscription_object(
+                    "sub_123", "cus_123", "price_123", status=status
+                )
+            },
+        }
+
+    def test_older_update_does_not_reactivate_deleted_subscription(self):
+        webhook_handler(self.event("customer.subscription.created", 1000, "active"))
+
+        webhook_handler(self.event("customer.subscription.deleted", 3000, "canceled"))
+        webhook_handler(self.event("customer.subscription.updated", 2000, "active"))
+
+        subscription = Subscription.objects.get(stripe_subscription_id="sub_123")
+        self.assertEqual(subscription.status, "canceled")
+        self.assertEqual(
+            subscription.last_event_at, datetime.fromtimestamp(3000, tz=dt_timezone.utc)
+        )
+
+    def test_unknown_subscription_is_not_created(self):
+        webhook_handler(self.event("customer.subscription.deleted", 3000, "canceled"))
+
+        self.assertFalse(Subscription.objects.exists())
+
+
+@override_settings(
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    MAIL_QUEUE_ENABLED=False,
+    MAIL_BILLING_URL="https://example.com/billing",
+)
+class BillingNoticeTest(TestCase):
+    def setUp(self):
+        user = User.objects.create(email="test@example.com")
+        customer = StripeCustomer.objects.create(
+            user=user, stripe_customer_id="cus_123"
+        )
+        Subscription.objects.create(
+            customer=customer,
+            stripe_subscription_id="sub_123",
+            stripe_price_id="price_123",
+            status="trialing",
+            current_period_end=datetime(2030, 1, 10, tzinfo=dt_timezone.utc),
+            trial_end=datetime(2030, 1, 10, tzinfo=dt_timezone.utc),
+        )
+
+    def test_trial_ending_sends_templated_notice(self):
+        webhook_handler(TRIAL_WILL_END)
+
+        (message,) = mail.outbox
+        self.assertEqual(message.to, ["test@example.com"])
+        self.assertEqual(message.subject, "Your trial ends January 10")
+        self.assertIn("https://example.com/billing", message.body)
+        html, mimetype = message.alternatives[0]
+        self.assertEqual(mimetype, "text/html")
+        self.assertIn("January 10, 2030", html)
+
+    @mock.patch("billing.webhook_handlers.sync_subscription_from_stripe")
+    def test_payment_failed_links_the_invoice(self, sync_from_stripe):
+        webhook_handler(PAYMENT_FAILED)
+
+        (message,) = mail.outbox
+        self.assertEqual(message.subject, "Your payment failed")
+        self.assertIn("https://invoice.stripe.com/i/1", message.body)
+
+    @mock.patch("billing.webhook_handlers.sync_subscription_from_stripe")
+    def test_notices_are_sent_once_per_event(self, sync_from_stripe):
+        for _ in range(2):
+            webhook_handler(TRIAL_WILL_END)
+            webhook_handler(PAYMENT_FAILED)
+
+        self.assertEqual(
+            [message.subject for message in mail.outbox],
+            ["Your trial ends January 10", "Your payment failed"],
+        )
+
+    @mock.patch("billing.webhook_handlers.sync_subscription_from_stripe")
+    def test_failed_notice_is_sent_on_retry(self, sync_from_stripe):
+        for event, name in (
+            (TRIAL_WILL_END, "trial_ending"),
+            (PAYMENT_FAILED, "payment_failed"),
+        ):
+            with self.subTest(name=name):
+                with mock.patch(
+                    "billing.webhook_handlers.send_templated_email",
+                    side_effect=ConnectionError,
+                ), self.assertRaises(ConnectionError):
+                    webhook_handler(event)
+                self.assertFalse(SentNotice.objects.filter(name=name).exists())
+
+                webhook_handler(event)
+
+                self.assertEqual(SentNotice.objects.filter(name=name).count(), 1)
+        self.assertEqual(len(mail.outbox), 2)
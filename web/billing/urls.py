@@ -4,6 +4,7 @@ from .views import (
     cancel_subscription,
     create_checkout_session,
     create_portal_session,
+    price_catalog,
     reactivate_subscription,
     stripe_webhook,
     subscription_status,
@@ -18,6 +19,8 @@ urlpatterns = [
     path("status/", subscription_status, name="status"),
     path("cancel/", cancel_subscription, name="cancel"),
     path("reactivate/", reactivate_subscription, name="reactivate"),
+    # Pricing
+    path("prices/", price_catalog, name="prices"),
     # Webhook
     path("webhook/", stripe_webhook, name="webhook"),
 ]
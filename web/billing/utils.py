@@ -0,0 +1,342 @@
+from datetime import datetime
+from datetime import timezone as dt_timezone
+
+import structlog
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from .cache import cache_entitlement, get_cached_entitlement, invalidate_entitlement
+from .catalog import get_price_catalog
+from .client import get_async_stripe_client, get_stripe_client, stripe_call
+from .models import StripeCustomer, Subscription
+from .realtime import publish_subscription_changed
+
+logger = structlog.get_logger(__name__)
+
+User = get_user_model()
+
+NO_SUBSCRIPTION_STATUS = {
+    "has_active_subscription": False,
+    "status": "none",
+    "is_trialing": False,
+    "current_period_end": None,
+    "cancel_at_period_end": False,
+    "days_remaining": 0,
+    "stripe_price_id": None,
+}
+
+# Fields a webhook subscription payload must carry to be applied without
+# fetching the subscription from Stripe
+SUBSCRIPTION_PAYLOAD_FIELDS = (
+    "id",
+    "customer",
+    "status",
+    "current_period_end",
+    "cancel_at_period_end",
+    "items",
+)
+
+
+def _customer_params(user):
+    return {
+        "email": user.email,
+        "metadata": {
+            "user_id": str(user.id),
+        },
+    }
+
+
+def _customer_options(user):
+    # A fixed idempotency key makes concurrent or retried requests for the
+    # same user return one Stripe customer instead of creating duplicates
+    return {"idempotency_key": f"create-customer-{user.id}"}
+
+
+def get_or_create_stripe_customer(user):
+    """Get or create a Stripe customer for a Django user"""
+    try:
+        # Reuses the customer already cached on the user instance, if any
+        return user.stripe_customer
+    except StripeCustomer.DoesNotExist:
+        # Create customer in Stripe
+        with stripe_call("customers.create"):
+            stripe_customer = get_stripe_client().customers.create(
+                params=_customer_params(user),
+                options=_customer_options(user),
+            )
+
+        # Create customer in database
+        customer = StripeCustomer.objects.create(
+            user=user,
+            stripe_customer_id=stripe_customer.id,
+        )
+
+        logger.info(
+            "Created Stripe customer",
+            stripe_customer_id=stripe_customer.id,
+            user_id=user.id,
+        )
+        return customer
+
+
+async def aget_or_create_stripe_customer(user):
+    """Async version of `get_or_create_stripe_customer` for async views"""
+    try:
+        return await StripeCustomer.objects.aget(user=user)
+    except StripeCustomer.DoesNotExist:
+        # Create customer in Stripe
+        with stripe_call("customers.create"):
+            stripe_customer = await get_async_stripe_client().customers.create_async(
+                params=_customer_params(user),
+                options=_customer_options(user),
+            )
+
+        # Create customer in database
+        customer = await StripeCustomer.objects.acreate(
+            user=user,
+            stripe_customer_id=stripe_customer.id,
+        )
+
+        logger.info(
+            "Created Stripe customer",
+            stripe_customer_id=stripe_customer.id,
+            user_id=user.id,
+        )
+        return customer
+
+
+def get_user_subscription_status(user):
+    """Get detailed subscription status for a user (cached per user)"""
+    if not getattr(user, "is_authenticated", False):
+        return dict(NO_SUBSCRIPTION_STATUS)
+
+    status_info = get_cached_entitlement(user.pk)
+    if status_info is None:
+        status_info = _build_subscription_status(user)
+        cache_entitlement(user.pk, status_info)
+
+    return status_info
+
+
+def _build_subscription_status(user):
+    """Build the subscription status for a user from the database"""
+    try:
+        customer = user.stripe_customer
+        subscription = customer.active_subscription
+
+        if subscription:
+            return {
+                "has_active_subscription": True,
+                "status": subscription.status,
+                "is_trialing": subscription.is_trialing,
+                "current_period_end": subscription.current_period_end.isoformat(),
+                "cancel_at_period_end": subscription.cancel_at_period_end,
+                "days_remaining": subscription.days_until_period_end,
+                "stripe_price_id": subscription.stripe_price_id,
+            }
+    except (AttributeError, StripeCustomer.DoesNotExist):
+        pass
+
+    return dict(NO_SUBSCRIPTION_STATUS)
+
+
+def timestamp_to_datetime(timestamp):
+    """Convert a Stripe unix timestamp to an aware datetime"""
+    if not timestamp:
+        return None
+    return datetime.fromtimestamp(timestamp, tz=dt_timezone.utc)
+
+
+def _is_complete_subscription_payload(stripe_sub):
+    """Check that a subscription payload carries every field we store"""
+    return all(
+        stripe_sub.get(field) is not None for field in SUBSCRIPTION_PAYLOAD_FIELDS
+    ) and bool(stripe_sub["items"].get("data"))
+
+
+def get_stripe_id(value):
+    """Return the id of a Stripe reference that may be expanded into an object"""
+    if value is None or isinstance(value, str):
+        return value
+    return value["id"]
+
+
+def subscription_fields_from_stripe(stripe_sub):
+    """Map a Stripe subscription object to local Subscription field values"""
+    # Extract price ID (handle nested structure)
+    items = stripe_sub["items"]["data"]
+    price_id = items[0]["price"]["id"] if items else None
+
+    return {
+        "stripe_price_id": price_id,
+        "status": stripe_sub["status"],
+        "current_period_end": timestamp_to_datetime(stripe_sub["current_period_end"]),
+        "cancel_at_period_end": stripe_sub["cancel_at_period_end"],
+        "trial_end": timestamp_to_datetime(stripe_sub.get("trial_end")),
+    }
+
+
+def product_fields_from_stripe(stripe_product):
+    """Map a Stripe product object to local Product field values"""
+    return {
+        "name": stripe_product["name"],
+        "description": stripe_product.get("description") or "",
+        "active": stripe_product["active"],
+        "metadata": dict(stripe_product.get("metadata") or {}),
+    }
+
+
+def price_fields_from_stripe(stripe_price):
+    """Map a Stripe price object to local Price field values"""
+    recurring = stripe_price.get("recurring") or {}
+    return {
+        "product_id": get_stripe_id(stripe_price["product"]),
+        "active": stripe_price["active"],
+        "currency": stripe_price["currency"],
+        "unit_amount": stripe_price.get("unit_amount"),
+        "type": stripe_price["type"],
+        "recurring_interval": recurring.get("interval") or "",
+        "recurring_interval_count": recurring.get("interval_count"),
+    }
+
+
+def _upsert_subscription(stripe_sub, event_created_at=None):
+    """Create or update a local subscription from a Stripe subscription object"""
+    customer = StripeCustomer.objects.get(
+        stripe_customer_id=get_stripe_id(stripe_sub["customer"])
+    )
+
+    defaults = {"customer": customer, **subscription_fields_from_stripe(stripe_sub)}
+    if event_created_at:
+        defaults["last_event_at"] = event_created_at
+
+    result = Subscription.objects.update_or_create(
+        stripe_subscription_id=stripe_sub["id"],
+        defaults=defaults,
+    )
+    invalidate_entitlement(customer.user_id)
+    publish_subscription_changed(customer.user_id)
+    return result
+
+
+def sync_subscription_from_stripe(stripe_subscription_id, event_created_at=None):
+    """Sync a subscription from Stripe to our database"""
+    try:
+        with stripe_call("subscriptions.retrieve"):
+            stripe_sub = get_stripe_client().subscriptions.retrieve(
+                stripe_subscription_id
+            )
+        subscription, created = _upsert_subscription(stripe_sub, event_created_at)
+
+        logger.info(
+            "Synced subscription",
+            stripe_subscription_id=stripe_subscription_id,
+            created=created,
+        )
+        return subscription
+
+    except StripeCustomer.DoesNotExist:
+        logger.error(
+            "Customer not found for subscription",
+            stripe_subscription_id=stripe_subscription_id,
+        )
+        raise
+    except Exception as e:
+        logger.error("Error syncing subscription", error=str(e))
+        raise
+
+
+def sync_subscription_from_payload(stripe_sub, event_created):
+    """
+    Sync a subscription from the object embedded in a webhook event
+
+    Avoids the Stripe API round-trip of `sync_subscription_from_stripe`.
+    Events created before the last event applied to the subscription are
+    ignored, so out-of-order deliveries cannot roll back newer state. If the
+    payload is missing fields, the subscription is fetched from Stripe.
+
+    Args:
+        stripe_sub: Subscription object from `event["data"]["object"]`
+        event_created: The event's `created` unix timestamp
+
+    Returns:
+        Subscription: The local subscription (unchanged if the event is stale)
+    """
+    stripe_subscription_id = stripe_sub["id"]
+    event_created_at = timestamp_to_datetime(event_created)
+
+    with transaction.atomic():
+        subscription = (
+            Subscription.objects.select_for_update()
+            .filter(stripe_subscription_id=stripe_subscription_id)
+            .first()
+        )
+
+        if (
+            subscription
+            and subscription.last_event_at
+            and event_created_at
+            and event_created_at < subscription.last_event_at
+        ):
+            logger.info(
+                "Ignoring stale subscription event",
+                stripe_subscription_id=stripe_subscription_id,
+                event_created_at=event_created_at.isoformat(),
+                last_event_at=subscription.last_event_at.isoformat(),
+            )
+            return subscription
+
+        if _is_complete_subscription_payload(stripe_sub):
+            try:
+                subscription, created = _upsert_subscription(
+                    stripe_sub, event_created_at
+                )
+            except StripeCustomer.DoesNotExist:
+                logger.error(
+                    "Customer not found for subscription",
+                    stripe_subscription_id=stripe_subscription_id,
+                )
+                raise
+
+            logger.info(
+                "Synced subscription from event",
+                stripe_subscription_id=stripe_subscription_id,
+                created=created,
+            )
+            return subscription
+
+    logger.info(
+        "Incomplete subscription payload, fetching from Stripe",
+        stripe_subscription_id=stripe_subscription_id,
+    )
+    return sync_subscription_from_stripe(stripe_subscription_id, event_created_at)
+
+
+def check_subscription_access(user, required_status=None):
+    """
+    Check if user has subscription access
+
+    Args:
+        user: Django user object
+        required_status: List of acceptable statuses (default: ["active", "trialing"])
+
+    Returns:
+        bool: True if user has access, False otherwise
+    """
+    if required_status is None:
+        required_status = ["active", "trialing"]
+
+    status_info = get_user_subscription_status(user)
+    return (
+        status_info["has_active_subscription"]
+        and status_info["status"] in required_status
+    )
+
+
+def get_subscription_prices():
+    """
+    Get subscription prices from settings or the cached price catalog
+    Returns a list of price objects with their details
+    """
+    # Prices configured in settings take precedence over the synced catalog
+    return get_price_catalog()["prices"]
@@ -0,0 +1,306 @@
+import json
+
+import stripe
+import structlog
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+
+from .cache import invalidate_entitlement
+from .catalog import get_price_catalog
+from .client import StripeUnavailable, get_async_stripe_client, stripe_call
+from .models import StripeCustomer, WebhookEvent
+from .tasks import process_webhook_event
+from .utils import aget_or_create_stripe_customer, get_user_subscription_status
+
+logger = structlog.get_logger(__name__)
+
+
+def stripe_unavailable_response():
+    """503 returned while the Stripe circuit breaker is open"""
+    response = JsonResponse(
+        {"error": "Billing is temporarily unavailable, please try again later"},
+        status=503,
+    )
+    response["Retry-After"] = str(settings.STRIPE_CIRCUIT_BREAKER_RESET_SECONDS)
+    return response
+
+
+@login_required
+@require_POST
+async def create_checkout_session(request):
+    """Create a Stripe Checkout session for subscription"""
+    try:
+        price_id = request.POST.get("price_id")
+        if not price_id:
+            return JsonResponse({"error": "Price ID is required"}, status=400)
+
+        user = await request.auser()
+        customer = await aget_or_create_stripe_customer(user)
+
+        # Check if user already has an active subscription
+        if await customer.aget_active_subscription():
+            return JsonResponse(
+                {
+                    "error": "You already have an active subscription. Please manage it from the billing portal."
+                },
+                status=400,
+            )
+
+        # Optional: Configure trial period from settings
+        trial_days = getattr(settings, "STRIPE_TRIAL_DAYS", None)
+
+        checkout_params = {
+            "customer": customer.stripe_customer_id,
+            "payment_method_types": ["card"],
+            "line_items": [
+                {
+                    "price": price_id,
+                    "quantity": 1,
+                }
+            ],
+            "mode": "subscription",
+            "success_url": settings.STRIPE_SUCCESS_URL
+            + "?session_id={CHECKOUT_SESSION_ID}",
+            "cancel_url": settings.STRIPE_CANCEL_URL,
+            "metadata": {
+                "user_id": str(user.id),
+            },
+            # Allow promotion codes if configured
+            "allow_promotion_codes": getattr(
+                settings, "STRIPE_ALLOW_PROMO_CODES", False
+            ),
+        }
+
+        if trial_days:
+            checkout_params["subscription_data"] = {"trial_period_days": trial_days}
+
+        with stripe_call("checkout.sessions.create"):
+            checkout_session = (
+                await get_async_stripe_client().checkout.sessions.create_async(
+                    params=checkout_params
+                )
+            )
+
+        return JsonResponse({"checkout_url": checkout_session.url})
+
+    except StripeUnavailable:
+        return stripe_unavailable_response()
+    except stripe.error.StripeError as e:
+        logger.error("Stripe error", error=str(e))
+        return JsonResponse({"error": str(e)}, status=400)
+    except Exception as e:
+        logger.error("Checkout session error", error=str(e))
+        return JsonResponse({"error": "An error occurred"}, status=500)
+
+
+@login_required
+@require_POST
+async def create_portal_session(request):
+    """Create a Stripe Customer Portal session for subscription management"""
+    try:
+        user = await request.auser()
+        customer = await StripeCustomer.objects.aget(user=user)
+
+        # Configure portal based on subscription status
+        configuration_params = {}
+        if hasattr(settings, "STRIPE_PORTAL_CONFIG_ID"):
+            configuration_params["configuration"] = settings.STRIPE_PORTAL_CONFIG_ID
+
+        with stripe_call("billing_portal.sessions.create"):
+            session = (
+                await get_async_stripe_client().billing_portal.sessions.create_async(
+                    params={
+                        "customer": customer.stripe_customer_id,
+                        "return_url": settings.STRIPE_PORTAL_RETURN_URL,
+                        **configuration_params,
+                    }
+                )
+            )
+
+        return JsonResponse({"url": session.url})
+
+    except StripeCustomer.DoesNotExist:
+        return JsonResponse({"error": "No billing information found"}, status=404)
+    except StripeUnavailable:
+        return stripe_unavailable_response()
+    except stripe.error.StripeError as e:
+        logger.error("Stripe error", error=str(e))
+        return JsonResponse({"error": str(e)}, status=400)
+    except Exception as e:
+        logger.error("Portal session error", error=str(e))
+        return JsonResponse({"error": "An error occurred"}, status=500)
+
+
+@login_required
+@require_GET
+async def subscription_status(request):
+    """Get current subscription status for the user"""
+    try:
+        user = await request.auser()
+        status_info = await sync_to_async(get_user_subscription_status)(user)
+        return JsonResponse(status_info)
+    except Exception as e:
+        logger.error("Error getting subscription status", error=str(e))
+        return JsonResponse(
+            {
+                "has_active_subscription": False,
+                "status": "none",
+                "error": "Could not retrieve subscription status",
+            }
+        )
+
+
+@require_GET
+def price_catalog(request):
+    """
+    Get the public price catalog
+
+    Served from the cached catalog snapshot with an ETag and Cache-Control
+    headers so browsers, Next.js and nginx can cache and revalidate it.
+    """
+    catalog = get_price_catalog()
+
+    if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+    if catalog["etag"] in if_none_match or "*" in if_none_match:
+        response = HttpResponseNotModified()
+    else:
+        response = JsonResponse({"prices": catalog["prices"]})
+
+    response["ETag"] = catalog["etag"]
+    patch_cache_control(
+        response,
+        public=True,
+        max_age=settings.STRIPE_PRICE_CATALOG_MAX_AGE,
+        stale_while_revalidate=settings.STRIPE_PRICE_CATALOG_MAX_AGE * 5,
+    )
+    return response
+
+
+@login_required
+@require_POST
+async def cancel_subscription(request):
+    """Cancel subscription at period end"""
+    try:
+        user = await request.auser()
+        customer = await StripeCustomer.objects.aget(user=user)
+        subscription = await customer.aget_active_subscription()
+
+        if not subscription:
+            return JsonResponse({"error": "No active subscription found"}, status=404)
+
+        # Cancel at period end (user keeps access until end of billing period)
+        with stripe_call("subscriptions.update"):
+            await get_async_stripe_client().subscriptions.update_async(
+                subscription.stripe_subscription_id,
+                params={"cancel_at_period_end": True},
+            )
+
+        subscription.cancel_at_period_end = True
+        await subscription.asave()
+        await sync_to_async(invalidate_entitlement)(user.pk)
+
+        return JsonResponse(
+            {
+                "success": True,
+                "message": f"Subscription will be canceled at the end of the current period",
+                "period_end": subscription.current_period_end.isoformat(),
+            }
+        )
+
+    except StripeCustomer.DoesNotExist:
+        return JsonResponse({"error": "No billing information found"}, status=404)
+    except StripeUnavailable:
+        return stripe_unavailable_response()
+    except stripe.error.StripeError as e:
+        logger.error("Stripe error", error=str(e))
+        return JsonResponse({"error": str(e)}, status=400)
+    except Exception as e:
+        logger.error("Cancel subscription error", error=str(e))
+        return JsonResponse({"error": "An error occurred"}, status=500)
+
+
+@login_required
+@require_POST
+async def reactivate_subscription(request):
+    """Reactivate a canceled subscription"""
+    try:
+        user = await request.auser()
+        customer = await StripeCustomer.objects.aget(user=user)
+        subscription = await customer.aget_active_subscription()
+
+        if not subscription or not subscription.cancel_at_period_end:
+            return JsonResponse({"error": "No canceled subscription found"}, status=404)
+
+        # Reactivate subscription
+        with stripe_call("subscriptions.update"):
+            await get_async_stripe_client().subscriptions.update_async(
+                subscription.stripe_subscription_id,
+                params={"cancel_at_period_end": False},
+            )
+
+        subscription.cancel_at_period_end = False
+        await subscription.asave()
+        await sync_to_async(invalidate_entitlement)(user.pk)
+
+        return JsonResponse(
+            {"success": True, "message": "Subscription has been reactivated"}
+        )
+
+    except StripeCustomer.DoesNotExist:
+        return JsonResponse({"error": "No billing information found"}, status=404)
+    except StripeUnavailable:
+        return stripe_unavailable_response()
+    except stripe.error.StripeError as e:
+        logger.error("Stripe error", error=str(e))
+        return JsonResponse({"error": str(e)}, status=400)
+    except Exception as e:
+        logger.error("Reactivate subscription error", error=str(e))
+        return JsonResponse({"error": "An error occurred"}, status=500)
+
+
+@csrf_exempt
+@require_POST
+def stripe_webhook(request):
+    """
+    Handle Stripe webhooks
+
+    Verified events are persisted to the webhook event log and handed to
+    Celery, so the response does not wait on any Stripe API round-trips.
+    """
+    payload = request.body
+    sig_header = request.META.get("HTTP_STRIPE_SIGNATURE")
+
+    try:
+        event = stripe.Webhook.construct_event(
+            payload, sig_header, settings.STRIPE_WEBHOOK_SECRET
+        )
+    except ValueError:
+        logger.error("Invalid webhook payload")
+        return HttpResponse(status=400)
+    except stripe.error.SignatureVerificationError:
+        logger.error("Invalid webhook signature")
+        return HttpResponse(status=400)
+
+    # Persist and enqueue the event
+    try:
+        webhook_event, created = WebhookEvent.objects.get_or_create(
+            stripe_event_id=event["id"],
+            defaults={"type": event["type"], "payload": json.loads(payload)},
+        )
+
+        # Stripe redelivered an event we already handled, or one a worker
+        # is handling right now
+        if not created and webhook_event.status in ("processed", "processing"):
+            return HttpResponse(status=200)
+
+        process_webhook_event.delay(webhook_event.pk)
+        return HttpResponse(status=200)
+    except Exception as e:
+        logger.error("Webhook enqueue error", error=str(e))
+        return HttpResponse(status=500)
@@ -0,0 +1,275 @@
+import structlog
+from django.conf import settings
+from django.db import transaction
+from mail.utils import send_templated_email
+
+from .catalog import schedule_price_catalog_refresh
+from .models import Price, Product, SentNotice
+from .utils import (
+    price_fields_from_stripe,
+    product_fields_from_stripe,
+    sync_subscription_from_payload,
+    sync_subscription_from_stripe,
+)
+
+logger = structlog.get_logger(__name__)
+
+
+def webhook_handler(event):
+    """
+    Subscription-focused webhook handler
+
+    Runs inside the `process_webhook_event` Celery task. Handlers re-raise
+    errors after logging them so the task can retry the event.
+    """
+    logger.info(
+        "Received webhook event", event_type=event["type"], stripe_event_id=event["id"]
+    )
+
+    # Handle subscription lifecycle events
+    event_handlers = {
+        "customer.subscription.created": handle_subscription_created,
+        "customer.subscription.updated": handle_subscription_updated,
+        "customer.subscription.deleted": handle_subscription_deleted,
+        "customer.subscription.trial_will_end": handle_subscription_trial_will_end,
+        "checkout.session.completed": handle_checkout_session_completed,
+        "invoice.payment_succeeded": handle_invoice_payment_succeeded,
+        "invoice.payment_failed": handle_invoice_payment_failed,
+        # Price catalog events
+        "product.created": handle_product_changed,
+        "product.updated": handle_product_changed,
+        "product.deleted": handle_product_changed,
+        "price.created": handle_price_changed,
+        "price.updated": handle_price_changed,
+        "price.deleted": handle_price_changed,
+    }
+
+    handler = event_handlers.get(event["type"])
+    if handler:
+        handler(event)
+    else:
+        logger.info("Unhandled event type", event_type=event["type"])
+
+
+def send_notice_once(event, name, context, user):
+    """
+    Email a notice for a Stripe event unless it was already sent for it
+
+    An event is processed again when a later step failed or its worker died,
+    and must not notify the user twice. The notice is recorded in the same
+    transaction as it is queued, so a failed send is not recorded.
+
+    Returns:
+        bool: Whether the notice was sent
+    """
+    with transaction.atomic():
+        _, created = SentNotice.objects.get_or_create(
+            stripe_event_id=event["id"], defaults={"name": name}
+        )
+        if created:
+            send_templated_email(name, context, [user.email])
+    if not created:
+        logger.info("Notice already sent", stripe_event_id=event["id"], name=name)
+    return created
+
+
+def handle_checkout_session_completed(event):
+    """Handle successful checkout - important for initial subscription creation"""
+    session = event["data"]["object"]
+
+    # Only process subscription checkouts
+    if session.get("mode") != "subscription":
+        return
+
+    logger.info(
+        "Checkout completed",
+        stripe_subscription_id=session.get("subscription"),
+    )
+
+    # Sync the subscription if it was created
+    if session.get("subscription"):
+        try:
+            sync_subscription_from_stripe(session["subscription"])
+        except Exception as e:
+            logger.error("Error syncing subscription from checkout", error=str(e))
+            raise
+
+
+def handle_subscription_created(event):
+    """Handle new subscription creation"""
+    subscription = event["data"]["object"]
+
+    try:
+        sync_subscription_from_payload(subscription, event["created"])
+        logger.info("Subscription created", stripe_subscription_id=subscription["id"])
+    except Exception as e:
+        logger.error("Error handling subscription creation", error=str(e))
+        raise
+
+
+def handle_subscription_updated(event):
+    """Handle subscription updates (status changes, plan changes, etc.)"""
+    subscription = event["data"]["object"]
+
+    try:
+        sync_subscription_from_payload(subscription, event["created"])
+        logger.info(
+            "Subscription updated",
+            stripe_subscription_id=subscription["id"],
+            status=subscription["status"],
+        )
+
+        # Log important status changes
+        if subscription["status"] == "past_due":
+            logger.warning(
+                "Subscription is past due", stripe_subscription_id=subscription["id"]
+            )
+        elif subscription["status"] == "unpaid":
+            logger.warning(
+                "Subscription is unpaid", stripe_subscription_id=subscription["id"]
+            )
+
+    except Exception as e:
+        logger.error("Error handling subscription update", error=str(e))
+        raise
+
+
+def handle_subscription_deleted(event):
+    """Handle subscription cancellation/deletion"""
+    subscription = event["data"]["object"]
+
+    try:
+        from .models import Subscription
+
+        if not Subscription.objects.filter(
+            stripe_subscription_id=subscription["id"]
+        ).exists():
+            logger.warning(
+                "Subscription not found for cancellation",
+                stripe_subscription_id=subscription["id"],
+            )
+            return
+
+        # The payload carries the canceled status; applying it like an update
+        # records the event time, so older updates cannot reactivate it
+        sync_subscription_from_payload(subscription, event["created"])
+        logger.info("Subscription canceled", stripe_subscription_id=subscription["id"])
+
+    except Exception as e:
+        logger.error("Error handling subscription deletion", error=str(e))
+        raise
+
+
+def handle_subscription_trial_will_end(event):
+    """Handle trial ending soon (3 days before by default)"""
+    subscription = event["data"]["object"]
+
+    logger.info("Trial ending soon", stripe_subscription_id=subscription["id"])
+
+    try:
+        from .models import Subscription
+
+        sub = (
+            Subscription.objects.filter(stripe_subscription_id=subscription["id"])
+            .select_related("customer__user")
+            .first()
+        )
+
+        if sub:
+            user = sub.customer.user
+            if send_notice_once(
+                event,
+                "trial_ending",
+                {
+                    "trial_end": sub.trial_end or sub.current_period_end,
+                    "billing_url": settings.MAIL_BILLING_URL,
+                },
+                user,
+            ):
+                logger.info("Trial ending notification sent", user_id=user.pk)
+
+    except Exception as e:
+        logger.error("Error handling trial ending notification", error=str(e))
+        raise
+
+
+def handle_invoice_payment_succeeded(event):
+    """Handle successful payment - ensures subscription stays active"""
+    invoice = event["data"]["object"]
+
+    if not invoice.get("subscription"):
+        return  # Not a subscription invoice
+
+    logger.info("Payment succeeded", stripe_subscription_id=invoice["subscription"])
+
+    try:
+        # Sync subscription to ensure status is correct
+        sync_subscription_from_stripe(invoice["subscription"])
+    except Exception as e:
+        logger.error("Error syncing subscription after payment", error=str(e))
+        raise
+
+
+def handle_invoice_payment_failed(event):
+    """Handle failed payment - subscription may go into past_due state"""
+    invoice = event["data"]["object"]
+
+    if not invoice.get("subscription"):
+        return  # Not a subscription invoice
+
+    logger.warning("Payment failed", stripe_subscription_id=invoice["subscription"])
+
+    try:
+        # Sync subscription to update status
+        sync_subscription_from_stripe(invoice["subscription"])
+
+        from .models import Subscription
+
+        sub = (
+            Subscription.objects.filter(stripe_subscription_id=invoice["subscription"])
+            .select_related("customer__user")
+            .first()
+        )
+
+        if sub:
+            user = sub.customer.user
+            if send_notice_once(
+                event,
+                "payment_failed",
+                {
+                    "invoice_url": invoice.get("hosted_invoice_url"),
+                    "billing_url": settings.MAIL_BILLING_URL,
+                },
+                user,
+            ):
+                logger.warning("Payment failed notification sent", user_id=user.pk)
+
+    except Exception as e:
+        logger.error("Error handling payment failure", error=str(e))
+        raise
+
+
+def handle_product_changed(event):
+    """Keep the local product catalog in sync"""
+    product = event["data"]["object"]
+
+    fields = product_fields_from_stripe(product)
+    if event["type"] == "product.deleted":
+        fields["active"] = False
+
+    Product.objects.update_or_create(stripe_product_id=product["id"], defaults=fields)
+    schedule_price_catalog_refresh()
+    logger.info("Product synced", stripe_product_id=product["id"], type=event["type"])
+
+
+def handle_price_changed(event):
+    """Keep the local price catalog in sync"""
+    price = event["data"]["object"]
+
+    fields = price_fields_from_stripe(price)
+    if event["type"] == "price.deleted":
+        fields["active"] = False
+
+    Price.objects.update_or_create(stripe_price_id=price["id"], defaults=fields)
+    schedule_price_catalog_refresh()
+    logger.info("Price synced", stripe_price_id=price["id"], type=event["type"])
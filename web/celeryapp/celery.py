@@ -7,6 +7,12 @@ app = Celery("web")
 
 app.config_from_object(celery_config)
 
+# Discover tasks.py modules in installed Django apps
+app.autodiscover_tasks()
+
+# Task metrics and the worker metrics server
+from . import metrics_handlers  # noqa: E402, F401
+
 # Import Sentry handlers if Sentry is configured
 try:
     from django.conf import settings
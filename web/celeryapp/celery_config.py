@@ -1,13 +1,19 @@
 import os
 
-from kombu import Exchange
+from kombu import Exchange, Queue
 
 REDIS_PASSWORD = os.environ.get("REDIS_PASSWORD")
 REDIS_HOST = os.environ.get("REDIS_HOST", "redis")
+REDIS_PORT = os.environ.get("REDIS_PORT", "6379")
+# Kept apart from the Django cache and session databases (settings.components.redis)
+REDIS_BROKER_DB = os.environ.get("REDIS_BROKER_DB", "0")
+REDIS_REDBEAT_DB = os.environ.get("REDIS_REDBEAT_DB", "1")
 
 
-broker_url = f"redis://:{REDIS_PASSWORD}@{REDIS_HOST}:6379/0"
-result_backend = f"redis://:{REDIS_PASSWORD}@{REDIS_HOST}:6379/0"
+broker_url = f"redis://:{REDIS_PASSWORD}@{REDIS_HOST}:{REDIS_PORT}/{REDIS_BROKER_DB}"
+result_backend = (
+    f"redis://:{REDIS_PASSWORD}@{REDIS_HOST}:{REDIS_PORT}/{REDIS_BROKER_DB}"
+)
 result_expires = 60 * 60 * 24  # 24 hours
 
 task_default_queue = "default"
@@ -15,11 +21,81 @@ task_default_exchange_type = "topic"
 task_default_routing_key = "default"
 task_default_priority = 5
 
+default_exchange = Exchange("default", type="topic")
+
+# One queue per kind of work, so slow Stripe syncs and SMTP sends cannot hold
+# up webhook processing. In production each queue has its own worker pool
+# (helm celeryWorker.pools); a worker started without -Q consumes them all.
+task_queues = (
+    Queue("webhooks", default_exchange, routing_key="webhooks"),
+    Queue("billing-sync", default_exchange, routing_key="billing-sync"),
+    Queue("mail", default_exchange, routing_key="mail"),
+    Queue("default", default_exchange, routing_key="default"),
+)
+
+# Priorities only order tasks within a queue, which matters for workers that
+# consume several queues. On the Redis transport 0 is the highest priority.
+task_routes = {
+    "billing.tasks.process_webhook_event": {
+        "queue": "webhooks",
+        "routing_key": "webhooks",
+        "priority": 0,
+    },
+    "billing.tasks.requeue_stale_webhook_events": {
+        "queue": "webhooks",
+        "routing_key": "webhooks",
+        "priority": 3,
+    },
+    "billing.tasks.sync_price_catalog": {
+        "queue": "billing-sync",
+        "routing_key": "billing-sync",
+        "priority": 9,
+    },
+    "mail.tasks.*": {"queue": "mail", "routing_key": "mail", "priority": 3},
+}
+
+# Short tasks are idempotent and acknowledged after they finish, so a worker
+# lost mid-task has its task redelivered. Long syncs are acknowledged when
+# they start instead: a run outliving the broker visibility timeout would
+# otherwise be delivered twice, and the next scheduled run catches up anyway.
+task_acks_late = True
+task_reject_on_worker_lost = True
+task_annotations = {
+    "billing.tasks.sync_price_catalog": {"acks_late": False},
+}
+
+# Messages reserved per worker process. 1 keeps long tasks from queueing
+# behind each other on a busy process; pools of short tasks raise it with
+# --prefetch-multiplier.
+worker_prefetch_multiplier = int(
+    os.environ.get("CELERY_WORKER_PREFETCH_MULTIPLIER", "1")
+)
+
 broker_connection_retry_on_startup = True
 broker_connection_max_retries = 10
 
-redbeat_redis_url = f"redis://:{REDIS_PASSWORD}@{REDIS_HOST}:6379/1"
-
-default_exchange = Exchange("default", type="topic")
+beat_schedule = {
+    "requeue-stale-webhook-events": {
+        "task": "billing.tasks.requeue_stale_webhook_events",
+        "schedule": 60 * 5,  # every 5 minutes
+    },
+    "sync-price-catalog": {
+        "task": "billing.tasks.sync_price_catalog",
+        "schedule": 60 * 60,  # hourly
+    },
+    "clear-expired-sessions": {
+        "task": "core.tasks.clear_expired_sessions",
+        "schedule": int(
+            os.environ.get("SESSION_CLEANUP_INTERVAL_SECONDS", 60 * 60 * 24)
+        ),  # daily
+    },
+    # Picks up mail left in the outbox if a scheduled flush was lost
+    "flush-mail-outbox": {
+        "task": "mail.tasks.flush_mail_outbox",
+        "schedule": 60,
+    },
+}
 
-task_queues = ()
+redbeat_redis_url = (
+    f"redis://:{REDIS_PASSWORD}@{REDIS_HOST}:{REDIS_PORT}/{REDIS_REDBEAT_DB}"
+)
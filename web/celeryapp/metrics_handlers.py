@@ -0,0 +1,102 @@
+"""
+Prometheus handlers for Celery workers.
+
+Task signals feed the task runtime, queue wait, retry and failure metrics in
+`metrics.collectors`. Workers do not serve HTTP, so the main worker process
+exposes the metrics of all its pool processes on `CELERY_METRICS_PORT`. Pool
+processes share `PROMETHEUS_MULTIPROC_DIR` with it, see `metrics.multiprocess`.
+"""
+
+import os
+import time
+
+import structlog
+from celery import signals
+from django.conf import settings
+
+logger = structlog.get_logger(__name__)
+
+# Header carrying the publish time, used to measure queue wait
+PUBLISHED_AT_HEADER = "published_at"
+
+# Start times of the tasks running in this process, by task id
+_task_started_at = {}
+
+
+@signals.before_task_publish.connect
+def stamp_published_at(headers=None, **kwargs):
+    """Record when a task was published."""
+    if headers is not None:
+        headers.setdefault(PUBLISHED_AT_HEADER, time.time())
+
+
+@signals.task_prerun.connect
+def metrics_task_prerun(sender=None, task_id=None, task=None, **kwargs):
+    """Start timing a task and record how long it waited in its queue."""
+    from metrics.collectors import track_task_queue_wait
+
+    _task_started_at[task_id] = time.perf_counter()
+
+    published_at = getattr(task.request, PUBLISHED_AT_HEADER, None)
+    if published_at:
+        delivery_info = task.request.delivery_info or {}
+        track_task_queue_wait(
+            task.name,
+            delivery_info.get("routing_key") or "unknown",
+            max(time.time() - float(published_at), 0),
+        )
+
+
+@signals.task_postrun.connect
+def metrics_task_postrun(sender=None, task_id=None, task=None, state=None, **kwargs):
+    """Record a task's runtime by final state."""
+    from metrics.collectors import track_task_runtime
+
+    started_at = _task_started_at.pop(task_id, None)
+    if started_at is not None:
+        track_task_runtime(
+            task.name, state or "UNKNOWN", time.perf_counter() - started_at
+        )
+
+
+@signals.task_failure.connect
+def metrics_task_failure(sender=None, exception=None, **kwargs):
+    """Count task failures by exception type."""
+    from metrics.collectors import track_task_failure
+
+    track_task_failure(sender.name, type(exception).__name__)
+
+
+@signals.task_retry.connect
+def metrics_task_retry(sender=None, **kwargs):
+    """Count task retries."""
+    from metrics.collectors import track_task_retry
+
+    track_task_retry(sender.name)
+
+
+@signals.worker_ready.connect
+def start_metrics_server(sender=None, **kwargs):
+    """Serve worker metrics from the main worker process."""
+    from metrics.multiprocess import get_registry, is_multiprocess
+    from prometheus_client import REGISTRY, start_http_server
+
+    if not is_multiprocess():
+        logger.warning(
+            "PROMETHEUS_MULTIPROC_DIR is not set, "
+            "metrics of pool processes will not be exported"
+        )
+
+    registry = get_registry() if is_multiprocess() else REGISTRY
+    start_http_server(settings.CELERY_METRICS_PORT, registry=registry)
+    logger.info("Celery metrics server started", port=settings.CELERY_METRICS_PORT)
+
+
+@signals.worker_process_shutdown.connect
+def mark_metrics_process_dead(pid=None, **kwargs):
+    """Drop the live gauges of a pool process that is shutting down."""
+    from metrics.multiprocess import is_multiprocess
+    from prometheus_client.multiprocess import mark_process_dead
+
+    if is_multiprocess():
+        mark_process_dead(pid or os.getpid())
@@ -0,0 +1,100 @@
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from celeryapp import metrics_handlers
+from celeryapp.celery import app
+from django.test import SimpleTestCase
+from metrics.collectors import (
+    CeleryQueueLengthCollector,
+    DatabasePoolCollector,
+    celery_task_queue_wait,
+    celery_task_runtime,
+)
+from prometheus_client import CollectorRegistry
+
+
+def fake_task(**request):
+    return SimpleNamespace(
+        name="billing.tasks.process_webhook_event",
+        request=SimpleNamespace(delivery_info={"routing_key": "webhooks"}, **request),
+    )
+
+
+class TaskMetricsHandlersTest(SimpleTestCase):
+    def test_publish_time_is_stamped(self):
+        headers = {}
+
+        metrics_handlers.stamp_published_at(headers=headers)
+
+        self.assertAlmostEqual(headers["published_at"], time.time(), delta=1)
+
+    def test_queue_wait_and_runtime_are_observed(self):
+        task = fake_task(published_at=time.time() - 2)
+        wait = celery_task_queue_wait.labels(task=task.name, queue="webhooks")
+        runtime = celery_task_runtime.labels(task=task.name, state="SUCCESS")
+        wait_sum, runtime_sum = wait._sum.get(), runtime._sum.get()
+
+        metrics_handlers.metrics_task_prerun(task_id="1", task=task)
+        metrics_handlers.metrics_task_postrun(task_id="1", task=task, state="SUCCESS")
+
+        self.assertGreaterEqual(wait._sum.get() - wait_sum, 2)
+        self.assertGreater(runtime._sum.get(), runtime_sum)
+        self.assertNotIn("1", metrics_handlers._task_started_at)
+
+
+class CeleryQueueLengthCollectorTest(SimpleTestCase):
+    @mock.patch("celeryapp.celery.app.amqp")
+    def test_sums_priority_lists_and_reports_mail_outbox(self, amqp):
+        amqp.queues = {"default": None, "webhooks": None}
+        collector = CeleryQueueLengthCollector()
+        collector._client = mock.Mock()
+        pipeline = collector._client.pipeline.return_value
+        pipeline.execute.return_value = [1, 2, 0, 0, 5, 0, 0, 1, 4]
+        registry = CollectorRegistry()
+        registry.register(collector)
+
+        self.assertEqual(
+            registry.get_sample_value("celery_queue_length", {"queue": "default"}), 3
+        )
+        self.assertEqual(
+            registry.get_sample_value("celery_queue_length", {"queue": "webhooks"}), 6
+        )
+        pipeline.llen.assert_any_call("webhooks\x06\x169")
+        self.assertEqual(registry.get_sample_value("mail_outbox_length"), 4)
+
+    def test_registering_does_not_collect(self):
+        for collector in (CeleryQueueLengthCollector(), DatabasePoolCollector()):
+            with self.subTest(collector=type(collector).__name__):
+                with mock.patch.object(collector, "collect") as collect:
+                    CollectorRegistry(auto_describe=True).register(collector)
+
+                collect.assert_not_called()
+
+
+class TaskRoutingTest(SimpleTestCase):
+    def route(self, task_name):
+        return app.amqp.router.route({}, task_name)
+
+    def test_tasks_are_routed_to_their_queues(self):
+        routes = {
+            "billing.tasks.process_webhook_event": "webhooks",
+            "billing.tasks.sync_price_catalog": "billing-sync",
+            "mail.tasks.flush_mail_outbox": "mail",
+            "core.tasks.clear_expired_sessions": "default",
+        }
+        for task_name, queue in routes.items():
+            with self.subTest(task=task_name):
+                self.assertEqual(self.route(task_name)["queue"].name, queue)
+
+    def test_webhooks_have_the_highest_priority(self):
+        self.assertEqual(
+            self.route("billing.tasks.process_webhook_event")["priority"], 0
+        )
+
+    def test_long_syncs_are_acknowledged_early(self):
+        app.loader.import_default_modules()
+
+        self.assertFalse(app.tasks["billing.tasks.sync_price_catalog"].acks_late)
+        self.assertTrue(app.tasks["billing.tasks.process_webhook_event"].acks_late)
+        self.assertTrue(app.tasks["mail.tasks.flush_mail_outbox"].acks_late)
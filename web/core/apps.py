@@ -1,4 +1,8 @@
+import structlog
 from django.apps import AppConfig
+from django.conf import settings
+
+logger = structlog.get_logger(__name__)
 
 
 class CoreConfig(AppConfig):
@@ -16,3 +20,13 @@ class CoreConfig(AppConfig):
 ╚══════╝ ╚═════╝ ╚══════╝     ╚═════╝    ╚═╝       ╚═╝  ╚═══╝ ╚═════╝   ╚═══╝
         """
         )
+
+        if settings.ENVIRONMENT != "dev":
+            from .sentry import configure_sentry
+
+            configure_sentry()
+        else:
+            logger.info(
+                "Sentry initialization skipped",
+                environment=settings.ENVIRONMENT,
+            )
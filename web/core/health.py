@@ -0,0 +1,130 @@
+"""
+Dependency checks for the readiness endpoint.
+
+Postgres, Redis and the Celery broker are checked in parallel, each bounded by
+`HEALTHCHECK_TIMEOUT`. Results are cached in process memory (not in Redis,
+which is one of the dependencies) for `HEALTHCHECK_CACHE_SECONDS`, so frequent
+probes from Kubernetes and nginx cost at most one round of checks per window.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
+
+import structlog
+from django.conf import settings
+from django.db import connections
+from metrics.collectors import update_dependency_health
+
+logger = structlog.get_logger(__name__)
+
+
+def check_database():
+    connection = connections["default"]
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+    finally:
+        # Check threads outlive requests, so nothing else closes this
+        connection.close()
+
+
+def check_redis():
+    from django_redis import get_redis_connection
+
+    get_redis_connection("default").ping()
+
+
+def check_broker():
+    from celeryapp.celery import app
+
+    with app.connection_for_write() as connection:
+        connection.ensure_connection(
+            max_retries=1, timeout=settings.HEALTHCHECK_TIMEOUT
+        )
+
+
+CHECKS = {
+    "database": check_database,
+    "redis": check_redis,
+    "broker": check_broker,
+}
+
+# Spare workers so a hung check cannot block the next round
+_executor = ThreadPoolExecutor(
+    max_workers=len(CHECKS) * 2, thread_name_prefix="healthcheck"
+)
+_lock = threading.Lock()
+_cached_result = None
+_cached_until = 0.0
+
+
+def _timed(check):
+    start = time.perf_counter()
+    check()
+    return time.perf_counter() - start
+
+
+def run_checks():
+    """
+    Run every dependency check in parallel
+
+    Returns:
+        dict: `{"healthy": bool, "latency_ms": float, "error": str}` per
+            dependency (`error` only when unhealthy)
+    """
+    start = time.perf_counter()
+    futures = {name: _executor.submit(_timed, check) for name, check in CHECKS.items()}
+    wait_futures(futures.values(), timeout=settings.HEALTHCHECK_TIMEOUT)
+
+    results = {}
+    for name, future in futures.items():
+        if not future.done():
+            latency = time.perf_counter() - start
+            result = {"healthy": False, "error": "timeout"}
+        elif future.exception() is not None:
+            latency = time.perf_counter() - start
+            result = {"healthy": False, "error": str(future.exception())}
+        else:
+            latency = future.result()
+            result = {"healthy": True}
+
+        result["latency_ms"] = round(latency * 1000, 2)
+        results[name] = result
+        update_dependency_health(name, result["healthy"], latency)
+
+        if not result["healthy"]:
+            logger.error(
+                "Dependency check failed", dependency=name, error=result["error"]
+            )
+
+    return results
+
+
+def get_readiness():
+    """
+    Return cached dependency check results, re-running the checks once the
+    cache has expired
+
+    Returns:
+        tuple: (results, cached)
+    """
+    global _cached_result, _cached_until
+
+    with _lock:
+        if _cached_result is not None and time.monotonic() < _cached_until:
+            return _cached_result, True
+
+        # Concurrent probes wait here for one round of checks
+        _cached_result = run_checks()
+        _cached_until = time.monotonic() + settings.HEALTHCHECK_CACHE_SECONDS
+        return _cached_result, False
+
+
+def clear_readiness_cache():
+    global _cached_result, _cached_until
+
+    with _lock:
+        _cached_result = None
+        _cached_until = 0.0
@@ -0,0 +1,75 @@
+"""
+Log rendering and output.
+
+Records are rendered to JSON with orjson and written by a `QueueListener` on a
+background thread. Calling a logger only runs the structlog processors and
+puts the record on a queue, so request handlers and the ASGI event loop never
+wait on rendering or on a slow stdout pipe.
+
+This module is imported by the settings, before Django is set up, so it must
+not import anything from Django.
+"""
+
+import copy
+import logging
+import os
+import queue
+import weakref
+from logging.handlers import QueueHandler, QueueListener
+
+import orjson
+
+
+def orjson_dumps(obj, default=None, **kwargs):
+    """`JSONRenderer` serializer returning `str`, as log formatters must"""
+    return orjson.dumps(obj, default=default or str).decode()
+
+
+class BackgroundStreamHandler(QueueHandler):
+    """
+    Write records to a stream from a background thread
+
+    Use it like a `StreamHandler`: the formatter it is given is applied by the
+    listener thread. structlog event dicts are passed through unrendered; the
+    arguments of other records are merged into the message first, since they
+    could change once the logging call has returned.
+    """
+
+    def __init__(self, stream=None):
+        self.target = logging.StreamHandler(stream)
+        super().__init__(queue.SimpleQueue())
+        self.listener = QueueListener(self.queue, self.target)
+        self.listener.start()
+        self.stopped = False
+        # Threads do not survive fork(), so forked workers need their own
+        restart = weakref.WeakMethod(self._restart_listener)
+        os.register_at_fork(after_in_child=lambda: restart() and restart()())
+
+    def _restart_listener(self):
+        if self.stopped:
+            return
+        self.queue = queue.SimpleQueue()
+        self.listener = QueueListener(self.queue, self.target)
+        self.listener.start()
+
+    def setFormatter(self, fmt):
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        if not isinstance(record.msg, dict):
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def flush(self):
+        # Records still queued are written when the listener stops
+        self.target.flush()
+
+    def close(self):
+        """Write the queued records, then stop the listener thread"""
+        if not self.stopped:
+            self.stopped = True
+            self.listener.stop()
+        self.target.close()
+        super().close()
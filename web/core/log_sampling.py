@@ -0,0 +1,133 @@
+"""
+Sampling and duplicate suppression of structlog events.
+
+`LogSampler` runs early in the structlog processor chain and drops records
+before they are rendered or handed to the stdlib handlers (and so before
+Sentry turns them into breadcrumbs):
+
+- Events with a sample rate are kept with that probability. Kept records
+  carry `sample_rate`, so counts can be scaled back up.
+- Records identical to one logged less than `dedup_window` seconds ago are
+  dropped. The next identical record after the window carries
+  `duplicates_suppressed` with the number dropped in between.
+- Records at `always_keep_level` and above are never dropped.
+
+The counts of kept and dropped records are exported as
+`django_log_records_total`. This module is imported by the settings, so the
+metrics are only imported once the apps are ready; records logged during
+startup are not counted.
+"""
+
+import logging
+import random
+import threading
+import time
+
+import structlog
+from django.apps import apps
+
+# Duplicate keys remembered before the expired ones are forgotten
+DEDUP_MAX_KEYS = 10000
+
+
+def parse_sample_rates(value):
+    """
+    Parse `"<event>=<rate>,..."` into a dict of event to kept fraction
+
+    Example: "Received webhook event=0.1,Payment succeeded=0.5"
+    """
+    rates = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        event, _, rate = item.rpartition("=")
+        rate = float(rate)
+        if not event.strip() or not 0 <= rate <= 1:
+            raise ValueError(f"Invalid log sample rate: {item!r}")
+        rates[event.strip()] = rate
+    return rates
+
+
+class LogSampler:
+    """
+    structlog processor sampling and collapsing high-volume events
+
+    Must run after `add_log_level`.
+
+    Args:
+        sample_rates: Fraction of records kept, per event
+        dedup_window: Seconds in which identical records are collapsed,
+            0 to disable
+        always_keep_level: Records at this level and above are always kept
+    """
+
+    def __init__(self, sample_rates=None, dedup_window=0, always_keep_level="WARNING"):
+        self.sample_rates = sample_rates or {}
+        self.dedup_window = dedup_window
+        self.always_keep_level = logging.getLevelName(always_keep_level.upper())
+        self._seen = {}
+        self._lock = threading.Lock()
+        self._track_record = None
+
+    def __call__(self, logger, method_name, event_dict):
+        level = event_dict.get("level", method_name)
+        if logging.getLevelName(level.upper()) >= self.always_keep_level:
+            self.track(level, "kept")
+            return event_dict
+
+        event = event_dict.get("event")
+        rate = self.sample_rates.get(event) if isinstance(event, str) else None
+        if rate is not None:
+            if random.random() >= rate:
+                self.track(level, "sampled")
+                raise structlog.DropEvent
+            event_dict["sample_rate"] = rate
+
+        if self.dedup_window and self.is_duplicate(event_dict):
+            self.track(level, "duplicate")
+            raise structlog.DropEvent
+
+        self.track(level, "kept")
+        return event_dict
+
+    def track(self, level, outcome):
+        if self._track_record is None:
+            if not apps.ready:
+                return
+            from metrics.collectors import track_log_record
+
+            self._track_record = track_log_record
+        self._track_record(level, outcome)
+
+    def is_duplicate(self, event_dict):
+        """
+        Whether an identical record was kept within the window
+
+        Otherwise the record starts a new window, and gets the number of
+        duplicates dropped in the previous one.
+        """
+        key = tuple(sorted((name, repr(value)) for name, value in event_dict.items()))
+        now = time.monotonic()
+        with self._lock:
+            seen = self._seen.get(key)
+            if seen is not None and now - seen[0] < self.dedup_window:
+                seen[1] += 1
+                return True
+
+            if seen is None and len(self._seen) >= DEDUP_MAX_KEYS:
+                self._forget_expired(now)
+            self._seen[key] = [now, 0]
+
+        if seen is not None and seen[1]:
+            event_dict["duplicates_suppressed"] = seen[1]
+        return False
+
+    def _forget_expired(self, now):
+        # Duplicates dropped in an expired window are no longer reported
+        self._seen = {
+            key: seen
+            for key, seen in self._seen.items()
+            if now - seen[0] < self.dedup_window
+        }
+        if len(self._seen) >= DEDUP_MAX_KEYS:
+            self._seen.clear()
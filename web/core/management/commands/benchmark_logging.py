@@ -0,0 +1,130 @@
+import logging
+import os
+import time
+
+import structlog
+from core.log_pipeline import BackgroundStreamHandler, orjson_dumps
+from django.core.management.base import BaseCommand
+from settings.components.logging_settings import FOREIGN_PRE_CHAIN
+
+EVENT_TYPE = "customer.subscription.updated"
+EVENT_ID = "evt_1PXrdPLkdIwHu7ixIqTQkUjg"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the cost of a log call: filtered calls with f-strings and "
+        "key-value events, and emitted calls through the synchronous stdlib "
+        "json pipeline and the orjson background pipeline"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=20000,
+            help="Log calls per measurement (default: 20000)",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Measurements per scenario, the fastest is reported (default: 5)",
+        )
+
+    def handle(self, *args, **options):
+        iterations, repeat = options["iterations"], options["repeat"]
+        self.stdout.write(f"Per log call, best of {repeat} x {iterations} calls")
+
+        # Below the level: the f-string is still built, the event is not
+        for label, style in (
+            ("filtered, f-string", "fstring"),
+            ("filtered, key-value", "kv"),
+        ):
+            seconds = min(
+                self.measure(logging.StreamHandler, style, iterations, level="debug")
+                for _ in range(repeat)
+            )
+            self.report(label, seconds / iterations)
+
+        for label, handler_class, renderer in (
+            ("sync json + StreamHandler", logging.StreamHandler, None),
+            ("orjson + background handler", BackgroundStreamHandler, orjson_dumps),
+        ):
+            runs = [
+                self.measure(handler_class, "kv", iterations, renderer=renderer)
+                for _ in range(repeat)
+            ]
+            self.report(label, min(runs) / iterations)
+
+        # Rendering still costs CPU on the listener thread, so also time the
+        # calls until the listener has written everything
+        drained = min(
+            self.measure(
+                BackgroundStreamHandler,
+                "kv",
+                iterations,
+                renderer=orjson_dumps,
+                drain=True,
+            )
+            for _ in range(repeat)
+        )
+        self.report("orjson + background, drained", drained / iterations)
+
+    def build_logger(self, handler, renderer):
+        name = f"benchmark_logging.{id(handler)}"
+        stdlib_logger = logging.getLogger(name)
+        stdlib_logger.handlers = [handler]
+        stdlib_logger.propagate = False
+        stdlib_logger.setLevel(logging.INFO)
+
+        json_renderer = (
+            structlog.processors.JSONRenderer(serializer=renderer)
+            if renderer
+            else structlog.processors.JSONRenderer()
+        )
+        handler.setFormatter(
+            structlog.stdlib.ProcessorFormatter(
+                processor=json_renderer, foreign_pre_chain=FOREIGN_PRE_CHAIN
+            )
+        )
+        return structlog.wrap_logger(
+            stdlib_logger,
+            processors=structlog.get_config()["processors"],
+            wrapper_class=structlog.stdlib.BoundLogger,
+        )
+
+    def measure(
+        self, handler_class, style, iterations, level="info", renderer=None, drain=False
+    ):
+        """Seconds for `iterations` log calls to /dev/null"""
+        with open(os.devnull, "w") as stream:
+            handler = handler_class(stream)
+            logger = self.build_logger(handler, renderer)
+            log = getattr(logger, level)
+            if isinstance(handler, BackgroundStreamHandler) and not drain:
+                # Time only what the caller pays; records are written afterwards
+                handler.listener.stop()
+
+            start = time.perf_counter()
+            if style == "fstring":
+                for _ in range(iterations):
+                    log(f"Received webhook event: {EVENT_TYPE} - {EVENT_ID}")
+            else:
+                for _ in range(iterations):
+                    log(
+                        "Received webhook event",
+                        event_type=EVENT_TYPE,
+                        stripe_event_id=EVENT_ID,
+                    )
+            if drain:
+                handler.close()
+            elapsed = time.perf_counter() - start
+
+            if isinstance(handler, BackgroundStreamHandler) and not drain:
+                handler.listener.start()
+            handler.close()
+        return elapsed
+
+    def report(self, label, seconds):
+        self.stdout.write(f"  {label:<34} {seconds * 1_000_000:8.2f} µs")
@@ -0,0 +1,82 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+from types import ModuleType
+
+import settings as settings_module
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from settings.utils import flatten_module_attributes
+
+COLD_START = """
+import time
+start = time.perf_counter()
+import settings
+imported = time.perf_counter()
+import django
+django.setup()
+print(imported - start, time.perf_counter() - imported)
+"""
+
+
+class Command(BaseCommand):
+    help = "Measure settings import, flattening and attribute access cost"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--runs",
+            type=int,
+            default=5,
+            help="Cold start runs in fresh interpreters (default: 5)",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=1000000,
+            help="Attribute lookups per measurement (default: 1000000)",
+        )
+
+    def handle(self, *args, **options):
+        self.cold_start(options["runs"])
+        self.flatten()
+        self.attribute_access(options["iterations"])
+
+    def cold_start(self, runs):
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": "settings"}
+        imports, setups = [], []
+        for _ in range(runs):
+            output = subprocess.run(
+                [sys.executable, "-c", COLD_START],
+                env=env,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.split()
+            imports.append(float(output[-2]))
+            setups.append(float(output[-1]))
+
+        self.report("import settings", statistics.median(imports), "ms")
+        self.report("django.setup()", statistics.median(setups), "ms")
+
+    def flatten(self):
+        module = ModuleType("settings_benchmark")
+        start = time.perf_counter()
+        flatten_module_attributes(
+            module=module, imports=settings_module.component_modules
+        )
+        self.report("flatten components", time.perf_counter() - start, "ms")
+
+    def attribute_access(self, iterations):
+        for label, obj in (
+            ("settings.DEBUG", settings_module),
+            ("django.conf.settings.DEBUG", settings),
+        ):
+            duration = timeit.timeit(lambda: obj.DEBUG, number=iterations)
+            self.report(label, duration / iterations, "ns")
+
+    def report(self, label, seconds, unit):
+        scale = {"ms": 1_000, "ns": 1_000_000_000}[unit]
+        self.stdout.write(f"{label}: {seconds * scale:.2f} {unit}")
@@ -0,0 +1,159 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand
+
+# Runs in a fresh interpreter: times settings, then the import, models and
+# ready() phases of every app during django.setup()
+PROFILE_SCRIPT = """
+import json
+import sys
+import time
+
+start = time.perf_counter()
+
+from django.apps import AppConfig
+from django.conf import settings
+
+settings.INSTALLED_APPS
+settings_loaded = time.perf_counter()
+
+apps = {}
+
+def timed(phase, app_name, func, *args):
+    phase_start = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        timings = apps.setdefault(app_name, {"import": 0, "models": 0, "ready": 0})
+        timings[phase] += time.perf_counter() - phase_start
+
+create = AppConfig.create.__func__
+
+def timed_create(cls, entry):
+    app_config = timed("import", entry, create, cls, entry)
+    apps[app_config.name] = apps.pop(entry)
+
+    ready = app_config.ready
+    app_config.ready = lambda: timed("ready", app_config.name, ready)
+    import_models = app_config.import_models
+    app_config.import_models = lambda: timed(
+        "models", app_config.name, import_models
+    )
+    return app_config
+
+AppConfig.create = classmethod(timed_create)
+
+import django
+
+django.setup()
+setup_done = time.perf_counter()
+
+celery = 0
+if sys.argv[1] == "celery":
+    from celeryapp.celery import app
+
+    app.loader.import_default_modules()
+    celery = time.perf_counter() - setup_done
+
+print(json.dumps({
+    "settings": settings_loaded - start,
+    "setup": setup_done - settings_loaded,
+    "celery": celery,
+    "total": time.perf_counter() - start,
+    "apps": apps,
+}))
+"""
+
+
+class Command(BaseCommand):
+    help = "Profile process startup: settings, per-app import/models/ready() and slowest imports"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--target",
+            choices=["django", "celery"],
+            default="django",
+            help="Profile a Django process, or a Celery worker including task "
+            "discovery (default: django)",
+        )
+        parser.add_argument(
+            "--runs",
+            type=int,
+            default=3,
+            help="Fresh interpreter runs; the fastest is reported (default: 3)",
+        )
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=15,
+            help="Number of slowest imports to list (default: 15)",
+        )
+
+    def handle(self, *args, **options):
+        env = {
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": os.environ.get(
+                "DJANGO_SETTINGS_MODULE", "settings"
+            ),
+        }
+
+        runs = [
+            self.run_profile(env, options["target"]) for _ in range(options["runs"])
+        ]
+        profile, import_times = min(runs, key=lambda run: run[0]["total"])
+
+        self.stdout.write(f"Startup profile ({options['target']}, best of {len(runs)})")
+        self.write_row("settings", profile["settings"])
+        self.write_row("django.setup()", profile["setup"])
+        if options["target"] == "celery":
+            self.write_row("celery task discovery", profile["celery"])
+        self.write_row("total", profile["total"])
+
+        self.stdout.write("\nPer app (import / models / ready)")
+        apps = sorted(
+            profile["apps"].items(),
+            key=lambda item: sum(item[1].values()),
+            reverse=True,
+        )
+        for name, timings in apps:
+            self.stdout.write(
+                f"  {name:<40} {timings['import'] * 1000:8.1f} "
+                f"{timings['models'] * 1000:8.1f} {timings['ready'] * 1000:8.1f} ms"
+            )
+
+        self.stdout.write(f"\nSlowest imports (cumulative, top {options['top']})")
+        for module, cumulative in import_times[: options["top"]]:
+            self.write_row(f"  {module}", cumulative)
+
+    def run_profile(self, env, target):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", PROFILE_SCRIPT, target],
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode:
+            self.stderr.write(result.stderr[-2000:])
+            raise SystemExit(result.returncode)
+
+        profile = json.loads(result.stdout.strip().splitlines()[-1])
+        return profile, self.parse_import_times(result.stderr)
+
+    def parse_import_times(self, output):
+        """Top-level imports from `-X importtime` output, slowest first"""
+        import_times = []
+        for line in output.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            _, cumulative, module = line[len("import time:") :].split("|")
+            # Nested imports are indented, keep the outermost ones
+            if module.startswith("  ") or not cumulative.strip().isdigit():
+                continue
+            import_times.append((module.strip(), int(cumulative) / 1_000_000))
+        return sorted(import_times, key=lambda item: item[1], reverse=True)
+
+    def write_row(self, label, seconds):
+        self.stdout.write(f"{label:<42} {seconds * 1000:8.1f} ms")
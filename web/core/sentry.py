@@ -0,0 +1,78 @@
+"""
+Sentry initialization.
+
+`sentry_sdk` and its integrations add noticeably to process startup, so they
+are imported here, from `CoreConfig.ready()`, and only by processes that
+report to Sentry.
+"""
+
+import logging
+import sys
+
+import structlog
+from django.conf import settings
+
+logger = structlog.get_logger(__name__)
+
+
+def configure_sentry():
+    """Initialize Sentry for error tracking and performance monitoring."""
+    if not settings.SENTRY_DSN:
+        logger.warning("Sentry DSN not set, skipping Sentry setup.")
+        return False
+
+    try:
+        import sentry_sdk
+        from sentry_sdk.integrations.celery import CeleryIntegration
+        from sentry_sdk.integrations.django import DjangoIntegration
+        from sentry_sdk.integrations.logging import LoggingIntegration
+        from sentry_sdk.integrations.redis import RedisIntegration
+
+        sentry_sdk.init(
+            dsn=settings.SENTRY_DSN,
+            environment=settings.SENTRY_ENVIRONMENT,
+            # Integrations
+            integrations=[
+                DjangoIntegration(
+                    transaction_style="url",
+                    middleware_spans=True,
+                    signals_spans=True,
+                    cache_spans=True,
+                ),
+                CeleryIntegration(
+                    monitor_beat_tasks=True,
+                    propagate_traces=True,
+                ),
+                RedisIntegration(),
+                LoggingIntegration(
+                    # Breadcrumbs for logs at SENTRY_BREADCRUMB_LEVEL and above
+                    level=logging.getLevelName(
+                        settings.SENTRY_BREADCRUMB_LEVEL.upper()
+                    ),
+                    event_level=logging.ERROR,  # Send only ERROR-level logs to Sentry
+                ),
+            ],
+            _experiments={
+                "continuous_profiling_auto_start": settings.SENTRY_PROFILING_ENABLED,
+            },
+            ignore_errors=settings.SENTRY_IGNORE_ERRORS,
+            shutdown_timeout=10,
+            include_source_context=True,
+        )
+
+        # Configure scope defaults
+        with sentry_sdk.configure_scope() as scope:
+            scope.set_tag("app", "sol-web")
+            scope.set_context(
+                "app_info",
+                {
+                    "environment": settings.SENTRY_ENVIRONMENT,
+                    "python_version": sys.version,
+                },
+            )
+
+        return True
+
+    except Exception as e:
+        logger.error("Failed to configure Sentry", error=str(e))
+        return False
@@ -0,0 +1,34 @@
+import structlog
+from celery import shared_task
+from django.contrib.sessions.models import Session
+from django.utils import timezone
+
+logger = structlog.get_logger(__name__)
+
+# Rows deleted per query, to keep row locks short on a large django_session
+SESSION_CLEANUP_BATCH_SIZE = 1000
+
+
+@shared_task
+def clear_expired_sessions():
+    """
+    Delete expired sessions from the database
+
+    Cached sessions expire in Redis on their own, but every session is also
+    written to django_session, which Django never prunes.
+    """
+    now = timezone.now()
+    deleted = 0
+    while True:
+        batch = list(
+            Session.objects.filter(expire_date__lt=now).values_list("pk", flat=True)[
+                :SESSION_CLEANUP_BATCH_SIZE
+            ]
+        )
+        if not batch:
+            break
+        deleted += Session.objects.filter(pk__in=batch).delete()[0]
+
+    if deleted:
+        logger.info("Cleared expired sessions", count=deleted)
+    return deleted
@@ -0,0 +1,63 @@
+import io
+import json
+import logging
+from decimal import Decimal
+
+import structlog
+from core.log_pipeline import BackgroundStreamHandler, orjson_dumps
+from django.test import SimpleTestCase
+from settings.components.logging_settings import FOREIGN_PRE_CHAIN
+
+
+class OrjsonDumpsTest(SimpleTestCase):
+    def test_returns_compact_str(self):
+        self.assertEqual(orjson_dumps({"event": "x", "n": 1}), '{"event":"x","n":1}')
+
+    def test_falls_back_to_str(self):
+        self.assertEqual(orjson_dumps({"amount": Decimal("9.99")}), '{"amount":"9.99"}')
+
+
+class BackgroundStreamHandlerTest(SimpleTestCase):
+    def setUp(self):
+        self.stream = io.StringIO()
+        self.handler = BackgroundStreamHandler(self.stream)
+        self.handler.setFormatter(
+            structlog.stdlib.ProcessorFormatter(
+                processor=structlog.processors.JSONRenderer(serializer=orjson_dumps),
+                foreign_pre_chain=FOREIGN_PRE_CHAIN,
+            )
+        )
+        self.stdlib_logger = logging.getLogger(f"test_log_pipeline.{id(self)}")
+        self.stdlib_logger.addHandler(self.handler)
+        self.stdlib_logger.propagate = False
+        self.addCleanup(self.handler.close)
+
+    def lines(self):
+        self.handler.close()
+        return [json.loads(line) for line in self.stream.getvalue().splitlines()]
+
+    def test_writes_structlog_events_on_close(self):
+        logger = structlog.wrap_logger(
+            self.stdlib_logger,
+            processors=structlog.get_config()["processors"],
+            wrapper_class=structlog.stdlib.BoundLogger,
+        )
+        logger.warning("Webhook received", event_type="invoice.paid")
+
+        (line,) = self.lines()
+        self.assertEqual(line["event"], "Webhook received")
+        self.assertEqual(line["event_type"], "invoice.paid")
+        self.assertEqual(line["level"], "warning")
+
+    def test_merges_arguments_of_stdlib_records_when_logged(self):
+        values = ["before"]
+        self.stdlib_logger.warning("Value %s", values)
+        values[0] = "after"
+
+        (line,) = self.lines()
+        self.assertEqual(line["event"], "Value ['before']")
+        self.assertEqual(line["logger"], self.stdlib_logger.name)
+
+    def test_close_is_idempotent(self):
+        self.handler.close()
+        self.handler.close()
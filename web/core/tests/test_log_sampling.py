@@ -0,0 +1,84 @@
+from unittest import mock
+
+import structlog
+from core import log_sampling
+from core.log_sampling import LogSampler, parse_sample_rates
+from django.test import SimpleTestCase
+from metrics.collectors import log_records_total
+
+
+def record(event, level="info", **fields):
+    return {"event": event, "level": level, **fields}
+
+
+class ParseSampleRatesTest(SimpleTestCase):
+    def test_parses_events_and_rates(self):
+        self.assertEqual(
+            parse_sample_rates("Received webhook event=0.1, Payment succeeded=1,"),
+            {"Received webhook event": 0.1, "Payment succeeded": 1.0},
+        )
+        self.assertEqual(parse_sample_rates(""), {})
+
+    def test_rejects_invalid_rates(self):
+        for value in ("Payment succeeded=2", "=0.5", "Payment succeeded"):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                parse_sample_rates(value)
+
+
+class LogSamplerTest(SimpleTestCase):
+    def process(self, sampler, event_dict):
+        try:
+            return sampler(None, event_dict["level"], event_dict)
+        except structlog.DropEvent:
+            return None
+
+    def count(self, level, outcome):
+        return log_records_total.labels(level=level, outcome=outcome)._value.get()
+
+    def test_samples_configured_events(self):
+        sampler = LogSampler(sample_rates={"Received webhook event": 0.25})
+        dropped = self.count("info", "sampled")
+
+        with mock.patch.object(log_sampling.random, "random", return_value=0.5):
+            self.assertIsNone(self.process(sampler, record("Received webhook event")))
+        with mock.patch.object(log_sampling.random, "random", return_value=0.1):
+            kept = self.process(sampler, record("Received webhook event"))
+
+        self.assertEqual(kept["sample_rate"], 0.25)
+        self.assertEqual(self.count("info", "sampled"), dropped + 1)
+        self.assertIsNotNone(self.process(sampler, record("Payment succeeded")))
+
+    def test_always_keeps_warnings(self):
+        sampler = LogSampler(sample_rates={"Webhook failed": 0}, dedup_window=60)
+
+        for _ in range(3):
+            kept = self.process(sampler, record("Webhook failed", level="warning"))
+            self.assertNotIn("sample_rate", kept)
+        self.assertIsNone(self.process(sampler, record("Webhook failed")))
+
+    def test_collapses_duplicates_within_window(self):
+        sampler = LogSampler(dedup_window=10)
+        duplicates = self.count("info", "duplicate")
+
+        with mock.patch.object(log_sampling.time, "monotonic", return_value=100):
+            self.assertIsNotNone(self.process(sampler, record("Synced", id="sub_1")))
+            self.assertIsNone(self.process(sampler, record("Synced", id="sub_1")))
+            self.assertIsNone(self.process(sampler, record("Synced", id="sub_1")))
+            self.assertIsNotNone(self.process(sampler, record("Synced", id="sub_2")))
+        with mock.patch.object(log_sampling.time, "monotonic", return_value=111):
+            kept = self.process(sampler, record("Synced", id="sub_1"))
+
+        self.assertEqual(kept["duplicates_suppressed"], 2)
+        self.assertEqual(self.count("info", "duplicate"), duplicates + 2)
+
+    @mock.patch.object(log_sampling, "DEDUP_MAX_KEYS", 2)
+    def test_forgets_expired_keys_when_full(self):
+        sampler = LogSampler(dedup_window=10)
+
+        for now, subscription_id in ((100, "sub_1"), (105, "sub_2"), (111, "sub_3")):
+            with mock.patch.object(log_sampling.time, "monotonic", return_value=now):
+                self.process(sampler, record("Synced", id=subscription_id))
+
+        self.assertEqual(
+            {dict(key)["id"] for key in sampler._seen}, {"'sub_2'", "'sub_3'"}
+        )
@@ -0,0 +1,27 @@
+from datetime import timedelta
+from unittest import mock
+
+from core import tasks
+from django.contrib.sessions.models import Session
+from django.test import TestCase
+from django.utils import timezone
+
+
+class ClearExpiredSessionsTest(TestCase):
+    def create_session(self, key, expires_in):
+        Session.objects.create(
+            session_key=key,
+            session_data="",
+            expire_date=timezone.now() + expires_in,
+        )
+
+    @mock.patch.object(tasks, "SESSION_CLEANUP_BATCH_SIZE", 2)
+    def test_deletes_only_expired_sessions_in_batches(self):
+        for i in range(5):
+            self.create_session(f"expired{i}", timedelta(days=-1))
+        self.create_session("active", timedelta(days=1))
+
+        self.assertEqual(tasks.clear_expired_sessions(), 5)
+        self.assertEqual(
+            list(Session.objects.values_list("session_key", flat=True)), ["active"]
+        )
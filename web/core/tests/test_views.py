@@ -0,0 +1,53 @@
+import time
+from unittest import mock
+
+from core import health
+from django.test import SimpleTestCase, override_settings
+
+
+def failing_check():
+    raise ConnectionError("connection refused")
+
+
+@override_settings(HEALTHCHECK_TIMEOUT=0.5, HEALTHCHECK_CACHE_SECONDS=60)
+class HealthViewsTest(SimpleTestCase):
+    def setUp(self):
+        health.clear_readiness_cache()
+        self.addCleanup(health.clear_readiness_cache)
+
+    def test_liveness_does_not_check_dependencies(self):
+        with mock.patch.dict(health.CHECKS, {"database": failing_check}):
+            response = self.client.get("/api/health/live/")
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_readiness_reports_each_dependency(self):
+        checks = {"database": mock.Mock(), "redis": failing_check}
+        with mock.patch.dict(health.CHECKS, checks, clear=True):
+            response = self.client.get("/api/health/ready/")
+
+        self.assertEqual(response.status_code, 503)
+        body = response.json()
+        self.assertTrue(body["checks"]["database"]["healthy"])
+        self.assertFalse(body["checks"]["redis"]["healthy"])
+        self.assertEqual(body["checks"]["redis"]["error"], "connection refused")
+        self.assertIn("latency_ms", body["checks"]["redis"])
+
+    def test_readiness_times_out_slow_checks(self):
+        checks = {"broker": lambda: time.sleep(2)}
+        with mock.patch.dict(health.CHECKS, checks, clear=True):
+            response = self.client.get("/api/health/ready/")
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["checks"]["broker"]["error"], "timeout")
+
+    def test_readiness_results_are_cached(self):
+        check = mock.Mock()
+        with mock.patch.dict(health.CHECKS, {"database": check}, clear=True):
+            first = self.client.get("/api/health/ready/")
+            second = self.client.get("/api/health/ready/")
+
+        self.assertEqual(first.status_code, 200)
+        self.assertFalse(first.json()["cached"])
+        self.assertTrue(second.json()["cached"])
+        check.assert_called_once()
@@ -1,34 +1,36 @@
 import structlog
-from django.db import connections
-from django.db.utils import OperationalError
 from django.http import JsonResponse
 from django.middleware.csrf import get_token
 from django.views.decorators.csrf import ensure_csrf_cookie
 
+from .health import get_readiness
+
 logger = structlog.get_logger(__name__)
 
 
-def healthcheck(request):
+def liveness(request):
+    """
+    Liveness probe: the process is up and serving requests. Does not touch
+    any dependency, so an outage elsewhere does not get pods restarted.
+    """
+    return JsonResponse({"status": "alive"})
+
+
+def readiness(request):
     """
-    Health check endpoint that checks if the application is running
-    and if the database connection is working.
+    Readiness probe: Postgres, Redis and the Celery broker are reachable.
+    Results are cached for a few seconds, see `core.health`.
     """
-    # Check database connection
-    db_conn = True
-    try:
-        # Test database by attempting to query
-        connections["default"].cursor()
-    except OperationalError:
-        logger.error("Database connection error")
-        db_conn = False
-
-    status = 200 if db_conn else 503
+    checks, cached = get_readiness()
+    healthy = all(check["healthy"] for check in checks.values())
+
     response_data = {
-        "status": "healthy" if db_conn else "unhealthy",
-        "db_connection": db_conn,
+        "status": "healthy" if healthy else "unhealthy",
+        "checks": checks,
+        "cached": cached,
     }
 
-    return JsonResponse(response_data, status=status)
+    return JsonResponse(response_data, status=200 if healthy else 503)
 
 
 @ensure_csrf_cookie
@@ -1,6 +1,6 @@
 import structlog
-from decouple import config
 from django.apps import AppConfig
+from django.conf import settings
 
 logger = structlog.get_logger(__name__)
 
@@ -10,24 +10,22 @@ class MailConfig(AppConfig):
     verbose_name = "e-mail functionality"
 
     def ready(self):
-
         import sys
 
         if "collectstatic" in sys.argv:
             return
 
-        if config("ENVIRONMENT") == "prod":
-            required_env_vars = [
-                config("EMAIL_HOST", ""),
-                config("EMAIL_HOST_USER", ""),
-                config("EMAIL_HOST_PASSWORD", ""),
+        if settings.ENVIRONMENT == "prod":
+            # Read from settings, the environment was already parsed there
+            missing = [
+                name
+                for name in ("EMAIL_HOST", "EMAIL_HOST_USER", "EMAIL_HOST_PASSWORD")
+                if not getattr(settings, name, "")
             ]
-            if not all(required_env_vars):
+            if missing:
                 raise EnvironmentError(
-                    f"MailConfig.ready() failed. The required environment variables are not set."
-                    f"EMAIL_HOST: {config('EMAIL_HOST')}"
-                    f"EMAIL_HOST_USER: {config('EMAIL_HOST_USER')}"
-                    f"EMAIL_HOST_PASSWORD: {config('EMAIL_HOST_PASSWORD')}"
+                    "MailConfig.ready() failed. The required environment variables "
+                    f"are not set: {', '.join(missing)}"
                 )
         else:
             logger.warning("MailConfig.ready() running in development mode.")
@@ -0,0 +1,208 @@
+"""
+Outbound mail queue.
+
+Requests do not talk to SMTP. Messages are serialized to a Redis list on the
+Celery broker, so sending one costs an RPUSH, and a
+`mail.tasks.flush_mail_outbox` task on the `mail` queue drains the list in
+batches over the worker's SMTP connection. Enqueuing schedules at most one
+flush per `MAIL_FLUSH_LOCK_SECONDS`, and messages enqueued while a flush is
+running are picked up by that flush.
+
+A flush moves each batch to its own processing list and removes messages from
+it one by one as they are sent, so a worker killed mid-batch loses nothing.
+Every processing list has a lease, renewed as messages are sent; flushes put
+the messages of lists whose lease expired back at the head of the outbox.
+Delivery is at least once: the message being sent when a worker died is sent
+again.
+"""
+
+import json
+import threading
+import uuid
+
+import structlog
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+
+logger = structlog.get_logger(__name__)
+
+OUTBOX_KEY = "mail:outbox"
+FLUSH_SCHEDULED_KEY = "mail:outbox:flush-scheduled"
+# Set of the processing lists of running flushes
+PROCESSING_KEY = "mail:outbox:processing"
+
+_lock = threading.Lock()
+_client = None
+
+
+def get_client():
+    """Return the Redis client for the broker database holding the outbox"""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                import redis
+                from celeryapp.celery import app
+
+                _client = redis.Redis.from_url(
+                    app.conf.broker_url, socket_connect_timeout=1, socket_timeout=1
+                )
+    return _client
+
+
+def serialize_message(message, attempts=0):
+    """Serialize an `EmailMessage` without attachments to a JSON string"""
+    if message.attachments:
+        raise ValueError("Messages with attachments cannot be queued")
+
+    return json.dumps(
+        {
+            "subject": message.subject,
+            "body": message.body,
+            "from_email": message.from_email,
+            "to": message.to,
+            "cc": message.cc,
+            "bcc": message.bcc,
+            "reply_to": message.reply_to,
+            "headers": message.extra_headers,
+            "alternatives": [
+                list(alternative)
+                for alternative in getattr(message, "alternatives", [])
+            ],
+            "attempts": attempts,
+        }
+    )
+
+
+def deserialize_message(payload, connection=None):
+    """
+    Rebuild a message serialized by `serialize_message`
+
+    Returns:
+        tuple: (EmailMultiAlternatives, attempts)
+    """
+    data = json.loads(payload)
+    message = EmailMultiAlternatives(
+        subject=data["subject"],
+        body=data["body"],
+        from_email=data["from_email"],
+        to=data["to"],
+        cc=data["cc"],
+        bcc=data["bcc"],
+        reply_to=data["reply_to"],
+        headers=data["headers"],
+        alternatives=[tuple(alternative) for alternative in data["alternatives"]],
+        connection=connection,
+    )
+    return message, data["attempts"]
+
+
+def enqueue(message):
+    """
+    Add a message to the outbox and make sure a flush is scheduled
+
+    Once the message is in the outbox it is not sent any other way: if the
+    flush cannot be scheduled, the beat flush sends it.
+
+    Raises:
+        redis.RedisError: If the outbox cannot be reached
+    """
+    from .tasks import flush_mail_outbox
+
+    pipeline = get_client().pipeline()
+    pipeline.rpush(OUTBOX_KEY, serialize_message(message))
+    pipeline.set(FLUSH_SCHEDULED_KEY, 1, nx=True, ex=settings.MAIL_FLUSH_LOCK_SECONDS)
+    _, schedule_flush = pipeline.execute()
+
+    if schedule_flush:
+        try:
+            # A short delay lets a burst of messages go out as one batch
+            flush_mail_outbox.apply_async(countdown=settings.MAIL_FLUSH_DELAY_SECONDS)
+        except Exception as e:
+            logger.error("Scheduling mail flush failed", error=str(e))
+            # Let the next message try again
+            try:
+                clear_flush_scheduled()
+            except Exception as e:
+                logger.error("Clearing mail flush schedule failed", error=str(e))
+
+
+def new_processing_key():
+    """Key of the processing list for one flush"""
+    return f"{PROCESSING_KEY}:{uuid.uuid4().hex}"
+
+
+def _lease_key(processing_key):
+    return f"{processing_key}:lease"
+
+
+def claim_batch(processing_key, size):
+    """
+    Atomically move up to `size` serialized messages to a processing list
+
+    Returns:
+        list: The moved messages, oldest first
+    """
+    pipeline = get_client().pipeline()
+    pipeline.sadd(PROCESSING_KEY, processing_key)
+    pipeline.set(
+        _lease_key(processing_key), 1, ex=settings.MAIL_PROCESSING_LEASE_SECONDS
+    )
+    for _ in range(size):
+        pipeline.lmove(OUTBOX_KEY, processing_key, "LEFT", "RIGHT")
+    return [payload for payload in pipeline.execute()[2:] if payload is not None]
+
+
+def ack(processing_key):
+    """Remove the oldest message of a processing list once it was handled"""
+    pipeline = get_client().pipeline()
+    pipeline.lpop(processing_key)
+    pipeline.expire(_lease_key(processing_key), settings.MAIL_PROCESSING_LEASE_SECONDS)
+    pipeline.execute()
+
+
+def release(processing_key, payloads=()):
+    """
+    Delete a processing list, putting `payloads` back at the head of the
+    outbox, in order
+    """
+    pipeline = get_client().pipeline()
+    if payloads:
+        pipeline.lpush(OUTBOX_KEY, *reversed(payloads))
+    pipeline.delete(processing_key, _lease_key(processing_key))
+    pipeline.srem(PROCESSING_KEY, processing_key)
+    pipeline.execute()
+
+
+def recover_orphaned_batches():
+    """
+    Put the messages of processing lists whose lease expired back at the head
+    of the outbox
+
+    Returns:
+        int: Number of messages recovered
+    """
+    client = get_client()
+    recovered = 0
+    for processing_key in client.smembers(PROCESSING_KEY):
+        processing_key = processing_key.decode()
+        if client.exists(_lease_key(processing_key)):
+            continue
+        # Moving from the tail to the head keeps the messages in order
+        while client.lmove(processing_key, OUTBOX_KEY, "RIGHT", "LEFT") is not None:
+            recovered += 1
+        client.srem(PROCESSING_KEY, processing_key)
+    return recovered
+
+
+def mark_flush_scheduled():
+    """Record that a flush is scheduled, so enqueuing does not add another"""
+    get_client().set(FLUSH_SCHEDULED_KEY, 1, ex=settings.MAIL_FLUSH_LOCK_SECONDS)
+
+
+def clear_flush_scheduled():
+    get_client().delete(FLUSH_SCHEDULED_KEY)
+
+
+def outbox_length():
+    return get_client().llen(OUTBOX_KEY)
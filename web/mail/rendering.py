@@ -0,0 +1,114 @@
+"""
+Templated emails.
+
+Every email is a directory of Django templates,
+`mail/templates/mail/<locale>/<name>/`, holding `subject.txt`, `body.txt` and
+an optional `body.html`, sent as a multipart message. A locale such as
+"pt-br" falls back to "pt" and then to `MAIL_DEFAULT_LOCALE`.
+
+The resolved, compiled templates of each (name, locale) are kept for the life
+of the process on top of Django's cached template loader, so a burst of
+notifications renders without touching the filesystem. Celery worker
+processes compile every email template when they start.
+"""
+
+from collections import namedtuple
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.template import TemplateDoesNotExist
+from django.template.loader import get_template
+
+TEMPLATE_ROOT = Path(__file__).resolve().parent / "templates" / "mail"
+
+EmailTemplates = namedtuple("EmailTemplates", ["subject", "text", "html"])
+
+
+def _locale_candidates(locale):
+    locale = (locale or settings.LANGUAGE_CODE).lower().replace("_", "-")
+    candidates = [locale]
+    if "-" in locale:
+        candidates.append(locale.split("-")[0])
+    if settings.MAIL_DEFAULT_LOCALE not in candidates:
+        candidates.append(settings.MAIL_DEFAULT_LOCALE)
+    return candidates
+
+
+@lru_cache(maxsize=None)
+def _load_templates(name, locale):
+    """Compiled templates of an email in exactly this locale, or None"""
+    prefix = f"mail/{locale}/{name}"
+    try:
+        subject = get_template(f"{prefix}/subject.txt")
+        text = get_template(f"{prefix}/body.txt")
+    except TemplateDoesNotExist:
+        return None
+
+    try:
+        html = get_template(f"{prefix}/body.html")
+    except TemplateDoesNotExist:
+        html = None
+    return EmailTemplates(subject, text, html)
+
+
+def get_email_templates(name, locale=None):
+    """
+    Return the compiled templates of an email in the closest available locale
+
+    Raises:
+        TemplateDoesNotExist: If the email has no templates in any candidate
+            locale
+    """
+    for candidate in _locale_candidates(locale):
+        templates = _load_templates(name, candidate)
+        if templates is not None:
+            return templates
+
+    raise TemplateDoesNotExist(f"mail/<locale>/{name}")
+
+
+def render_email(name, context, to, locale=None, from_email=None):
+    """Render an email to a multipart message ready for `send_email`"""
+    templates = get_email_templates(name, locale)
+
+    # Subjects must be a single line
+    subject = " ".join(templates.subject.render(context).split())
+    message = EmailMultiAlternatives(
+        subject,
+        templates.text.render(context),
+        from_email or settings.DEFAULT_FROM_EMAIL,
+        to,
+    )
+    if templates.html is not None:
+        message.attach_alternative(templates.html.render(context), "text/html")
+    return message
+
+
+def precompile_email_templates():
+    """
+    Compile every email in every locale shipped in this app, and resolve the
+    locale fallbacks of `LANGUAGE_CODE`
+
+    Returns:
+        int: Number of (name, locale) pairs compiled
+    """
+    compiled = 0
+    names = set()
+    for locale_dir in sorted(TEMPLATE_ROOT.iterdir()):
+        if not locale_dir.is_dir():
+            continue
+        for email_dir in sorted(locale_dir.iterdir()):
+            if email_dir.is_dir():
+                _load_templates(email_dir.name, locale_dir.name)
+                names.add(email_dir.name)
+                compiled += 1
+
+    for name in names:
+        try:
+            get_email_templates(name)
+        except TemplateDoesNotExist:
+            # Only shipped in other locales
+            pass
+    return compiled
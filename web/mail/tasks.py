@@ -0,0 +1,197 @@
+import smtplib
+import time
+
+import structlog
+from celery import shared_task
+from celery.signals import worker_process_init
+from celery.utils.time import get_exponential_backoff_interval
+from django.conf import settings
+from django.core import mail
+from metrics.collectors import track_mail_batch, track_mail_messages
+
+from . import outbox
+from .rendering import precompile_email_templates
+
+logger = structlog.get_logger(__name__)
+
+# SMTP connection reused by every flush in this worker process
+_connection = None
+
+
+class TransientDeliveryError(Exception):
+    """Sending failed in a way that may succeed later (e.g. SMTP unreachable)"""
+
+
+def _is_permanent(error):
+    """Whether the server rejected the message itself, so retrying cannot help"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    return (
+        isinstance(error, smtplib.SMTPResponseException)
+        and 500 <= error.smtp_code < 600
+    )
+
+
+def get_mail_connection():
+    """
+    Return this worker's open mail connection
+
+    SMTP servers drop idle connections, so a reused connection is probed with
+    NOOP first and reopened if the server has gone away.
+    """
+    global _connection
+    if _connection is None:
+        _connection = mail.get_connection(fail_silently=False)
+
+    smtp = getattr(_connection, "connection", None)
+    if smtp is not None:
+        try:
+            if smtp.noop()[0] != 250:
+                raise smtplib.SMTPServerDisconnected("NOOP failed")
+        except (smtplib.SMTPException, OSError):
+            _connection.close()
+
+    _connection.open()
+    return _connection
+
+
+def close_mail_connection():
+    if _connection is not None:
+        try:
+            _connection.close()
+        except Exception:
+            pass
+
+
+class RateLimiter:
+    """Space sends so a worker stays under `rate` messages per second"""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self.next_send_at = 0.0
+
+    def wait(self):
+        if not self.interval:
+            return
+        now = time.monotonic()
+        if now < self.next_send_at:
+            time.sleep(self.next_send_at - now)
+        self.next_send_at = max(now, self.next_send_at) + self.interval
+
+
+def send_batch(payloads, rate_limiter, processing_key):
+    """
+    Send serialized messages over the worker's connection, one at a time
+
+    Each message is removed from the processing list once it is sent.
+    Messages the server rejects permanently are dropped.
+
+    Returns:
+        tuple: (sent, failed)
+
+    Raises:
+        TransientDeliveryError: With the payloads that were not sent and the
+            sent and failed counts so far
+    """
+    connection = get_mail_connection()
+    sent = failed = 0
+
+    for index, payload in enumerate(payloads):
+        message, _ = outbox.deserialize_message(payload, connection)
+        rate_limiter.wait()
+        try:
+            connection.send_messages([message])
+        except Exception as e:
+            if _is_permanent(e):
+                failed += 1
+                logger.error("Email rejected", to=message.to, error=str(e))
+                outbox.ack(processing_key)
+                continue
+            raise TransientDeliveryError(payloads[index:], sent, failed) from e
+        sent += 1
+        outbox.ack(processing_key)
+
+    return sent, failed
+
+
+def _retry_payloads(payloads):
+    """Bump the attempt count of unsent messages, dropping exhausted ones"""
+    retry = []
+    for payload in payloads:
+        message, attempts = outbox.deserialize_message(payload)
+        attempts += 1
+        if attempts >= settings.MAIL_MAX_ATTEMPTS:
+            logger.error(
+                "Email dropped after retries", to=message.to, attempts=attempts
+            )
+            track_mail_messages("failed")
+            continue
+        retry.append(outbox.serialize_message(message, attempts))
+    return retry
+
+
+@shared_task(bind=True, max_retries=None)
+def flush_mail_outbox(self):
+    """Send queued messages in batches until the outbox is empty"""
+    # Messages enqueued from here on are picked up by this loop or, once it
+    # has finished, by a newly scheduled flush
+    outbox.clear_flush_scheduled()
+    recovered = outbox.recover_orphaned_batches()
+    if recovered:
+        logger.warning("Recovered emails of a lost flush", count=recovered)
+        track_mail_messages("recovered", recovered)
+
+    rate_limiter = RateLimiter(settings.MAIL_RATE_LIMIT_PER_SECOND)
+    processing_key = outbox.new_processing_key()
+    total_sent = 0
+
+    while True:
+        payloads = outbox.claim_batch(processing_key, settings.MAIL_BATCH_SIZE)
+        if not payloads:
+            outbox.release(processing_key)
+            break
+
+        start = time.perf_counter()
+        try:
+            sent, failed = send_batch(payloads, rate_limiter, processing_key)
+        except TransientDeliveryError as e:
+            unsent, sent, failed = e.args
+            track_mail_messages("sent", sent)
+            track_mail_messages("failed", failed)
+            track_mail_messages("retried", len(unsent))
+            close_mail_connection()
+
+            outbox.release(processing_key, _retry_payloads(unsent))
+            # The retry is the scheduled flush
+            outbox.mark_flush_scheduled()
+            countdown = get_exponential_backoff_interval(
+                factor=settings.MAIL_RETRY_BACKOFF_SECONDS,
+                retries=self.request.retries,
+                maximum=settings.MAIL_RETRY_BACKOFF_MAX_SECONDS,
+                full_jitter=True,
+            )
+            logger.warning(
+                "Email delivery failed, retrying",
+                error=str(e.__cause__),
+                unsent=len(unsent),
+                countdown=countdown,
+            )
+            raise self.retry(exc=e.__cause__, countdown=countdown)
+
+        track_mail_batch(time.perf_counter() - start)
+        track_mail_messages("sent", sent)
+        track_mail_messages("failed", failed)
+        total_sent += sent
+
+    if total_sent:
+        logger.info("Sent queued emails", count=total_sent)
+    return total_sent
+
+
+@worker_process_init.connect
+def compile_email_templates(**kwargs):
+    """Compile email templates before the first notification needs them"""
+    try:
+        precompile_email_templates()
+    except Exception as e:
+        logger.error("Email template precompilation failed", error=str(e))
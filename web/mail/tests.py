@@ -1,8 +1,20 @@
 import os
+import smtplib
+from unittest import mock
 
+from celery.exceptions import Retry
 from django.conf import settings
 from django.core import mail
-from django.test import TestCase, override_settings
+from django.core.mail import EmailMessage, EmailMultiAlternatives
+from django.test import SimpleTestCase, TestCase, override_settings
+from mail import outbox, tasks
+from mail.outbox import deserialize_message, serialize_message
+from mail.rendering import (
+    _load_templates,
+    get_email_templates,
+    precompile_email_templates,
+    render_email,
+)
 from mail.utils import send_verification_email
 
 DEFAULT_FROM_EMAIL = "Django Test <automated@django.test.net>"
@@ -17,6 +29,7 @@ class DummyUser:
 @override_settings(
     EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
     DEFAULT_FROM_EMAIL=DEFAULT_FROM_EMAIL,
+    MAIL_QUEUE_ENABLED=False,
 )
 class LocmemEmailBackendTest(TestCase):
     def test_send_verification_email(self):
@@ -37,6 +50,7 @@ class LocmemEmailBackendTest(TestCase):
     EMAIL_BACKEND="django.core.mail.backends.filebased.EmailBackend",
     EMAIL_FILE_PATH="/tmp/dummy-mail",
     DEFAULT_FROM_EMAIL=DEFAULT_FROM_EMAIL,
+    MAIL_QUEUE_ENABLED=False,
 )
 class FileBasedEmailBackendTest(TestCase):
     def setUp(self):
@@ -63,3 +77,335 @@ class FileBasedEmailBackendTest(TestCase):
         self.assertIn(user.email, email_content)
         self.assertIn(user.magic_link_url, email_content)
         self.assertIn(DEFAULT_FROM_EMAIL, email_content)
+
+
+class RenderEmailTest(SimpleTestCase):
+    def setUp(self):
+        _load_templates.cache_clear()
+        self.addCleanup(_load_templates.cache_clear)
+
+    def test_renders_multipart_message(self):
+        message = render_email(
+            "verification",
+            {"magic_link_url": "http://example.com/verify?a=1&b=2"},
+            ["test@example.com"],
+        )
+
+        self.assertEqual(message.subject, "Verify your account")
+        # Text bodies are not HTML-escaped
+        self.assertIn("http://example.com/verify?a=1&b=2", message.body)
+        html, mimetype = message.alternatives[0]
+        self.assertEqual(mimetype, "text/html")
+        self.assertIn('href="http://example.com/verify?a=1&amp;b=2"', html)
+
+    def test_falls_back_to_default_locale(self):
+        self.assertIs(
+            get_email_templates("verification", "pt-BR"),
+            get_email_templates("verification", "en"),
+        )
+
+    def test_compiled_templates_are_reused(self):
+        self.assertGreaterEqual(precompile_email_templates(), 3)
+
+        with mock.patch("mail.rendering.get_template") as get_template:
+            render_email("verification", {"magic_link_url": "x"}, ["a@example.com"])
+
+        get_template.assert_not_called()
+
+
+def queued_message(to="test@example.com", attempts=0):
+    message = EmailMessage("Subject", "Body", DEFAULT_FROM_EMAIL, [to])
+    return serialize_message(message, attempts)
+
+
+@override_settings(
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    DEFAULT_FROM_EMAIL=DEFAULT_FROM_EMAIL,
+    MAIL_QUEUE_ENABLED=True,
+)
+class MailQueueTest(SimpleTestCase):
+    @mock.patch("mail.outbox.enqueue")
+    def test_send_only_enqueues(self, enqueue):
+        user = DummyUser("test@example.com", "http://example.com/verify")
+        send_verification_email(user)
+
+        self.assertEqual(len(mail.outbox), 0)
+        message = enqueue.call_args.args[0]
+        self.assertEqual(message.to, [user.email])
+
+    @mock.patch("mail.outbox.enqueue", side_effect=ConnectionError)
+    def test_send_falls_back_to_direct_delivery(self, enqueue):
+        user = DummyUser("test@example.com", "http://example.com/verify")
+        send_verification_email(user)
+
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_serialization_round_trip(self):
+        message = EmailMultiAlternatives(
+            "Subject",
+            "Body",
+            DEFAULT_FROM_EMAIL,
+            ["test@example.com"],
+            reply_to=["support@example.com"],
+            headers={"X-Tag": "welcome"},
+        )
+        message.attach_alternative("<p>Body</p>", "text/html")
+
+        restored, attempts = deserialize_message(serialize_message(message, 2))
+
+        self.assertEqual(attempts, 2)
+        self.assertEqual(restored.to, ["test@example.com"])
+        self.assertEqual(restored.reply_to, ["support@example.com"])
+        self.assertEqual(restored.extra_headers, {"X-Tag": "welcome"})
+        self.assertEqual(restored.alternatives[0][0], "<p>Body</p>")
+
+
+class FakeRedis:
+    """The subset of the Redis client the outbox uses, in memory"""
+
+    def __init__(self):
+        self.lists = {}
+        self.sets = {}
+        self.strings = {}
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def rpush(self, key, *values):
+        self.lists.setdefault(key, []).extend(values)
+
+    def lpush(self, key, *values):
+        for value in values:
+            self.lists.setdefault(key, []).insert(0, value)
+
+    def lpop(self, key):
+        values = self.lists.get(key)
+        return values.pop(0) if values else None
+
+    def lmove(self, source, destination, src, dest):
+        values = self.lists.get(source)
+        if not values:
+            return None
+        value = values.pop(0 if src == "LEFT" else -1)
+        if dest == "LEFT":
+            self.lpush(destination, value)
+        else:
+            self.rpush(destination, value)
+        return value
+
+    def sadd(self, key, member):
+        self.sets.setdefault(key, set()).add(member)
+
+    def srem(self, key, member):
+        self.sets.get(key, set()).discard(member)
+
+    def smembers(self, key):
+        return {member.encode() for member in self.sets.get(key, ())}
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.strings:
+            return None
+        self.strings[key] = value
+        return True
+
+    def exists(self, key):
+        return int(key in self.strings)
+
+    def expire(self, key, seconds):
+        return key in self.strings
+
+    def delete(self, *keys):
+        for key in keys:
+            self.lists.pop(key, None)
+            self.strings.pop(key, None)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        method = getattr(self.client, name)
+        return lambda *args, **kwargs: self.calls.append((method, args, kwargs))
+
+    def execute(self):
+        return [method(*args, **kwargs) for method, args, kwargs in self.calls]
+
+
+class OutboxTestMixin:
+    def setUp(self):
+        super().setUp()
+        self.redis = FakeRedis()
+        patcher = mock.patch("mail.outbox.get_client", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def queue(self, *payloads):
+        self.redis.rpush(outbox.OUTBOX_KEY, *payloads)
+
+    def queued(self):
+        return self.redis.lists.get(outbox.OUTBOX_KEY, [])
+
+    def processing(self):
+        return {
+            key: values
+            for key, values in self.redis.lists.items()
+            if key != outbox.OUTBOX_KEY and values
+        }
+
+
+class OutboxProcessingTest(OutboxTestMixin, SimpleTestCase):
+    def test_claimed_messages_stay_until_acked(self):
+        self.queue("a", "b", "c")
+
+        self.assertEqual(outbox.claim_batch("mail:outbox:processing:1", 2), ["a", "b"])
+        outbox.ack("mail:outbox:processing:1")
+
+        self.assertEqual(self.queued(), ["c"])
+        self.assertEqual(self.processing(), {"mail:outbox:processing:1": ["b"]})
+
+    def test_release_requeues_payloads_in_order(self):
+        self.queue("a", "b", "c")
+        outbox.claim_batch("mail:outbox:processing:1", 2)
+
+        outbox.release("mail:outbox:processing:1", ["a2", "b2"])
+
+        self.assertEqual(self.queued(), ["a2", "b2", "c"])
+        self.assertEqual(self.processing(), {})
+        self.assertFalse(self.redis.sets[outbox.PROCESSING_KEY])
+
+    def test_recovers_batches_without_a_lease(self):
+        self.queue("a", "b", "c", "d")
+        outbox.claim_batch("mail:outbox:processing:dead", 2)
+        outbox.claim_batch("mail:outbox:processing:alive", 1)
+        del self.redis.strings["mail:outbox:processing:dead:lease"]
+
+        self.assertEqual(outbox.recover_orphaned_batches(), 2)
+
+        self.assertEqual(self.queued(), ["a", "b", "d"])
+        self.assertEqual(self.processing(), {"mail:outbox:processing:alive": ["c"]})
+        self.assertEqual(
+            self.redis.sets[outbox.PROCESSING_KEY], {"mail:outbox:processing:alive"}
+        )
+
+
+@override_settings(
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    DEFAULT_FROM_EMAIL=DEFAULT_FROM_EMAIL,
+    MAIL_QUEUE_ENABLED=True,
+)
+class EnqueueTest(OutboxTestMixin, SimpleTestCase):
+    @mock.patch("mail.tasks.flush_mail_outbox.apply_async")
+    def test_schedules_one_flush(self, apply_async):
+        send_verification_email(DummyUser("a@example.com", "http://example.com/a"))
+        send_verification_email(DummyUser("b@example.com", "http://example.com/b"))
+
+        self.assertEqual(len(self.queued()), 2)
+        apply_async.assert_called_once()
+
+    @mock.patch("mail.tasks.flush_mail_outbox.apply_async", side_effect=ConnectionError)
+    def test_scheduling_failure_leaves_message_to_the_beat_flush(self, apply_async):
+        send_verification_email(DummyUser("a@example.com", "http://example.com/a"))
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(len(self.queued()), 1)
+        self.assertNotIn(outbox.FLUSH_SCHEDULED_KEY, self.redis.strings)
+
+
+@override_settings(
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    MAIL_BATCH_SIZE=2,
+    MAIL_RATE_LIMIT_PER_SECOND=0,
+    MAIL_MAX_ATTEMPTS=3,
+)
+class FlushMailOutboxTest(OutboxTestMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        tasks._connection = None
+        self.addCleanup(setattr, tasks, "_connection", None)
+
+    def test_sends_batches_over_one_connection(self):
+        self.queue(queued_message(), queued_message(), queued_message())
+        with mock.patch(
+            "django.core.mail.backends.locmem.EmailBackend.open"
+        ) as open_connection:
+            self.assertEqual(tasks.flush_mail_outbox.run(), 3)
+
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(self.queued(), [])
+        self.assertEqual(self.processing(), {})
+        # Created once, then reused for every batch
+        self.assertIsNotNone(tasks._connection)
+        self.assertEqual(open_connection.call_count, 2)
+
+    def test_unsent_messages_stay_claimed_while_sending(self):
+        connection = mock.Mock()
+        claimed = []
+        connection.send_messages.side_effect = lambda messages: claimed.append(
+            sum(len(values) for values in self.processing().values())
+        )
+        self.queue(queued_message("a@example.com"), queued_message("b@example.com"))
+
+        with mock.patch("mail.tasks.get_mail_connection", return_value=connection):
+            tasks.flush_mail_outbox.run()
+
+        self.assertEqual(claimed, [2, 1])
+
+    def test_transient_failure_requeues_unsent_messages(self):
+        connection = mock.Mock()
+        connection.send_messages.side_effect = [
+            1,
+            smtplib.SMTPServerDisconnected("gone"),
+        ]
+        self.queue(queued_message("a@example.com"), queued_message("b@example.com"))
+
+        with mock.patch(
+            "mail.tasks.get_mail_connection", return_value=connection
+        ), mock.patch(
+            "mail.outbox.mark_flush_scheduled"
+        ) as mark_flush_scheduled, mock.patch.object(
+            tasks.flush_mail_outbox, "retry", side_effect=Retry
+        ):
+            with self.assertRaises(Retry):
+                tasks.flush_mail_outbox.run()
+
+        (requeued,) = self.queued()
+        message, attempts = deserialize_message(requeued)
+        self.assertEqual(message.to, ["b@example.com"])
+        self.assertEqual(attempts, 1)
+        self.assertEqual(self.processing(), {})
+        mark_flush_scheduled.assert_called_once()
+
+    def test_recovers_batches_of_a_killed_worker(self):
+        self.queue(queued_message("a@example.com"), queued_message("b@example.com"))
+        outbox.claim_batch("mail:outbox:processing:dead", 2)
+        outbox.ack("mail:outbox:processing:dead")
+        del self.redis.strings["mail:outbox:processing:dead:lease"]
+
+        self.assertEqual(tasks.flush_mail_outbox.run(), 1)
+
+        self.assertEqual(mail.outbox[0].to, ["b@example.com"])
+        self.assertEqual(self.processing(), {})
+
+    def test_drops_messages_out_of_attempts(self):
+        self.assertEqual(
+            tasks._retry_payloads(
+                [queued_message(attempts=1), queued_message(attempts=2)]
+            ),
+            [queued_message(attempts=2)],
+        )
+
+    def test_permanent_rejection_is_not_retried(self):
+        connection = mock.Mock()
+        connection.send_messages.side_effect = [
+            smtplib.SMTPRecipientsRefused({"a@example.com": (550, b"unknown")}),
+            1,
+        ]
+        self.queue(queued_message("a@example.com"), queued_message())
+
+        with mock.patch("mail.tasks.get_mail_connection", return_value=connection):
+            self.assertEqual(tasks.flush_mail_outbox.run(), 1)
+
+        self.assertEqual(self.queued(), [])
+        self.assertEqual(self.processing(), {})
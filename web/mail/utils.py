@@ -1,17 +1,45 @@
 import uuid
 
+import structlog
 from django.conf import settings
-from django.core.mail import send_mail
+from metrics.collectors import track_mail_messages
+
+from . import outbox
+from .rendering import render_email
+
+logger = structlog.get_logger(__name__)
 
 
 def generate_verification_code():
     return str(uuid.uuid4())
 
 
-def send_verification_email(user):
-    subject = "Verify your account"
-    message = f"Follow this link to verify your account: {user.magic_link_url}"
-    from_email = settings.DEFAULT_FROM_EMAIL
-    recipient_list = [user.email]
+def send_email(message):
+    """
+    Queue a message for delivery by the mail workers
+
+    With `MAIL_QUEUE_ENABLED` off, or if the outbox cannot be reached, the
+    message is sent directly instead.
+    """
+    if settings.MAIL_QUEUE_ENABLED:
+        try:
+            outbox.enqueue(message)
+        except Exception as e:
+            logger.error("Mail queue unavailable, sending directly", error=str(e))
+        else:
+            track_mail_messages("enqueued")
+            return
+
+    message.send()
+    track_mail_messages("sent")
 
-    send_mail(subject, message, from_email, recipient_list)
+
+def send_templated_email(name, context, to, locale=None):
+    """Render an email from `mail/templates/mail/<locale>/<name>/` and queue it"""
+    send_email(render_email(name, context, to, locale))
+
+
+def send_verification_email(user):
+    send_templated_email(
+        "verification", {"magic_link_url": user.magic_link_url}, [user.email]
+    )
@@ -1,4 +1,6 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.backends.signals import connection_created
 
 
 class MetricsConfig(AppConfig):
@@ -9,3 +11,10 @@ class MetricsConfig(AppConfig):
     def ready(self):
         # Import collectors to register them with prometheus
         from . import collectors  # noqa
+
+        if settings.METRICS_TRACK_DB_OPERATIONS:
+            from .db import install_db_metrics
+
+            connection_created.connect(
+                install_db_metrics, dispatch_uid="metrics.install_db_metrics"
+            )
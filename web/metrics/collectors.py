@@ -3,8 +3,8 @@ Custom Prometheus metrics collectors.
 These metrics are automatically included in the /metrics endpoint.
 """
 
-from django.urls import resolve
-from prometheus_client import Counter, Gauge, Histogram
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
 
 # Custom endpoint response time histogram
 endpoint_response_time = Histogram(
@@ -35,7 +35,9 @@ user_actions_total = Counter(
 )
 
 active_users_gauge = Gauge(
-    "django_active_users_current", "Current number of active users"
+    "django_active_users_current",
+    "Current number of active users",
+    multiprocess_mode="mostrecent",
 )
 
 # Database operation metrics
@@ -52,19 +54,118 @@ cache_operations_total = Counter(
     ["operation", "cache_key_prefix"],
 )
 
+# Stripe API metrics
+stripe_api_request_duration = Histogram(
+    "stripe_api_request_seconds",
+    "Stripe API call duration",
+    ["operation", "outcome"],
+    buckets=[0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0, 30.0],
+)
+
+stripe_api_errors_total = Counter(
+    "stripe_api_errors_total",
+    "Total failed Stripe API calls",
+    ["operation", "error_type"],
+)
+
+stripe_circuit_breaker_open = Gauge(
+    "stripe_circuit_breaker_open",
+    "Whether the Stripe circuit breaker is open (1) or closed (0)",
+    # Open in any process means open
+    multiprocess_mode="livemax",
+)
+
+# Dependency health (updated by the readiness checks)
+dependency_up = Gauge(
+    "django_dependency_up",
+    "Whether a dependency passed its last health check",
+    ["dependency"],
+    multiprocess_mode="livemin",
+)
+
+dependency_check_latency = Gauge(
+    "django_dependency_check_seconds",
+    "Duration of the last health check of a dependency",
+    ["dependency"],
+    multiprocess_mode="livemax",
+)
+
+# Celery task metrics (updated by celeryapp.metrics_handlers)
+celery_task_runtime = Histogram(
+    "celery_task_runtime_seconds",
+    "Celery task execution time",
+    ["task", "state"],
+    buckets=[0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0],
+)
+
+celery_task_queue_wait = Histogram(
+    "celery_task_queue_wait_seconds",
+    "Time between publishing a Celery task and a worker starting it",
+    ["task", "queue"],
+    buckets=[0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0],
+)
+
+celery_task_retries_total = Counter(
+    "celery_task_retries_total", "Total Celery task retries", ["task"]
+)
+
+celery_task_failures_total = Counter(
+    "celery_task_failures_total",
+    "Total Celery task failures",
+    ["task", "exception"],
+)
+
+# Outbound mail metrics (updated by mail.utils and mail.tasks)
+mail_messages_total = Counter(
+    "mail_messages_total",
+    "Outbound emails by outcome (enqueued, sent, retried, recovered, failed)",
+    ["outcome"],
+)
+
+mail_batch_duration = Histogram(
+    "mail_batch_send_seconds",
+    "Time to send one batch of queued emails",
+    buckets=[0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0],
+)
+
+# Websocket metrics (updated by billing.consumers and billing.realtime)
+websocket_connections = Gauge(
+    "django_websocket_connections",
+    "Open websocket connections",
+    multiprocess_mode="livesum",
+)
+
+websocket_pushes_total = Counter(
+    "django_websocket_pushes_total", "Subscription status messages pushed to sockets"
+)
+
+websocket_publishes_total = Counter(
+    "django_websocket_publishes_total",
+    "Subscription change notifications published to the channel layer",
+    ["outcome"],
+)
+
+# Log records (updated by core.log_sampling)
+log_records_total = Counter(
+    "django_log_records_total",
+    "structlog records kept or dropped by sampling and duplicate suppression",
+    ["level", "outcome"],
+)
+
 
 def get_endpoint_name(request):
-    """Extract endpoint name from Django request."""
-    try:
-        resolver_match = resolve(request.path_info)
-        if resolver_match.view_name:
-            return resolver_match.view_name
-        elif hasattr(resolver_match.func, "__name__"):
-            return resolver_match.func.__name__
-        else:
-            return "unknown"
-    except Exception:
+    """
+    Extract endpoint name from Django request.
+
+    Uses the match Django stored while routing the request. Requests that did
+    not resolve (404s) are all reported as "unknown" rather than by path.
+    """
+    resolver_match = getattr(request, "resolver_match", None)
+    if resolver_match is None:
         return "unknown"
+    if resolver_match.view_name:
+        return resolver_match.view_name
+    return getattr(resolver_match.func, "__name__", "unknown")
 
 
 def update_active_users(count):
@@ -84,3 +185,207 @@ def track_cache_operation(operation, key_prefix):
     cache_operations_total.labels(
         operation=operation, cache_key_prefix=key_prefix
     ).inc()
+
+
+def track_stripe_call(operation, outcome, duration=None):
+    """Track a Stripe API call; `outcome` is "success" or the error type."""
+    if duration is not None:
+        stripe_api_request_duration.labels(
+            operation=operation,
+            outcome="success" if outcome == "success" else "error",
+        ).observe(duration)
+    if outcome != "success":
+        stripe_api_errors_total.labels(operation=operation, error_type=outcome).inc()
+
+
+def update_stripe_circuit_breaker(is_open):
+    """Update the Stripe circuit breaker gauge."""
+    stripe_circuit_breaker_open.set(1 if is_open else 0)
+
+
+def update_dependency_health(dependency, healthy, latency):
+    """Update dependency health gauges."""
+    dependency_up.labels(dependency=dependency).set(1 if healthy else 0)
+    dependency_check_latency.labels(dependency=dependency).set(latency)
+
+
+def track_task_runtime(task, state, duration):
+    """Track Celery task runtime."""
+    celery_task_runtime.labels(task=task, state=state).observe(duration)
+
+
+def track_task_queue_wait(task, queue, duration):
+    """Track time a Celery task spent waiting in its queue."""
+    celery_task_queue_wait.labels(task=task, queue=queue).observe(duration)
+
+
+def track_task_retry(task):
+    """Track Celery task retries."""
+    celery_task_retries_total.labels(task=task).inc()
+
+
+def track_task_failure(task, exception):
+    """Track Celery task failures."""
+    celery_task_failures_total.labels(task=task, exception=exception).inc()
+
+
+def track_mail_messages(outcome, count=1):
+    """Track outbound emails."""
+    if count:
+        mail_messages_total.labels(outcome=outcome).inc(count)
+
+
+def track_mail_batch(duration):
+    """Track the time to send a batch of queued emails."""
+    mail_batch_duration.observe(duration)
+
+
+def track_websocket_connection(opened):
+    """Track open websocket connections."""
+    if opened:
+        websocket_connections.inc()
+    else:
+        websocket_connections.dec()
+
+
+def track_websocket_push():
+    """Track status messages pushed to websockets."""
+    websocket_pushes_total.inc()
+
+
+def track_websocket_publish(outcome):
+    """Track subscription change notifications."""
+    websocket_publishes_total.labels(outcome=outcome).inc()
+
+
+def track_log_record(level, outcome):
+    """Track a log record; `outcome` is "kept", "sampled" or "duplicate"."""
+    log_records_total.labels(level=level, outcome=outcome).inc()
+
+
+class DatabasePoolCollector:
+    """
+    Expose psycopg connection pool usage for databases with `OPTIONS["pool"]`.
+
+    Gauges are read from `pool.get_stats()` at scrape time, so they reflect
+    the pool of the process serving the scrape.
+    """
+
+    def describe(self):
+        # Without describe(), registering would collect, building the pools
+        return self.metric_families()
+
+    def metric_families(self):
+        size = GaugeMetricFamily(
+            "django_db_pool_size", "Connections currently in the pool", labels=["alias"]
+        )
+        available = GaugeMetricFamily(
+            "django_db_pool_available",
+            "Idle connections available in the pool",
+            labels=["alias"],
+        )
+        max_size = GaugeMetricFamily(
+            "django_db_pool_max_size", "Maximum pool size", labels=["alias"]
+        )
+        waiting = GaugeMetricFamily(
+            "django_db_pool_requests_waiting",
+            "Requests waiting for a connection",
+            labels=["alias"],
+        )
+        timeouts = CounterMetricFamily(
+            "django_db_pool_requests_errors",
+            "Requests that timed out waiting for a connection",
+            labels=["alias"],
+        )
+        return [size, available, max_size, waiting, timeouts]
+
+    def collect(self):
+        from django.db import connections
+
+        families = self.metric_families()
+        size, available, max_size, waiting, timeouts = families
+        for alias in connections:
+            if not connections.settings[alias].get("OPTIONS", {}).get("pool"):
+                continue
+            stats = connections[alias].pool.get_stats()
+            size.add_metric([alias], stats.get("pool_size", 0))
+            available.add_metric([alias], stats.get("pool_available", 0))
+            max_size.add_metric([alias], stats.get("pool_max", 0))
+            waiting.add_metric([alias], stats.get("requests_waiting", 0))
+            timeouts.add_metric([alias], stats.get("requests_errors", 0))
+
+        yield from families
+
+
+class CeleryQueueLengthCollector:
+    """
+    Expose the number of messages waiting in each Celery queue.
+
+    Read at scrape time with one pipelined LLEN per queue and priority level
+    on the Redis broker, plus the mail outbox. Every target serving this
+    reports the same values, so aggregate with max by (queue).
+    """
+
+    # kombu's Redis transport keeps one list per priority step
+    PRIORITY_SEPARATOR = "\x06\x16"
+    PRIORITY_STEPS = (3, 6, 9)
+
+    def __init__(self):
+        self._client = None
+
+    def get_client(self):
+        if self._client is None:
+            import redis
+            from celeryapp.celery import app
+
+            self._client = redis.Redis.from_url(
+                app.conf.broker_url, socket_connect_timeout=1, socket_timeout=1
+            )
+        return self._client
+
+    def describe(self):
+        # Without describe(), registering would collect, calling the broker
+        return [
+            self.queue_length_family(),
+            GaugeMetricFamily("mail_outbox_length", "Emails waiting in the outbox"),
+        ]
+
+    def queue_length_family(self):
+        return GaugeMetricFamily(
+            "celery_queue_length",
+            "Messages waiting in a Celery queue",
+            labels=["queue"],
+        )
+
+    def collect(self):
+        from celeryapp.celery import app
+        from mail.outbox import OUTBOX_KEY
+
+        queue_length = self.queue_length_family()
+
+        queues = sorted(app.amqp.queues)
+        try:
+            pipeline = self.get_client().pipeline(transaction=False)
+            for queue in queues:
+                pipeline.llen(queue)
+                for priority in self.PRIORITY_STEPS:
+                    pipeline.llen(f"{queue}{self.PRIORITY_SEPARATOR}{priority}")
+            pipeline.llen(OUTBOX_KEY)
+            *lengths, outbox_length = pipeline.execute()
+        except Exception:
+            # Broker unreachable, readiness checks report it
+            return
+
+        per_queue = len(self.PRIORITY_STEPS) + 1
+        for i, queue in enumerate(queues):
+            queue_length.add_metric(
+                [queue], sum(lengths[i * per_queue : (i + 1) * per_queue])
+            )
+        yield queue_length
+        yield GaugeMetricFamily(
+            "mail_outbox_length", "Emails waiting in the outbox", value=outbox_length
+        )
+
+
+REGISTRY.register(DatabasePoolCollector())
+REGISTRY.register(CeleryQueueLengthCollector())
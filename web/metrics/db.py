@@ -0,0 +1,62 @@
+"""
+Database query metrics.
+
+`db_metrics_wrapper` is installed as an execute wrapper on every new database
+connection and records each query in `db_operation_duration`. Labels are kept
+bounded: the operation is one of `OPERATIONS` and the table is a known model
+table, or "other".
+"""
+
+import re
+import time
+from functools import lru_cache
+
+from django.apps import apps
+
+from .collectors import track_db_operation
+
+OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+TABLE_PATTERN = re.compile(
+    r'\b(?:FROM|INTO|UPDATE)\s+"?([A-Za-z0-9_]+)"?', re.IGNORECASE
+)
+
+
+@lru_cache(maxsize=1)
+def get_known_tables():
+    return frozenset(model._meta.db_table for model in apps.get_models())
+
+
+@lru_cache(maxsize=2048)
+def classify_sql(sql):
+    """
+    Return the `(operation, table)` labels for a SQL statement
+
+    Queries are parametrized, so the same statement repeats and the cache
+    keeps the regex off the hot path.
+    """
+    operation = sql.lstrip()[:6].upper()
+    if operation not in OPERATIONS:
+        operation = "OTHER"
+
+    match = TABLE_PATTERN.search(sql)
+    table = match.group(1) if match else None
+    if table not in get_known_tables():
+        table = "other"
+
+    return operation, table
+
+
+def db_metrics_wrapper(execute, sql, params, many, context):
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        operation, table = classify_sql(sql)
+        track_db_operation(operation, table, time.perf_counter() - start)
+
+
+def install_db_metrics(sender, connection, **kwargs):
+    """`connection_created` receiver adding `db_metrics_wrapper` once"""
+    if db_metrics_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(db_metrics_wrapper)
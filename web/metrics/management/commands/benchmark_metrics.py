@@ -0,0 +1,69 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import resolve
+from metrics.db import classify_sql, db_metrics_wrapper
+from metrics.middleware import EndpointMetricsMiddleware
+
+SQL = (
+    'SELECT "stripe_subscription"."id", "stripe_subscription"."status" '
+    'FROM "stripe_subscription" WHERE "stripe_subscription"."customer_id" = %s'
+)
+
+
+class Command(BaseCommand):
+    help = "Measure the per-request overhead of the metrics middleware and DB wrapper"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=100000,
+            help="Calls per measurement (default: 100000)",
+        )
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+
+        request = RequestFactory().get("/api/stripe/prices/")
+        request.resolver_match = resolve("/api/stripe/prices/")
+        response = HttpResponse()
+
+        def view(request):
+            return response
+
+        middleware = EndpointMetricsMiddleware(view)
+        self.report("middleware", self.measure(view, middleware, request, iterations))
+
+        def execute(sql, params, many, context):
+            return None
+
+        def wrapped(sql):
+            return db_metrics_wrapper(execute, sql, None, False, None)
+
+        def unwrapped(sql):
+            return execute(sql, None, False, None)
+
+        classify_sql.cache_clear()
+        self.report("db wrapper", self.measure(unwrapped, wrapped, SQL, iterations))
+
+    def measure(self, baseline, instrumented, arg, iterations):
+        # Warm up caches and metric children before timing
+        instrumented(arg)
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            baseline(arg)
+        baseline_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            instrumented(arg)
+        instrumented_time = time.perf_counter() - start
+
+        return (instrumented_time - baseline_time) / iterations
+
+    def report(self, name, overhead):
+        self.stdout.write(f"{name}: {overhead * 1_000_000:.2f} µs overhead per call")
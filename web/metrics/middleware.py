@@ -0,0 +1,49 @@
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from .collectors import endpoint_response_time, get_endpoint_name
+
+# Anything else is reported as "other" to keep label cardinality bounded
+HTTP_METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+
+class EndpointMetricsMiddleware:
+    """
+    Observe `endpoint_response_time` for every request
+
+    Uses the `resolver_match` Django already attached to the request, so the
+    URL is not resolved a second time. Works with both sync and async views.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        start = perf_counter()
+        response = self.get_response(request)
+        self.observe(request, response, perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        start = perf_counter()
+        response = await self.get_response(request)
+        self.observe(request, response, perf_counter() - start)
+        return response
+
+    def observe(self, request, response, duration):
+        method = request.method if request.method in HTTP_METHODS else "other"
+        endpoint_response_time.labels(
+            endpoint_name=get_endpoint_name(request),
+            method=method,
+            status_code=response.status_code,
+        ).observe(duration)
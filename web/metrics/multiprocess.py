@@ -0,0 +1,174 @@
+"""
+Multiprocess Prometheus collection.
+
+With `PROMETHEUS_MULTIPROC_DIR` set, prometheus_client keeps every metric in
+per-process mmap files in that directory, and a scrape merges the files of all
+processes (Daphne workers, Celery pool processes) sharing it.
+
+Counter, histogram and summary files of dead processes must be kept, or totals
+would go backwards, so without cleanup the number of files (and the scrape
+time) grows with every recycled worker. Before collecting, the files of dead
+processes are therefore folded into one archive file per metric type, at most
+once every `METRICS_COMPACT_INTERVAL_SECONDS`. Live gauges of dead processes
+are dropped.
+"""
+
+import fcntl
+import glob
+import os
+import time
+from contextlib import contextmanager
+
+import structlog
+from django.conf import settings
+from prometheus_client import CollectorRegistry
+from prometheus_client.mmap_dict import MmapedDict, mmap_key
+from prometheus_client.multiprocess import MultiProcessCollector, mark_process_dead
+
+from .collectors import CeleryQueueLengthCollector, DatabasePoolCollector
+
+logger = structlog.get_logger(__name__)
+
+# Metric types whose values must survive the process that wrote them
+COMPACTED_TYPES = ("counter", "histogram", "summary")
+
+ARCHIVE_PID = "archive"
+
+_registry = None
+
+
+def is_multiprocess():
+    return bool(settings.PROMETHEUS_MULTIPROC_DIR)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _file_pid(path, prefix):
+    """The pid a `{prefix}_{pid}.db` file belongs to, or None"""
+    pid = os.path.basename(path)[len(prefix) + 1 : -len(".db")]
+    return int(pid) if pid.isdigit() else None
+
+
+@contextmanager
+def _directory_lock(path, exclusive):
+    """Serialise compaction against scrapes from other processes"""
+    with open(os.path.join(path, ".lock"), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _write_archive(path, metrics):
+    archive = MmapedDict(path)
+    try:
+        for metric in metrics:
+            for sample in metric.samples:
+                key = mmap_key(
+                    metric.name,
+                    sample.name,
+                    list(sample.labels),
+                    list(sample.labels.values()),
+                    metric.documentation,
+                )
+                archive.write_value(key, sample.value, 0)
+    finally:
+        archive.close()
+
+
+def compact_dead_processes(path):
+    """
+    Fold the metric files of dead processes into per-type archive files
+
+    Returns:
+        int: Number of process files removed
+    """
+    removed = 0
+    with _directory_lock(path, exclusive=True):
+        dead_pids = set()
+
+        for typ in COMPACTED_TYPES:
+            dead_files = []
+            for file_path in glob.glob(os.path.join(path, f"{typ}_*.db")):
+                pid = _file_pid(file_path, typ)
+                if pid is not None and not _pid_alive(pid):
+                    dead_files.append(file_path)
+                    dead_pids.add(pid)
+            if not dead_files:
+                continue
+
+            archive_path = os.path.join(path, f"{typ}_{ARCHIVE_PID}.db")
+            files = dead_files
+            if os.path.exists(archive_path):
+                files = [archive_path] + dead_files
+
+            metrics = MultiProcessCollector.merge(files, accumulate=False)
+            # Swap the archive in atomically, it does not match *.db until then
+            _write_archive(f"{archive_path}.tmp", metrics)
+            os.replace(f"{archive_path}.tmp", archive_path)
+
+            for file_path in dead_files:
+                os.remove(file_path)
+            removed += len(dead_files)
+
+        for file_path in glob.glob(os.path.join(path, "gauge_live*_*.db")):
+            pid = os.path.basename(file_path).rsplit("_", 1)[1][: -len(".db")]
+            if pid.isdigit() and not _pid_alive(int(pid)):
+                dead_pids.add(int(pid))
+
+        for pid in dead_pids:
+            mark_process_dead(pid, path)
+
+    if removed:
+        logger.info("Compacted metrics of dead processes", files=removed)
+    return removed
+
+
+class CompactingMultiProcessCollector(MultiProcessCollector):
+    """`MultiProcessCollector` that compacts dead process files first"""
+
+    def __init__(self, registry, path=None, compact_interval=60):
+        super().__init__(registry, path)
+        self.compact_interval = compact_interval
+        self._compacted_at = None
+
+    def collect(self):
+        now = time.monotonic()
+        if self._compacted_at is None or now - self._compacted_at >= (
+            self.compact_interval
+        ):
+            self._compacted_at = now
+            try:
+                compact_dead_processes(self._path)
+            except Exception as e:
+                # Scrapes still work, just with more files to merge
+                logger.error("Metrics compaction failed", error=str(e))
+
+        with _directory_lock(self._path, exclusive=False):
+            return list(super().collect())
+
+
+def get_registry():
+    """Return the registry merging the metrics of every process"""
+    global _registry
+    if _registry is None:
+        registry = CollectorRegistry()
+        CompactingMultiProcessCollector(
+            registry,
+            settings.PROMETHEUS_MULTIPROC_DIR,
+            compact_interval=settings.METRICS_COMPACT_INTERVAL_SECONDS,
+        )
+        # Pool usage is read live and only covers the process serving the scrape
+        registry.register(DatabasePoolCollector())
+        registry.register(CeleryQueueLengthCollector())
+        _registry = registry
+    return _registry
@@ -0,0 +1,114 @@
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from django.urls import resolve
+from metrics.collectors import db_operation_duration, endpoint_response_time
+from metrics.db import classify_sql, install_db_metrics
+from metrics.middleware import EndpointMetricsMiddleware
+from metrics.multiprocess import compact_dead_processes
+from prometheus_client import REGISTRY, CollectorRegistry
+from prometheus_client.mmap_dict import MmapedDict, mmap_key
+from prometheus_client.multiprocess import MultiProcessCollector
+
+
+def sample_count(metric, **labels):
+    name = f"{metric._name}_count"
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class EndpointMetricsMiddlewareTest(TestCase):
+    def test_uses_resolver_match(self):
+        request = RequestFactory().get("/api/stripe/prices/")
+        request.resolver_match = resolve("/api/stripe/prices/")
+        labels = {
+            "endpoint_name": "stripe:prices",
+            "method": "GET",
+            "status_code": "200",
+        }
+        before = sample_count(endpoint_response_time, **labels)
+
+        EndpointMetricsMiddleware(lambda request: HttpResponse())(request)
+
+        self.assertEqual(sample_count(endpoint_response_time, **labels), before + 1)
+
+    def test_unresolved_requests_share_one_label(self):
+        labels = {"endpoint_name": "unknown", "method": "GET", "status_code": "404"}
+        before = sample_count(endpoint_response_time, **labels)
+
+        self.client.get("/api/does-not-exist/")
+
+        self.assertEqual(sample_count(endpoint_response_time, **labels), before + 1)
+
+
+class DatabaseMetricsTest(TestCase):
+    def test_classify_sql(self):
+        self.assertEqual(
+            classify_sql('SELECT "stripe_product"."id" FROM "stripe_product"'),
+            ("SELECT", "stripe_product"),
+        )
+        self.assertEqual(
+            classify_sql('INSERT INTO "stripe_price" ("id") VALUES (%s)'),
+            ("INSERT", "stripe_price"),
+        )
+        self.assertEqual(classify_sql("SAVEPOINT s1"), ("OTHER", "other"))
+        self.assertEqual(
+            classify_sql("SELECT * FROM pg_class"),
+            ("SELECT", "other"),
+        )
+
+    def test_queries_are_recorded(self):
+        install_db_metrics(sender=None, connection=connection)
+        table = get_user_model()._meta.db_table
+        labels = {"operation_type": "SELECT", "table": table}
+        before = sample_count(db_operation_duration, **labels)
+
+        get_user_model().objects.count()
+
+        self.assertEqual(sample_count(db_operation_duration, **labels), before + 1)
+
+
+class MultiprocessCompactionTest(TestCase):
+    # Far above any real pid, so never alive
+    DEAD_PIDS = (4000001, 4000002)
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+
+    def write_counter(self, pid, value):
+        values = MmapedDict(os.path.join(self.path, f"counter_{pid}.db"))
+        key = mmap_key("jobs", "jobs_total", ["queue"], ["default"], "Jobs")
+        values.write_value(key, value, 0)
+        values.close()
+
+    def collect_total(self):
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry, self.path)
+        return registry.get_sample_value("jobs_total", {"queue": "default"})
+
+    def test_dead_process_files_are_folded_into_archive(self):
+        self.write_counter(os.getpid(), 1)
+        for pid in self.DEAD_PIDS:
+            self.write_counter(pid, 2)
+
+        removed = compact_dead_processes(self.path)
+
+        self.assertEqual(removed, 2)
+        self.assertEqual(
+            sorted(os.listdir(self.path)),
+            sorted([".lock", "counter_archive.db", f"counter_{os.getpid()}.db"]),
+        )
+        self.assertEqual(self.collect_total(), 5)
+
+    def test_repeated_compaction_keeps_totals(self):
+        self.write_counter(self.DEAD_PIDS[0], 2)
+        compact_dead_processes(self.path)
+        self.write_counter(self.DEAD_PIDS[1], 3)
+        compact_dead_processes(self.path)
+
+        self.assertEqual(self.collect_total(), 5)
@@ -1,8 +1,9 @@
 from django.urls import path
-from django_prometheus import exports
+
+from . import views
 
 app_name = "metrics"
 
 urlpatterns = [
-    path("", exports.ExportToDjangoView, name="prometheus-django-metrics"),
+    path("", views.metrics, name="prometheus-django-metrics"),
 ]
@@ -0,0 +1,20 @@
+from django.http import HttpResponse
+from django_prometheus.exports import ExportToDjangoView
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from .multiprocess import get_registry, is_multiprocess
+
+
+def metrics(request):
+    """
+    Prometheus metrics endpoint
+
+    Merges the metrics of all processes in multiprocess mode, otherwise
+    exports the registry of the process serving the request.
+    """
+    if not is_multiprocess():
+        return ExportToDjangoView(request)
+
+    return HttpResponse(
+        generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST
+    )
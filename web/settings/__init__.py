@@ -1,6 +1,9 @@
 import sys
 
 import settings.components.base  # noqa
+import settings.components.cache  # noqa
+import settings.components.channel_layers  # noqa
+import settings.components.database  # noqa
 import settings.components.logging_settings  # noqa
 import settings.components.mail  # noqa
 import settings.components.metrics  # noqa
@@ -11,8 +14,23 @@ import settings.components.stripe  # noqa
 import settings.components.user  # noqa
 from settings.utils import flatten_module_attributes
 
+# Only these modules are flattened into `settings`, in this order
+component_modules = [
+    "settings.components.base",
+    "settings.components.cache",
+    "settings.components.channel_layers",
+    "settings.components.database",
+    "settings.components.logging_settings",
+    "settings.components.mail",
+    "settings.components.metrics",
+    "settings.components.redis",
+    "settings.components.sentry",
+    "settings.components.spectacular",
+    "settings.components.stripe",
+    "settings.components.user",
+]
+
 flatten_module_attributes(
     module=sys.modules[__name__],
-    imports=list(sys.modules.keys()),
-    prefix="settings.",
+    imports=component_modules,
 )
@@ -1,4 +1,3 @@
-import os
 from pathlib import Path
 
 from decouple import config
@@ -7,9 +6,6 @@ ENVIRONMENT = config("ENVIRONMENT")
 SITE_BASE_DOMAIN = config("NEXT_PUBLIC_SITE_BASE_DOMAIN")
 SITE_DOMAIN = config("SITE_DOMAIN")
 SECRET_KEY = config("SECRET_KEY")
-POSTGRES_DB = config("POSTGRES_DB")
-POSTGRES_USER = config("POSTGRES_USER")
-POSTGRES_PASSWORD = config("POSTGRES_PASSWORD")
 BASE_DIR = BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
 LANGUAGE_CODE = "en-us"
@@ -26,7 +22,6 @@ STATIC_ROOT = BASE_DIR / "static"
 ASGI_APPLICATION = "web.asgi.application"
 
 INSTALLED_APPS = [
-    "daphne",
     "django_prometheus",
     "django.contrib.admin",
     "django.contrib.auth",
@@ -51,11 +46,16 @@ INSTALLED_APPS = [
     # e-mail
     "mail.apps.MailConfig",
     # stripe payments
-    "stripe.apps.StripeConfig",
+    "billing.apps.BillingConfig",
     # metrics and monitoring
     "metrics.apps.MetricsConfig",
 ]
 
+# Daphne is only installed as an app for its runserver command; production
+# runs the daphne server directly and Celery never needs it
+if ENVIRONMENT == "dev":
+    INSTALLED_APPS.insert(0, "daphne")
+
 MIDDLEWARE = [
     # django_prometheus middleware
     "django_prometheus.middleware.PrometheusBeforeMiddleware",
@@ -67,21 +67,12 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
+    # per-endpoint latency (metrics.collectors.endpoint_response_time)
+    "metrics.middleware.EndpointMetricsMiddleware",
     # django_prometheus middleware
     "django_prometheus.middleware.PrometheusAfterMiddleware",
 ]
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.postgresql",
-        "NAME": POSTGRES_DB,
-        "USER": POSTGRES_USER,
-        "PASSWORD": POSTGRES_PASSWORD,
-        "HOST": os.environ.get("POSTGRES_HOST", "postgres"),
-        "PORT": 5432,
-    }
-}
-
 USE_TZ = True
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
@@ -143,3 +134,8 @@ TEMPLATES = [
         },
     },
 ]
+
+# Readiness checks (see core/health.py): per-dependency timeout and how long
+# results are reused across probes
+HEALTHCHECK_TIMEOUT = config("HEALTHCHECK_TIMEOUT", default=2, cast=float)
+HEALTHCHECK_CACHE_SECONDS = config("HEALTHCHECK_CACHE_SECONDS", default=5, cast=float)
@@ -0,0 +1,45 @@
+import os
+
+from settings.components.redis import (
+    REDIS_CACHE_DB,
+    REDIS_HOST,
+    REDIS_PASSWORD,
+    REDIS_PORT,
+    REDIS_SESSION_DB,
+)
+
+# Connections per process in each cache's redis-py pool
+CACHE_POOL_MAX_CONNECTIONS = int(os.environ.get("CACHE_POOL_MAX_CONNECTIONS", "20"))
+# Seconds a pooled connection may sit idle before it is pinged on checkout
+CACHE_HEALTH_CHECK_INTERVAL = int(os.environ.get("CACHE_HEALTH_CHECK_INTERVAL", "30"))
+
+
+def _redis_cache(db):
+    return {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": f"redis://{REDIS_HOST}:{REDIS_PORT}/{db}",
+        "OPTIONS": {
+            "PASSWORD": REDIS_PASSWORD,
+            "SOCKET_CONNECT_TIMEOUT": 1,
+            "SOCKET_TIMEOUT": 1,
+            "CONNECTION_POOL_KWARGS": {
+                "max_connections": CACHE_POOL_MAX_CONNECTIONS,
+                "health_check_interval": CACHE_HEALTH_CHECK_INTERVAL,
+                "retry_on_timeout": True,
+            },
+            # Treat an unavailable cache as a miss instead of failing requests
+            "IGNORE_EXCEPTIONS": True,
+        },
+    }
+
+
+CACHES = {
+    "default": _redis_cache(REDIS_CACHE_DB),
+    "sessions": _redis_cache(REDIS_SESSION_DB),
+}
+
+# Sessions are read from Redis and written through to the django_session
+# table, so a cache miss or a Redis outage falls back to Postgres instead of
+# logging users out. Expired rows are deleted by core.tasks.clear_expired_sessions.
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+SESSION_CACHE_ALIAS = "sessions"
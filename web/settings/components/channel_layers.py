@@ -0,0 +1,23 @@
+from settings.components.redis import (
+    REDIS_CHANNELS_DB,
+    REDIS_HOST,
+    REDIS_PASSWORD,
+    REDIS_PORT,
+)
+
+# Channels layer carrying pushes from Celery workers to websocket consumers
+# in Daphne (see billing/realtime.py). Pub/sub delivers group messages without
+# per-channel lists in Redis, so idle sockets cost Redis nothing.
+CHANNEL_LAYERS = {
+    "default": {
+        "BACKEND": "channels_redis.pubsub.RedisPubSubChannelLayer",
+        "CONFIG": {
+            "hosts": [
+                {
+                    "address": f"redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_CHANNELS_DB}",
+                    "password": REDIS_PASSWORD,
+                }
+            ],
+        },
+    }
+}
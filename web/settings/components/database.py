@@ -0,0 +1,56 @@
+import os
+
+from decouple import config
+
+POSTGRES_DB = config("POSTGRES_DB")
+POSTGRES_USER = config("POSTGRES_USER")
+POSTGRES_PASSWORD = config("POSTGRES_PASSWORD")
+POSTGRES_HOST = os.environ.get("POSTGRES_HOST", "postgres")
+POSTGRES_PORT = int(os.environ.get("POSTGRES_PORT", "5432"))
+
+# Persistent connections: reuse a connection for up to DB_CONN_MAX_AGE seconds
+# instead of reconnecting on every request/task (0 closes it after each one)
+DB_CONN_MAX_AGE = int(os.environ.get("DB_CONN_MAX_AGE", "60"))
+DB_CONN_HEALTH_CHECKS = (
+    os.environ.get("DB_CONN_HEALTH_CHECKS", "True").lower() == "true"
+)
+
+# psycopg3 connection pool, one per process. Replaces persistent connections.
+DB_POOL_ENABLED = os.environ.get("DB_POOL_ENABLED", "False").lower() == "true"
+DB_POOL_MIN_SIZE = int(os.environ.get("DB_POOL_MIN_SIZE", "2"))
+DB_POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", "10"))
+# Seconds a request waits for a free connection before failing
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "10"))
+# Seconds an idle connection above DB_POOL_MIN_SIZE is kept open
+DB_POOL_MAX_IDLE = float(os.environ.get("DB_POOL_MAX_IDLE", "300"))
+
+# Connecting through PgBouncer in transaction pooling mode: server-side
+# cursors and prepared statements do not survive across transactions
+DB_PGBOUNCER = os.environ.get("DB_PGBOUNCER", "False").lower() == "true"
+
+DB_OPTIONS = {}
+if DB_POOL_ENABLED:
+    DB_OPTIONS["pool"] = {
+        "min_size": DB_POOL_MIN_SIZE,
+        "max_size": DB_POOL_MAX_SIZE,
+        "timeout": DB_POOL_TIMEOUT,
+        "max_idle": DB_POOL_MAX_IDLE,
+    }
+if DB_PGBOUNCER:
+    DB_OPTIONS["prepare_threshold"] = None
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": POSTGRES_DB,
+        "USER": POSTGRES_USER,
+        "PASSWORD": POSTGRES_PASSWORD,
+        "HOST": POSTGRES_HOST,
+        "PORT": POSTGRES_PORT,
+        # Django does not allow persistent connections together with a pool
+        "CONN_MAX_AGE": 0 if DB_POOL_ENABLED else DB_CONN_MAX_AGE,
+        "CONN_HEALTH_CHECKS": DB_CONN_HEALTH_CHECKS,
+        "DISABLE_SERVER_SIDE_CURSORS": DB_PGBOUNCER,
+        "OPTIONS": DB_OPTIONS,
+    }
+}
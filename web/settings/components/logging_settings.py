@@ -1,19 +1,47 @@
 import logging
 import logging.config
-import sys
 
 import structlog
+from core.log_pipeline import orjson_dumps
+from core.log_sampling import LogSampler, parse_sample_rates
 from decouple import config
 
 LOG_LEVEL = config("LOG_LEVEL", "INFO")
 logging.root.setLevel(LOG_LEVEL)
 
+# Nothing rendered uses the caller's file and line or the thread name, so log
+# calls skip collecting them (see "Optimization" in the logging docs)
+logging._srcfile = None
+logging.logThreads = False
+
+# Sampling of high-volume events (see core/log_sampling.py): the fraction of
+# records kept per event, e.g. "Received webhook event=0.1,Payment succeeded=0.5"
+LOG_SAMPLE_RATES = config("LOG_SAMPLE_RATES", default="", cast=parse_sample_rates)
+# Identical records within this many seconds are collapsed into one (0: off)
+LOG_DEDUP_WINDOW_SECONDS = config("LOG_DEDUP_WINDOW_SECONDS", default=0, cast=float)
+# Records at this level and above are never sampled or collapsed
+LOG_ALWAYS_KEEP_LEVEL = config("LOG_ALWAYS_KEEP_LEVEL", default="WARNING")
+
+# Processors also applied to records from stdlib loggers (Django, Celery, ...)
+# before rendering, so every line has the same shape
+FOREIGN_PRE_CHAIN = [
+    structlog.stdlib.add_logger_name,
+    structlog.stdlib.add_log_level,
+    structlog.processors.format_exc_info,
+    structlog.processors.TimeStamper(fmt="iso"),
+]
+
 # Configure Structlog to Work with Django Logs
 structlog.configure(
     processors=[
         structlog.stdlib.filter_by_level,  # Ensures logs are filtered by log level
         structlog.stdlib.add_logger_name,  # Adds the logger name to each log entry
         structlog.stdlib.add_log_level,  # Adds log level to structured logs
+        LogSampler(  # Drops sampled and duplicate records before rendering
+            sample_rates=LOG_SAMPLE_RATES,
+            dedup_window=LOG_DEDUP_WINDOW_SECONDS,
+            always_keep_level=LOG_ALWAYS_KEEP_LEVEL,
+        ),
         structlog.stdlib.PositionalArgumentsFormatter(),  # Ensures args are formatted correctly
         structlog.processors.StackInfoRenderer(),  # Adds stack info to logs
         structlog.processors.format_exc_info,  # Formats exception logs properly
@@ -32,13 +60,15 @@ LOGGING = {
     "formatters": {
         "json_formatter": {
             "()": structlog.stdlib.ProcessorFormatter,
-            "processor": structlog.processors.JSONRenderer(),
+            "processor": structlog.processors.JSONRenderer(serializer=orjson_dumps),
+            "foreign_pre_chain": FOREIGN_PRE_CHAIN,
         }
     },
     "handlers": {
+        # Renders and writes on a background thread (see core/log_pipeline.py)
         "console": {
-            "class": "logging.StreamHandler",
-            "stream": sys.stdout,
+            "()": "core.log_pipeline.BackgroundStreamHandler",
+            "stream": "ext://sys.stdout",
             "formatter": "json_formatter",
         },
     },
@@ -14,6 +14,8 @@ if config("ENVIRONMENT", default=False) == "prod":
     EMAIL_HOST_USER = config("EMAIL_HOST_USER", "")  # SendGrid username or Gmail email
     EMAIL_HOST_PASSWORD = config("EMAIL_HOST_PASSWORD", "")  # SG pass or Gmail app pass
     EMAIL_USE_TLS = True
+    # Bound SMTP calls so an unresponsive server cannot hang a mail worker
+    EMAIL_TIMEOUT = 10
 
 else:
     logger.warning("mail module running in development mode.")
@@ -22,3 +24,42 @@ else:
     EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
     EMAIL_FILE_PATH = "/app/mail/dummy-mail/"
     EMAIL_USE_TLS = False
+
+# Templated emails (see mail/rendering.py): locale used when an email has no
+# templates in the requested one
+MAIL_DEFAULT_LOCALE = "en"
+# Linked from billing notices
+MAIL_BILLING_URL = config(
+    "MAIL_BILLING_URL",
+    default=f"{config('NEXT_PUBLIC_SITE_BASE_DOMAIN', default='')}/billing",
+)
+
+# Outbound mail queue (see mail/outbox.py). Off by default outside production,
+# where the file backend is cheap enough to call inline.
+MAIL_QUEUE_ENABLED = config(
+    "MAIL_QUEUE_ENABLED",
+    default=config("ENVIRONMENT", default="") == "prod",
+    cast=bool,
+)
+# Messages sent per outbox read
+MAIL_BATCH_SIZE = config("MAIL_BATCH_SIZE", default=50, cast=int)
+# Per worker process; 0 disables the limit
+MAIL_RATE_LIMIT_PER_SECOND = config(
+    "MAIL_RATE_LIMIT_PER_SECOND", default=10, cast=float
+)
+# Seconds a flush waits after the first enqueue, to collect a batch
+MAIL_FLUSH_DELAY_SECONDS = config("MAIL_FLUSH_DELAY_SECONDS", default=1, cast=int)
+# Upper bound on how long a scheduled flush blocks scheduling another one
+MAIL_FLUSH_LOCK_SECONDS = config("MAIL_FLUSH_LOCK_SECONDS", default=300, cast=int)
+# How long a batch being sent stays claimed without progress before another
+# flush puts it back in the outbox; must outlast sending one message
+MAIL_PROCESSING_LEASE_SECONDS = config(
+    "MAIL_PROCESSING_LEASE_SECONDS", default=120, cast=int
+)
+# Delivery attempts per message before it is dropped
+MAIL_MAX_ATTEMPTS = config("MAIL_MAX_ATTEMPTS", default=5, cast=int)
+# Exponential backoff with full jitter between failed flushes
+MAIL_RETRY_BACKOFF_SECONDS = config("MAIL_RETRY_BACKOFF_SECONDS", default=30, cast=int)
+MAIL_RETRY_BACKOFF_MAX_SECONDS = config(
+    "MAIL_RETRY_BACKOFF_MAX_SECONDS", default=900, cast=int
+)
@@ -1,4 +1,26 @@
+import os
+
 # Django Prometheus metrics configuration
 
-# django_prometheus uses standard configuration
-# No custom settings needed - it provides automatic metrics collection
+# django_prometheus uses standard configuration and provides automatic
+# metrics collection; the settings below control the custom collectors
+
+# Record every query in django_db_operation_seconds (see metrics/db.py)
+METRICS_TRACK_DB_OPERATIONS = (
+    os.environ.get("METRICS_TRACK_DB_OPERATIONS", "True").lower() == "true"
+)
+
+# Shared directory for multiprocess metrics (one per pod, shared by all Daphne
+# and Celery processes). Must be set in the environment before startup, since
+# prometheus_client reads it when metrics are created.
+PROMETHEUS_MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR", "")
+if PROMETHEUS_MULTIPROC_DIR:
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+# How often a scrape folds the metric files of dead processes into an archive
+METRICS_COMPACT_INTERVAL_SECONDS = int(
+    os.environ.get("METRICS_COMPACT_INTERVAL_SECONDS", "60")
+)
+
+# Port of the metrics endpoint served by each Celery worker
+CELERY_METRICS_PORT = int(os.environ.get("CELERY_METRICS_PORT", "9808"))
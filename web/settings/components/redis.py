@@ -2,3 +2,13 @@ import os
 
 REDIS_PASSWORD = os.environ.get("REDIS_PASSWORD", "solsecretpassredis")
 REDIS_HOST = os.environ.get("REDIS_HOST", "redis")
+REDIS_PORT = int(os.environ.get("REDIS_PORT", "6379"))
+
+# Logical databases, one per use, so a cache flush or eviction never touches
+# the broker or the beat schedule. The broker/result (0) and redbeat (1)
+# databases are read by celeryapp.celery_config from the same variables.
+REDIS_BROKER_DB = int(os.environ.get("REDIS_BROKER_DB", "0"))
+REDIS_REDBEAT_DB = int(os.environ.get("REDIS_REDBEAT_DB", "1"))
+REDIS_CACHE_DB = int(os.environ.get("REDIS_CACHE_DB", "2"))
+REDIS_SESSION_DB = int(os.environ.get("REDIS_SESSION_DB", "3"))
+REDIS_CHANNELS_DB = int(os.environ.get("REDIS_CHANNELS_DB", "4"))
@@ -1,15 +1,7 @@
-import logging
-import os
-
-import sentry_sdk
-import structlog
 from decouple import config
-from sentry_sdk.integrations.celery import CeleryIntegration
-from sentry_sdk.integrations.django import DjangoIntegration
-from sentry_sdk.integrations.logging import LoggingIntegration
-from sentry_sdk.integrations.redis import RedisIntegration
 
-logger = structlog.get_logger(__name__)
+# sentry_sdk is imported and initialized by core.sentry.configure_sentry()
+# from CoreConfig.ready(), and only when a DSN is set
 
 # Sentry Configuration
 SENTRY_DSN = config("SENTRY_DSN", default="")
@@ -17,6 +9,10 @@ SENTRY_ENVIRONMENT = config(
     "SENTRY_ENVIRONMENT", default=config("ENVIRONMENT", "development")
 )
 
+# Log records at this level and above are attached to events as breadcrumbs.
+# Records dropped by log sampling (LOG_SAMPLE_RATES) never become breadcrumbs.
+SENTRY_BREADCRUMB_LEVEL = config("SENTRY_BREADCRUMB_LEVEL", default="INFO")
+
 # Event filtering
 SENTRY_IGNORE_ERRORS = [
     "django.security.DisallowedHost",
@@ -56,82 +52,7 @@ SENTRY_SCRUB_FIELDS = [
     "pin",
 ]
 
-# Integrations configuration
-sentry_logging = LoggingIntegration(
-    level=logging.INFO,  # Capture all INFO-level logs and above
-    event_level=logging.ERROR,  # Send only ERROR-level logs to Sentry
+# Continuous profiling starts a sampling thread in every process
+SENTRY_PROFILING_ENABLED = (
+    config("SENTRY_PROFILING_ENABLED", default="True").lower() == "true"
 )
-
-django_integration = DjangoIntegration(
-    transaction_style="url",
-    middleware_spans=True,
-    signals_spans=True,
-    cache_spans=True,
-)
-
-celery_integration = CeleryIntegration(
-    monitor_beat_tasks=True,
-    propagate_traces=True,
-)
-
-redis_integration = RedisIntegration()
-
-
-def configure_sentry():
-    """Initialize Sentry for error tracking and performance monitoring."""
-    if not SENTRY_DSN:
-        logger.warning("Sentry DSN not set, skipping Sentry setup.")
-        return False
-
-    try:
-        sentry_sdk.init(
-            dsn=SENTRY_DSN,
-            environment=SENTRY_ENVIRONMENT,
-            # Integrations
-            integrations=[
-                django_integration,
-                celery_integration,
-                redis_integration,
-                sentry_logging,
-            ],
-            _experiments={
-                "continuous_profiling_auto_start": True,
-            },
-            ignore_errors=SENTRY_IGNORE_ERRORS,
-            shutdown_timeout=10,
-            include_source_context=True,
-        )
-
-        # Set user context if available
-        from django.contrib.auth import get_user_model
-
-        get_user_model()
-
-        # Configure scope defaults
-        with sentry_sdk.configure_scope() as scope:
-            scope.set_tag("app", "sol-web")
-            scope.set_context(
-                "app_info",
-                {
-                    "environment": SENTRY_ENVIRONMENT,
-                    "python_version": os.sys.version,
-                },
-            )
-
-        return True
-
-    except Exception as e:
-        logger.error(f"Failed to configure Sentry: {str(e)}")
-        return False
-
-
-# Initialize Sentry
-ENVIRONMENT = config("ENVIRONMENT", "dev")
-
-if ENVIRONMENT != "dev":
-    sentry_configured = configure_sentry()
-else:
-    logger.info(
-        "Sentry initialization skipped",
-        environment=ENVIRONMENT,
-    )
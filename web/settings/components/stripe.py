@@ -8,6 +8,18 @@ STRIPE_WEBHOOK_SECRET = os.environ.get("STRIPE_WEBHOOK_SECRET", "")
 # Stripe Configuration
 STRIPE_LIVE_MODE = os.environ.get("STRIPE_LIVE_MODE", "False").lower() == "true"
 
+# Stripe API client (one pooled client per process, see billing/client.py)
+STRIPE_API_BASE = os.environ.get("STRIPE_API_BASE", "")
+STRIPE_HTTP_TIMEOUT = float(os.environ.get("STRIPE_HTTP_TIMEOUT", "10"))
+STRIPE_HTTP_CONNECT_TIMEOUT = float(os.environ.get("STRIPE_HTTP_CONNECT_TIMEOUT", "3"))
+STRIPE_HTTP_POOL_SIZE = int(os.environ.get("STRIPE_HTTP_POOL_SIZE", "10"))
+STRIPE_MAX_NETWORK_RETRIES = int(os.environ.get("STRIPE_MAX_NETWORK_RETRIES", "2"))
+STRIPE_CIRCUIT_BREAKER_FAILURE_THRESHOLD = int(
+    os.environ.get("STRIPE_CIRCUIT_BREAKER_FAILURE_THRESHOLD", "5")
+)
+STRIPE_CIRCUIT_BREAKER_RESET_SECONDS = int(
+    os.environ.get("STRIPE_CIRCUIT_BREAKER_RESET_SECONDS", "30")
+)
 
 # Subscription settings
 STRIPE_TRIAL_PERIOD_DAYS = int(os.environ.get("STRIPE_TRIAL_PERIOD_DAYS", "30"))
@@ -23,3 +35,25 @@ STRIPE_CUSTOMER_PORTAL_ENABLED = (
 
 # Stripe CLI webhook forwarding (for development)
 STRIPE_CLI_WEBHOOK_PORT = os.environ.get("STRIPE_CLI_WEBHOOK_PORT", "8000")
+
+# Webhook processing (events are persisted and handled by Celery)
+STRIPE_WEBHOOK_MAX_RETRIES = int(os.environ.get("STRIPE_WEBHOOK_MAX_RETRIES", "8"))
+STRIPE_WEBHOOK_REQUEUE_AFTER_SECONDS = int(
+    os.environ.get("STRIPE_WEBHOOK_REQUEUE_AFTER_SECONDS", "300")
+)
+# How long a worker owns an event it is processing; must outlast the slowest
+# handler, including Stripe's network retries
+STRIPE_WEBHOOK_LEASE_SECONDS = int(
+    os.environ.get("STRIPE_WEBHOOK_LEASE_SECONDS", "600")
+)
+
+# Per-user subscription entitlement cache (invalidated on subscription changes,
+# the TTL is a safety net)
+STRIPE_ENTITLEMENT_CACHE_TTL = int(os.environ.get("STRIPE_ENTITLEMENT_CACHE_TTL", "60"))
+
+# Price catalog (rebuilt by webhooks and the sync_price_catalog beat task)
+STRIPE_PRICE_CATALOG_CACHE_TTL = int(
+    os.environ.get("STRIPE_PRICE_CATALOG_CACHE_TTL", str(60 * 60 * 24))
+)
+# Cache-Control max-age for browsers and nginx on the prices endpoint
+STRIPE_PRICE_CATALOG_MAX_AGE = int(os.environ.get("STRIPE_PRICE_CATALOG_MAX_AGE", "60"))
@@ -1,25 +1,33 @@
 import importlib
 import inspect
-import sys
 from types import ModuleType
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 
 import structlog
 
 logger = structlog.get_logger(__name__)
 
 
+def _members(obj_type: str, obj_value: Any) -> Iterable[Tuple[str, Any]]:
+    if obj_type == "module":
+        # A module's own namespace, without the sorting and descriptor
+        # lookups of `inspect.getmembers`
+        return vars(obj_value).items()
+    return inspect.getmembers(obj_value)
+
+
 def _extract_attributes(
     obj_type: str,
     obj_name: str,
     obj_value: Any,
-    names: Dict[str, Dict[str, str]],
+    names: Dict[str, str],
+    values: Dict[str, Any],
     uppercase_only: bool,
     warn_duplicates: bool,
     exclude_names: List[str],
 ) -> None:
     # List attributes and other things
-    for member_name, member in inspect.getmembers(obj_value):
+    for member_name, member in _members(obj_type, obj_value):
         if (
             type(member) == ModuleType
             or member_name.startswith("__")
@@ -28,14 +36,18 @@ def _extract_attributes(
         ):
             continue
 
-        if member_name in names.keys():
+        if member_name in names:
             if warn_duplicates:
-                logging.warning(
-                    f"Duplicate module member name '{member_name}' found in module '{obj_name}'. Member exists in '{names[member_name]}'."
+                logger.warning(
+                    "Duplicate module member name",
+                    member=member_name,
+                    module=obj_name,
+                    existing_module=names[member_name],
                 )
             continue
 
-        names[member_name] = {"type": obj_type, "value": obj_name}
+        names[member_name] = obj_name
+        values[member_name] = member
 
 
 def flatten_module_attributes(
@@ -50,21 +62,23 @@ def flatten_module_attributes(
     """
     Flatten the attributes of imports and other objects to module attributes.
 
-    This function will take a module (parent module) which has other modules
-    imported (child modules), and flatten the attributes of the child modules,
-    or a subset of child modules so their attributes appear as if they are in
-    the parent module. When `getattr` is called on the parent module, `getattr`
-    will be called against the child module for the attribute requested.
+    This function will take a module (parent module) and a list of child
+    modules, and bind the attributes of the child modules into the parent
+    module's namespace so they appear as if they were defined there. Values
+    are copied once, so attribute access on the parent module is a plain
+    dictionary lookup. If two children define the same name, the first one
+    listed wins.
 
-    If a list of modules is provided and a prefix is provided, only modules
-    names begin with the prefix will be flattened.
+    If a prefix is provided, only modules whose names begin with the prefix
+    will be flattened.
 
     The `extra_imports` list can be used to pass in the names (str) of other
     child modules or objects in child modules (tuple) to flatten.
 
     Args:
         module: Module to be flattened
-        imports: Imported modules whose attributes should be flattened
+        imports: Names of the modules whose attributes should be flattened,
+            imported if needed
         extra_imports: Additional modules or classes whose attributes should be flattened
         prefix: Prefix of imports to include when flattening imported modules
         warn_duplicates: Warn if duplicate attribute names are encountered, default: `False`
@@ -78,8 +92,8 @@ def flatten_module_attributes(
         extra_imports = []
     if not exclude_names:
         exclude_names = []
-    default_getattr_name = "__getattr_original__"
-    names: Dict[str, Dict[str, str]] = {}
+    names: Dict[str, str] = {}
+    values: Dict[str, Any] = {}
 
     objects_by_name: Dict[str, Any] = {}
     for i in extra_imports:
@@ -109,46 +123,26 @@ def flatten_module_attributes(
         _extract_attributes(
             obj_type="module",
             obj_name=imported_module,
-            obj_value=sys.modules[imported_module],
+            obj_value=importlib.import_module(imported_module),
             names=names,
+            values=values,
             uppercase_only=uppercase_only,
             warn_duplicates=warn_duplicates,
             exclude_names=exclude_names,
         )
 
-    for obj_name in objects_by_name.keys():
+    for obj_name, obj_value in objects_by_name.items():
         _extract_attributes(
             obj_type="object",
             obj_name=obj_name,
-            obj_value=objects_by_name[obj_name],
+            obj_value=obj_value,
             names=names,
+            values=values,
             uppercase_only=uppercase_only,
             warn_duplicates=warn_duplicates,
             exclude_names=exclude_names,
         )
 
-    def error_getattr(name: str) -> None:
-        raise AttributeError(f"module '{module.__name__}' has no attribute '{name}'")
-
-    def flat_dir() -> List[str]:
-        return sorted(set(module.__dict__.keys()).union(set(names.keys())))
-
-    def flat_getattr(name: str) -> Any:
-        if name not in names.keys():
-            return getattr(module, "__getattr_original__")(name)
-
-        if name in names.keys() and names[name].get("type") == "module":
-            mod_name = names[name].get("value")
-            assert isinstance(mod_name, str)
-            return getattr(sys.modules[mod_name], name)
-        if name in names.keys() and names[name].get("type") == "object":
-            obj_name = names[name].get("value")
-            assert isinstance(obj_name, str)
-            return getattr(objects_by_name[obj_name], name)
-
-        return error_getattr(name)
-
-    _getattr = getattr(module, "__getattr__", error_getattr)
-    setattr(module, default_getattr_name, _getattr)
-    setattr(module, "__getattr__", flat_getattr)
-    setattr(module, "__dir__", flat_dir)
+    # Names the parent module defines itself take precedence
+    for name, value in values.items():
+        module.__dict__.setdefault(name, value)
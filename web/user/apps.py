@@ -1,4 +1,5 @@
-from django.apps import AppConfig
+from django.apps import AppConfig, apps
+from django.core.exceptions import ImproperlyConfigured
 
 
 class UserConfig(AppConfig):
@@ -6,10 +7,8 @@ class UserConfig(AppConfig):
     verbose_name = "users and authentication module"
 
     def ready(self):
-        try:
-            import mail  # noqa: F401
-        except ImportError:
-            raise ImportError(
-                "UserConfig.ready() failed to import mail."
+        if not apps.is_installed("mail"):
+            raise ImproperlyConfigured(
+                "UserConfig.ready() failed, mail is not installed. "
                 "The sol mail module is required for the user module to function."
             )
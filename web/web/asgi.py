@@ -1,6 +1,9 @@
 import os
 
+from channels.auth import AuthMiddlewareStack
 from channels.routing import ProtocolTypeRouter, URLRouter
+from channels.security.websocket import OriginValidator
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 from django.urls import re_path
 
@@ -8,12 +11,20 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "settings")
 
 django_asgi_application = get_asgi_application()
 
+# Consumers import models, so they are loaded once the app registry is ready
+from billing import routing as billing_routing  # noqa: E402
+
 http_routes = [re_path(r"", django_asgi_application)]
-websocket_routes = []
+websocket_routes = [*billing_routing.websocket_urlpatterns]
 
 application = ProtocolTypeRouter(
     {
         "http": URLRouter(http_routes),
-        "websocket": URLRouter(websocket_routes),
+        # Sockets authenticate with the session cookie, so only the front end's
+        # origins may open them
+        "websocket": OriginValidator(
+            AuthMiddlewareStack(URLRouter(websocket_routes)),
+            settings.CORS_ALLOWED_ORIGINS,
+        ),
     }
 )
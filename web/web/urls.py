@@ -9,15 +9,16 @@ from django.views.defaults import (
     permission_denied,
     server_error,
 )
-from spectacular import urls as spectacular_urls
 
 logger = structlog.get_logger(__name__)
 
 urlpatterns = [
     path("api/admin/", admin.site.urls),
-    path("api/healthcheck/", views.healthcheck),
+    path("api/healthcheck/", views.readiness),
+    path("api/health/live/", views.liveness),
+    path("api/health/ready/", views.readiness),
     path("api/metrics/", include("metrics.urls")),
-    path("api/stripe/", include("stripe.urls")),
+    path("api/stripe/", include("billing.urls")),
 ]
 
 if config("ENVIRONMENT") == "prod" and not config(